@@ -1,6 +1,8 @@
+import os
 from pathlib import Path
 
 from google.adk.agents import LlmAgent
+from google.adk.tools.mcp_tool.mcp_session_manager import StreamableHTTPConnectionParams
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
 
 from local_mcp.prompt import DB_MCP_PROMPT
@@ -10,18 +12,50 @@ PATH_TO_YOUR_MCP_SERVER_SCRIPT = str((Path(__file__).parent / "server.py").resol
 
 print(f"Path to MCP server script: {PATH_TO_YOUR_MCP_SERVER_SCRIPT}")
 
+# Set MCP_SERVER_URL (e.g. http://127.0.0.1:8765/mcp) to share one server
+# started with `python3 server.py --transport http` instead of spawning a
+# stdio server for every agent process.
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
+# Or set MCP_SERVER_POOL_SIZE to start warm HTTP servers in the background as
+# soon as the agent is imported (see server_pool.py).
+MCP_SERVER_POOL_SIZE = int(os.getenv("MCP_SERVER_POOL_SIZE", "0"))
+
+if MCP_SERVER_URL:
+    mcp_toolset = MCPToolset(
+        connection_params=StreamableHTTPConnectionParams(url=MCP_SERVER_URL)
+    )
+elif MCP_SERVER_POOL_SIZE > 0:
+    import atexit
+
+    from local_mcp.pooled_toolset import PooledMCPToolset
+    from local_mcp.server_pool import SharedServerPool
+
+    # One supervisor per host: the first agent process starts it, the others
+    # use its servers (and take over if it goes away).
+    server_pool = SharedServerPool(
+        size=MCP_SERVER_POOL_SIZE,
+        base_port=int(os.getenv("MCP_HTTP_PORT", "8765")),
+        max_requests=int(os.getenv("MCP_SERVER_MAX_REQUESTS", "0")),
+        max_rss_mb=float(os.getenv("MCP_SERVER_MAX_RSS_MB", "0")),
+    )
+    server_pool.start()
+    atexit.register(server_pool.stop)
+    # The URL is chosen for each connection, so sessions spread over the
+    # servers and reconnect to another one when theirs is recycled.
+    mcp_toolset = PooledMCPToolset(server_pool.acquire_url, server_pool.server_pid)
+else:
+    mcp_toolset = MCPToolset(
+        connection_params=StdioServerParameters(
+            command="python3",
+            args=[PATH_TO_YOUR_MCP_SERVER_SCRIPT],
+        )
+        # tool_filter=['list_tables'] # Optional: ensure only specific tools are loaded
+    )
+
 
 root_agent = LlmAgent(
     model="gemini-2.0-flash",
     name="db_mcp_client_agent",
     instruction=DB_MCP_PROMPT,
-    tools=[
-        MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_YOUR_MCP_SERVER_SCRIPT],
-            )
-            # tool_filter=['list_tables'] # Optional: ensure only specific tools are loaded
-        )
-    ],
+    tools=[mcp_toolset],
 )
\ No newline at end of file
@@ -0,0 +1,166 @@
+import sqlite3
+from itertools import groupby
+
+from query_builder import quote_identifier
+
+
+def _chunks(rows: list[dict], chunk_size: int):
+    for start in range(0, len(rows), chunk_size):
+        yield start, rows[start : start + chunk_size]
+
+
+def _column_groups(start: int, chunk: list[dict]):
+    """Splits a chunk into runs of consecutive rows that share the same columns.
+
+    ``executemany`` needs one SQL statement per run; most batches are a single
+    run because every row has the same keys.
+    """
+    indexed = list(enumerate(chunk, start))
+    for columns, group in groupby(indexed, key=lambda item: tuple(item[1].keys())):
+        yield columns, list(group)
+
+
+def _execute_group(
+    conn: sqlite3.Connection,
+    sql: str,
+    group: list[tuple[int, tuple]],
+    conflicts: list[dict],
+) -> int:
+    """Runs one statement for a group of rows and returns the number of changed rows.
+
+    The fast path is a single ``executemany``. If any row violates a
+    constraint, the whole group is rolled back to its savepoint and replayed
+    row by row, so only the offending rows are skipped and reported.
+    """
+    # cursor.rowcount counts only rows changed by the statement itself, not
+    # rows written by triggers (e.g. the full-text index).
+    conn.execute("SAVEPOINT batch_group")
+    try:
+        cursor = conn.executemany(sql, [params for _, params in group])
+        conn.execute("RELEASE SAVEPOINT batch_group")
+        return max(cursor.rowcount, 0)
+    except sqlite3.IntegrityError:
+        conn.execute("ROLLBACK TO SAVEPOINT batch_group")
+        conn.execute("RELEASE SAVEPOINT batch_group")
+
+    changed = 0
+    for index, params in group:
+        conn.execute("SAVEPOINT batch_row")
+        try:
+            changed += max(conn.execute(sql, params).rowcount, 0)
+            conn.execute("RELEASE SAVEPOINT batch_row")
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK TO SAVEPOINT batch_row")
+            conn.execute("RELEASE SAVEPOINT batch_row")
+            conflicts.append({"index": index, "error": str(e)})
+    return changed
+
+
+def _check_columns(columns, known_columns: list[str], table_name: str) -> None:
+    unknown = [column for column in columns if column not in known_columns]
+    if unknown:
+        raise ValueError(
+            f"Unknown column(s) {', '.join(map(str, unknown))} for table '{table_name}'."
+        )
+
+
+def run_batch(
+    conn: sqlite3.Connection,
+    mode: str,
+    table_name: str,
+    rows: list[dict],
+    known_columns: list[str],
+    key_columns: list[str] | None = None,
+    chunk_size: int = 500,
+) -> dict:
+    """Inserts, updates or upserts many rows inside a single transaction.
+
+    Args:
+        conn: The writer connection.
+        mode: "insert", "update" or "upsert".
+        table_name: Target table, already validated by the caller.
+        rows: Row dictionaries (column name -> value).
+        known_columns: Column names of ``table_name``.
+        key_columns: Columns identifying a row; required for "update" and
+                     "upsert" (for upserts they must be covered by a unique
+                     index or the primary key).
+        chunk_size: Rows handed to one ``executemany`` call.
+
+    Returns:
+        dict: 'rows_affected', 'conflicts' (list of {'index', 'error'} for rows
+              skipped because of constraint violations) and 'chunks'.
+    """
+    key_columns = list(key_columns or [])
+    if mode in ("update", "upsert") and not key_columns:
+        raise ValueError(f"key_columns is required for {mode}_many.")
+    _check_columns(key_columns, known_columns, table_name)
+
+    table = quote_identifier(table_name)
+    conflicts: list[dict] = []
+    rows_affected = 0
+    chunk_count = 0
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for start, chunk in _chunks(rows, chunk_size):
+            chunk_count += 1
+            for columns, group in _column_groups(start, chunk):
+                _check_columns(columns, known_columns, table_name)
+                if mode == "update":
+                    set_columns = [c for c in columns if c not in key_columns]
+                    missing_keys = [c for c in key_columns if c not in columns]
+                    if missing_keys or not set_columns:
+                        for index, _ in group:
+                            conflicts.append(
+                                {
+                                    "index": index,
+                                    "error": "Row must contain every key column and at least one other column.",
+                                }
+                            )
+                        continue
+                    sql = (
+                        f"UPDATE {table} SET "
+                        + ", ".join(f"{quote_identifier(c)} = ?" for c in set_columns)
+                        + " WHERE "
+                        + " AND ".join(f"{quote_identifier(c)} = ?" for c in key_columns)
+                    )
+                    params = [
+                        (index, tuple(row[c] for c in set_columns + key_columns))
+                        for index, row in group
+                    ]
+                else:
+                    sql = (
+                        f"INSERT INTO {table} ("
+                        + ", ".join(quote_identifier(c) for c in columns)
+                        + ") VALUES ("
+                        + ", ".join("?" for _ in columns)
+                        + ")"
+                    )
+                    if mode == "upsert":
+                        update_columns = [c for c in columns if c not in key_columns]
+                        sql += (
+                            " ON CONFLICT ("
+                            + ", ".join(quote_identifier(c) for c in key_columns)
+                            + ") DO "
+                        )
+                        sql += (
+                            "UPDATE SET "
+                            + ", ".join(
+                                f"{quote_identifier(c)} = excluded.{quote_identifier(c)}"
+                                for c in update_columns
+                            )
+                            if update_columns
+                            else "NOTHING"
+                        )
+                    params = [(index, tuple(row.values())) for index, row in group]
+                rows_affected += _execute_group(conn, sql, params, conflicts)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        "rows_affected": rows_affected,
+        "conflicts": conflicts,
+        "chunks": chunk_count,
+    }
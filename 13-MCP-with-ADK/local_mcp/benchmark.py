@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVER_SCRIPT = str((Path(__file__).parent / "server.py").resolve())
+
+
+# --- Scenarios ---
+def _scenarios(user_count: int, rng: random.Random) -> dict:
+    """Tool calls to measure. Each entry returns (tool_name, arguments)."""
+    inserted: list[int] = []
+
+    def insert_args():
+        return "insert_data", {
+            "table_name": "todos",
+            "data": {"user_id": rng.randint(1, user_count), "task": "benchmark task", "completed": 0},
+        }
+
+    def delete_args():
+        # Deletes a row created by insert_data so the database size stays put.
+        row_id = inserted.pop() if inserted else -1
+        return "delete_data", {"table_name": "todos", "condition": f"id = {row_id}"}
+
+    return {
+        "list_db_tables": lambda: ("list_db_tables", {"dummy_param": "benchmark"}),
+        "get_table_schema": lambda: ("get_table_schema", {"table_name": "todos"}),
+        "query_db_table": lambda: (
+            "query_db_table",
+            {
+                "table_name": "todos",
+                "columns": "*",
+                "condition": f"user_id = {rng.randint(1, user_count)}",
+            },
+        ),
+        "query_db_table_scan": lambda: (
+            "query_db_table",
+            {
+                "table_name": "todos",
+                "columns": "id, task",
+                "condition": f"completed = 0 AND task LIKE '%{rng.choice(['book', 'bill', 'trip'])}%'",
+            },
+        ),
+        "insert_data": insert_args,
+        "delete_data": delete_args,
+    }, inserted
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: int, wall_seconds: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "calls": len(values),
+        "errors": errors,
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "throughput_per_s": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+
+
+async def _measure(call, make_args, iterations: int, concurrency: int, on_result=None) -> dict:
+    """Runs ``iterations`` calls spread over ``concurrency`` concurrent workers."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = iterations
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            name, args = make_args()
+            started = time.perf_counter()
+            text = await call(name, args)
+            latencies.append((time.perf_counter() - started) * 1000)
+            result = json.loads(text)
+            if isinstance(result, dict) and result.get("success") is False:
+                errors += 1
+            elif on_result is not None:
+                on_result(result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_scenarios(call, user_count: int, iterations: int, warmup: int, concurrency: int, seed: int):
+    rng = random.Random(seed)
+    scenarios, inserted = _scenarios(user_count, rng)
+    results = {}
+    for name, make_args in scenarios.items():
+        on_result = None
+        if name == "insert_data":
+            on_result = lambda result: inserted.append(result["row_id"])  # noqa: E731
+        if warmup:
+            await _measure(call, make_args, warmup, 1, on_result)
+        results[name] = await _measure(call, make_args, iterations, concurrency, on_result)
+        print(f"{name:22} {results[name]}", flush=True)
+    return results
+
+
+# --- Transports ---
+async def bench_direct(args) -> dict:
+    """Calls the MCP handler in-process: ADK tool wrapper, executor, SQL and encoding."""
+    import server
+
+    maintenance_task = server.start_server_services()
+    try:
+
+        async def call(name, arguments):
+            return (await server.call_mcp_tool(name, arguments))[0].text
+
+        results = await run_scenarios(
+            call, args.user_count, args.iterations, args.warmup, args.concurrency, args.seed
+        )
+        results["_process"] = {"rss_bytes": server.process_rss_bytes()}
+        return results
+    finally:
+        server.stop_server_services(maintenance_task)
+
+
+def _child_rss_bytes() -> int | None:
+    """RSS of this process's server.py child (Linux only)."""
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+            pid = int(stat.parent.name)
+            if int(fields[1]) == os.getpid() and SERVER_SCRIPT in (stat.parent / "cmdline").read_text():
+                with open(f"/proc/{pid}/statm") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            continue
+    return None
+
+
+async def bench_stdio(args) -> dict:
+    """Drives a real ``server.py`` child process over the stdio transport."""
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[SERVER_SCRIPT],
+        env=dict(os.environ),
+    )
+    started = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            startup_ms = (time.perf_counter() - started) * 1000
+
+            async def call(name, arguments):
+                result = await session.call_tool(name, arguments)
+                return result.content[0].text
+
+            results = await run_scenarios(
+                call, args.user_count, args.iterations, args.warmup, args.concurrency, args.seed
+            )
+            results["_process"] = {
+                "rss_bytes": _child_rss_bytes(),
+                "startup_ms": round(startup_ms, 1),
+            }
+            return results
+
+
+# --- Reporting ---
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _dataset(db_path: str) -> dict:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return {
+            "path": db_path,
+            "users": conn.execute("SELECT count(*) FROM users").fetchone()[0],
+            "todos": conn.execute("SELECT count(*) FROM todos").fetchone()[0],
+            "size_bytes": os.path.getsize(db_path),
+        }
+    finally:
+        conn.close()
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float = 1.0) -> list[str]:
+    """Lists scenarios whose p95 latency grew by more than ``threshold`` x.
+
+    Increases smaller than ``min_delta_ms`` are ignored: sub-millisecond
+    scenarios jitter by more than any sensible ratio between runs.
+    """
+    regressions = []
+    for mode, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            before = baseline.get("results", {}).get(mode, {}).get(name)
+            if name.startswith("_") or not before or not before.get("p95_ms"):
+                continue
+            ratio = stats["p95_ms"] / before["p95_ms"]
+            line = (
+                f"{mode:6} {name:22} p95 {before['p95_ms']:9.3f} -> {stats['p95_ms']:9.3f} ms "
+                f"({ratio:5.2f}x)"
+            )
+            print(line)
+            if ratio > threshold and stats["p95_ms"] - before["p95_ms"] > min_delta_ms:
+                regressions.append(line)
+    return regressions
+
+
+async def main(args) -> int:
+    os.environ["MCP_DB_PATH"] = os.path.abspath(args.db)
+    # Keep the server's per-call logging out of the measurements.
+    os.environ.setdefault("MCP_LOG_LEVEL", "WARNING")
+    if not args.with_cache:
+        # Repeated arguments would otherwise measure cache hits, not the tools.
+        os.environ["MCP_RESULT_CACHE_ENTRIES"] = "0"
+    dataset = _dataset(os.environ["MCP_DB_PATH"])
+    args.user_count = dataset["users"]
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "result_cache": args.with_cache,
+        },
+        "dataset": dataset,
+        "results": {},
+    }
+    modes = ["direct", "stdio"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        print(f"== {mode} ({dataset['todos']:,} todos, {dataset['users']:,} users)", flush=True)
+        runner = bench_direct if mode == "direct" else bench_stdio
+        report["results"][mode] = await runner(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold}x:")
+            print("\n".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite DB MCP tools.")
+    parser.add_argument("--db", default=os.path.join(os.path.dirname(__file__), "bench.db"))
+    parser.add_argument("--mode", choices=["direct", "stdio", "both"], default="both")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--with-cache", action="store_true", help="Keep the result cache enabled."
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run.")
+    parser.add_argument(
+        "--threshold", type=float, default=1.25, help="Max allowed p95 ratio vs. the baseline."
+    )
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=1.0, help="Ignore p95 increases below this."
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,320 @@
+import asyncio
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable
+
+from loguru import logger
+
+from pagination import ROWID_ALIAS
+from query_builder import quote_identifier
+
+CHANGE_OPS = ("insert", "update", "delete")
+CHANGES_URI_SCHEME = "changes"
+# Filled by the TEMP triggers of the writer connection, emptied after each commit.
+# Trigger bodies may not qualify table names; unqualified names resolve to
+# the temp schema first.
+_PENDING_TABLE = "mcp_pending_changes"
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def change_trigger_names(table_name: str) -> list[str]:
+    return [f"mcp_changes_{table_name}_{op}" for op in CHANGE_OPS]
+
+
+def install_change_triggers(conn: sqlite3.Connection, tables: Iterable[str]) -> list[str]:
+    """Creates the TEMP triggers that log row changes of ``tables`` on this connection.
+
+    TEMP triggers belong to the connection that creates them: they do not
+    touch the database file or its schema_version, and only writes made
+    through this connection are logged. Each trigger appends
+    ``(table, op, rowid)`` to a TEMP table in the writing transaction, so a
+    rollback discards the entries with the rows. Tables that cannot carry
+    such a trigger (WITHOUT ROWID, virtual and ``sqlite_*`` tables) are
+    skipped.
+
+    Returns:
+        The tables whose changes are now logged.
+    """
+    conn.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_PENDING_TABLE} "
+        "(table_name TEXT NOT NULL, op TEXT NOT NULL, row_id INTEGER)"
+    )
+    tracked = []
+    for table_name in tables:
+        if table_name.startswith("sqlite_"):
+            continue
+        try:
+            _create_change_triggers(conn, table_name)
+        except sqlite3.OperationalError as e:
+            logger.debug(f"ChangeFeed: not logging changes of '{table_name}': {e}")
+            continue
+        tracked.append(table_name)
+    conn.commit()
+    return tracked
+
+
+def _create_change_triggers(conn: sqlite3.Connection, table_name: str) -> None:
+    quoted_table = quote_identifier(table_name)
+    conn.execute(f"SELECT rowid FROM main.{quoted_table} LIMIT 0")
+    table = _sql_string(table_name)
+    insert_trigger, update_trigger, delete_trigger = (
+        quote_identifier(name) for name in change_trigger_names(table_name)
+    )
+    # Recreated rather than kept: the table may have been dropped and
+    # recreated by another connection since they were made.
+    for trigger in (insert_trigger, update_trigger, delete_trigger):
+        conn.execute(f"DROP TRIGGER IF EXISTS temp.{trigger}")
+    conn.execute(
+        f"CREATE TEMP TRIGGER {insert_trigger} AFTER INSERT ON main.{quoted_table} "
+        f"BEGIN INSERT INTO {_PENDING_TABLE} VALUES ({table}, 'insert', new.rowid); END"
+    )
+    # A rowid that changes is reported as a delete of the old one.
+    conn.execute(
+        f"CREATE TEMP TRIGGER {update_trigger} AFTER UPDATE ON main.{quoted_table} "
+        f"BEGIN INSERT INTO {_PENDING_TABLE} SELECT {table}, 'delete', old.rowid "
+        f"WHERE old.rowid IS NOT new.rowid; "
+        f"INSERT INTO {_PENDING_TABLE} VALUES ({table}, 'update', new.rowid); END"
+    )
+    conn.execute(
+        f"CREATE TEMP TRIGGER {delete_trigger} AFTER DELETE ON main.{quoted_table} "
+        f"BEGIN INSERT INTO {_PENDING_TABLE} VALUES ({table}, 'delete', old.rowid); END"
+    )
+
+
+def drain_changes(conn: sqlite3.Connection) -> list[tuple[str, str, int]]:
+    """Returns and clears the changes logged by the triggers since the last call.
+
+    Call it after the writing transaction committed; the TEMP table is not
+    part of the database file, so clearing it costs no disk write.
+    """
+    changes = conn.execute(
+        f"SELECT table_name, op, row_id FROM {_PENDING_TABLE} ORDER BY rowid"
+    ).fetchall()
+    if changes:
+        conn.execute(f"DELETE FROM {_PENDING_TABLE}")
+        conn.commit()
+    return [tuple(change) for change in changes]
+
+
+def fetch_rows(
+    conn: sqlite3.Connection, table_name: str, row_ids: Iterable[int], chunk_size: int = 500
+) -> dict[int, dict]:
+    """Current rows of ``table_name`` by rowid; rows deleted since are missing."""
+    row_ids = list(row_ids)
+    rows = {}
+    for offset in range(0, len(row_ids), chunk_size):
+        chunk = row_ids[offset : offset + chunk_size]
+        cursor = conn.execute(
+            f"SELECT rowid AS {ROWID_ALIAS}, * FROM {quote_identifier(table_name)} "
+            f"WHERE rowid IN ({', '.join('?' for _ in chunk)})",
+            chunk,
+        )
+        for row in cursor:
+            record = dict(row)
+            rows[record.pop(ROWID_ALIAS)] = record
+    return rows
+
+
+class ChangeLog:
+    """Bounded in-memory log of the row changes made to one database.
+
+    Every change gets the next sequence number; a reader keeps the last
+    number it saw and asks for what came after it, so a poll costs as much
+    as the changes since then, not the size of the table. Only the last
+    ``max_entries`` changes are kept. A reader that falls further behind
+    than that gets ``reset`` and has to re-read the table.
+
+    Sequence numbers start at the creation time in microseconds rather than
+    at 0, so they keep increasing when the log is recreated (server restart,
+    database closed and reopened). A cursor from an older log is therefore
+    always behind the oldest entry and reported as ``reset``.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        on_change: Callable[[set[str]], None] | None = None,
+    ):
+        """
+        Args:
+            max_entries: Changes kept at most; older ones are dropped.
+            on_change: Called with the changed tables after each append.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        # (seq, table_name, op, row_id), in sequence order without gaps
+        self._entries: deque[tuple[int, str, str, int]] = deque(maxlen=max_entries)
+        self._latest_seq = time.time_ns() // 1000
+        self._appended = 0
+
+    @property
+    def latest_seq(self) -> int:
+        return self._latest_seq
+
+    def append(self, changes: list[tuple[str, str, int]]) -> None:
+        """Adds changes, each ``(table_name, op, row_id)``, in the order they happened."""
+        if not changes:
+            return
+        with self._lock:
+            seq = self._latest_seq
+            # Only the tail can survive the maxlen; skip numbering the rest.
+            skipped = max(0, len(changes) - self.max_entries)
+            seq += skipped
+            for table_name, op, row_id in changes[skipped:]:
+                seq += 1
+                self._entries.append((seq, table_name, op, row_id))
+            self._latest_seq = seq
+            self._appended += len(changes)
+        if self._on_change is not None:
+            try:
+                self._on_change({table_name for table_name, _, _ in changes})
+            except Exception as e:
+                logger.warning(f"ChangeLog: change listener failed: {e}")
+
+    def since(self, table_name: str, seq: int, limit: int) -> dict:
+        """Changes of ``table_name`` after ``seq``, at most ``limit`` of them.
+
+        Returns:
+            dict: 'changes' (list of (seq, op, row_id)), 'next_seq' (the
+            cursor for the next call), 'has_more', 'latest_seq' and 'reset'
+            (True if changes after ``seq`` were already dropped, or ``seq``
+            does not belong to this log).
+        """
+        with self._lock:
+            latest = self._latest_seq
+            oldest = self._entries[0][0] if self._entries else latest + 1
+            if seq < oldest - 1 or seq > latest:
+                return {
+                    "changes": [],
+                    "next_seq": latest,
+                    "has_more": False,
+                    "latest_seq": latest,
+                    "reset": True,
+                }
+            start = seq - oldest + 1
+            # The entries are numbered without gaps, so ``seq`` gives the position.
+            matches = []
+            for entry_seq, entry_table, op, row_id in islice(self._entries, start, None):
+                if entry_table == table_name:
+                    matches.append((entry_seq, op, row_id))
+                    if len(matches) > limit:
+                        break
+        has_more = len(matches) > limit
+        matches = matches[:limit]
+        return {
+            "changes": matches,
+            "next_seq": matches[-1][0] if has_more else latest,
+            "has_more": has_more,
+            "latest_seq": latest,
+            "reset": False,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "appended": self._appended,
+                "oldest_seq": self._entries[0][0] if self._entries else None,
+                "latest_seq": self._latest_seq,
+            }
+
+
+def changes_uri(database_name: str, table_name: str) -> str:
+    return f"{CHANGES_URI_SCHEME}://{database_name}/{table_name}"
+
+
+def parse_changes_uri(uri: str) -> tuple[str, str]:
+    """Splits ``changes://<database>/<table>`` into (database, table)."""
+    prefix = f"{CHANGES_URI_SCHEME}://"
+    database_name, _, table_name = uri.removeprefix(prefix).partition("/")
+    if not uri.startswith(prefix) or not database_name or not table_name or "/" in table_name:
+        raise ValueError(f"Invalid change feed URI '{uri}', expected {prefix}<database>/<table>.")
+    return database_name, table_name
+
+
+class ChangeSubscriptions:
+    """MCP sessions subscribed to ``changes://<database>/<table>`` resources.
+
+    ``notify`` may be called from any thread; it schedules a
+    ``notifications/resources/updated`` per subscribed session on the event
+    loop. While one is still waiting to be sent, further changes to the same
+    table do not queue another: the client reads everything new with one
+    ``changes_since`` call anyway. Sessions are held weakly, so a closed
+    session drops out on its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: dict[str, weakref.WeakSet] = {}
+        self._pending: set[tuple[int, str]] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sent = 0
+        self._coalesced = 0
+
+    def subscribe(self, uri: str, session) -> None:
+        """Must be called on the event loop (from the MCP subscribe handler)."""
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            self._sessions.setdefault(uri, weakref.WeakSet()).add(session)
+
+    def unsubscribe(self, uri: str, session) -> None:
+        with self._lock:
+            sessions = self._sessions.get(uri)
+            if sessions is not None:
+                sessions.discard(session)
+                if not sessions:
+                    del self._sessions[uri]
+
+    def notify(self, database_name: str, tables: Iterable[str]) -> None:
+        loop = self._loop
+        if loop is None or not self._sessions:
+            return
+        scheduled = []
+        with self._lock:
+            for table_name in tables:
+                uri = changes_uri(database_name, table_name)
+                for session in list(self._sessions.get(uri, ())):
+                    key = (id(session), uri)
+                    if key in self._pending:
+                        self._coalesced += 1
+                        continue
+                    self._pending.add(key)
+                    scheduled.append((key, session, uri))
+        for key, session, uri in scheduled:
+            try:
+                loop.call_soon_threadsafe(self._schedule_send, key, session, uri)
+            except RuntimeError:  # the loop is closed
+                with self._lock:
+                    self._pending.discard(key)
+
+    def _schedule_send(self, key, session, uri: str) -> None:
+        asyncio.ensure_future(self._send(key, session, uri))
+
+    async def _send(self, key, session, uri: str) -> None:
+        with self._lock:
+            self._pending.discard(key)
+        try:
+            await session.send_resource_updated(uri)
+            self._sent += 1
+        except Exception as e:
+            logger.debug(f"ChangeSubscriptions: dropping subscriber of {uri}: {e}")
+            self.unsubscribe(uri, session)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscriptions": sum(len(sessions) for sessions in self._sessions.values()),
+                "notifications_sent": self._sent,
+                "notifications_coalesced": self._coalesced,
+            }
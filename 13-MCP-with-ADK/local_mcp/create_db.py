@@ -1,9 +1,57 @@
+import argparse
 import os
 import sqlite3
 from loguru import logger
 
+from db_profile import apply_profile, describe_connection, get_profile
+from fts import DEFAULT_FTS_COLUMNS, ensure_fts_indexes, parse_fts_config
+
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "database.db")
-print(f"Database path: {DATABASE_PATH}")
+
+def create_tables(cursor: sqlite3.Cursor):
+    """Creates the users and todos tables if they don't exist yet."""
+    # Create users table
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT NOT NULL
+        )
+    """
+    )
+    logger.info("Created 'users' table.")
+
+    # Create todos table
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            task TEXT NOT NULL,
+            completed BOOLEAN NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """
+    )
+    logger.info("Created 'todos' table.")
+
+
+def prepare_database(conn: sqlite3.Connection) -> None:
+    """Converts a database for the MCP server: journal mode and full-text indexes.
+
+    The server leaves both alone unless MCP_DB_PREPARE_ON_OPEN is set, so a
+    database it is pointed at is only changed by writes made through its tools.
+    """
+    profile_name, profile = get_profile()
+    apply_profile(conn, profile)
+    logger.info(
+        f"Applied database profile '{profile_name}': {describe_connection(conn)}"
+    )
+    config = parse_fts_config(os.getenv("MCP_FTS_COLUMNS", DEFAULT_FTS_COLUMNS))
+    rebuilt = ensure_fts_indexes(conn, config)
+    logger.info(f"Full-text indexes ready for {sorted(config)} (built: {rebuilt or 'none'}).")
+
 
 def create_database():
     try:
@@ -22,31 +70,7 @@ def create_database():
 
         logger.info(f"Creating database at {DATABASE_PATH}...")
         
-        # Create users table
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT NOT NULL
-            )
-        """
-        )
-        logger.info("Created 'users' table.")
-
-        # Create todos table
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS todos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                task TEXT NOT NULL,
-                completed BOOLEAN NOT NULL DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        """
-        )
-        logger.info("Created 'todos' table.")
+        create_tables(cursor)
 
         # Insert dummy users (ignore if they already exist)
         dummy_users = [
@@ -77,6 +101,7 @@ def create_database():
         logger.info(f"Inserted {len(dummy_todos)} dummy todos.")
 
         conn.commit()
+        prepare_database(conn)
         logger.info("Database created and populated successfully.")
         conn.close()
 
@@ -94,4 +119,19 @@ def create_database():
 
 
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Create the example SQLite database.")
+    parser.add_argument(
+        "--prepare",
+        metavar="PATH",
+        help="Only prepare an existing database for the server (journal mode and "
+        "full-text indexes); no tables or rows are added.",
+    )
+    args = parser.parse_args()
+    if args.prepare:
+        print(f"Preparing database: {args.prepare}")
+        with sqlite3.connect(args.prepare) as conn:
+            prepare_database(conn)
+        conn.close()
+    else:
+        print(f"Database path: {DATABASE_PATH}")
+        create_database()
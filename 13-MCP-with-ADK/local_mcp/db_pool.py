@@ -0,0 +1,194 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from loguru import logger
+
+
+class ConnectionPool:
+    """A bounded pool of long-lived SQLite connections.
+
+    The pool keeps up to ``max_readers`` reader connections and exactly one
+    writer connection. Connections are opened lazily, reused across tool calls
+    (so SQLite's page cache survives between calls) and only closed when the
+    pool is shut down or a health check fails.
+
+    A checked-out connection is bound to the thread that checked it out: nested
+    ``reader()`` / ``writer()`` blocks on the same thread get the same
+    connection back instead of taking a second one from the pool.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[bool], sqlite3.Connection],
+        max_readers: int = 4,
+        timeout: float = 5.0,
+        health_check_interval: float = 30.0,
+    ):
+        """
+        Args:
+            connect: Factory that opens a new connection. It receives
+                     ``read_only=True`` for reader connections.
+            max_readers: Maximum number of reader connections kept open.
+            timeout: Seconds to wait for a free connection before giving up.
+            health_check_interval: Connections idle for longer than this many
+                                   seconds are pinged before being handed out.
+        """
+        if max_readers < 1:
+            raise ValueError("max_readers must be at least 1.")
+        self._connect = connect
+        self.max_readers = max_readers
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle_readers: queue.LifoQueue = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._all_readers: set[sqlite3.Connection] = set()
+        self._last_used: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+
+        self._local = threading.local()
+        self._closed = False
+
+    # --- Connection lifecycle ---
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        conn = self._connect(read_only)
+        self._last_used[id(conn)] = time.monotonic()
+        logger.debug(f"ConnectionPool: opened {'reader' if read_only else 'writer'} connection.")
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Pings connections that have been idle for a while."""
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"ConnectionPool: health check failed, reconnecting: {e}")
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("Connection pool has been closed.")
+
+    # --- Checkout helpers ---
+    @contextmanager
+    def reader(self):
+        """Checks out a reader connection for the duration of the block."""
+        self._ensure_open()
+        held = getattr(self._local, "reader", None)
+        if held is not None:
+            # Re-entrant use on the same thread.
+            yield held
+            return
+
+        if not self._reader_slots.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"Timed out after {self.timeout}s waiting for a reader connection."
+            )
+        conn = None
+        try:
+            try:
+                conn = self._idle_readers.get_nowait()
+            except queue.Empty:
+                conn = None
+            if conn is not None and not self._is_healthy(conn):
+                with self._lock:
+                    self._all_readers.discard(conn)
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._open(read_only=True)
+                with self._lock:
+                    self._all_readers.add(conn)
+
+            self._local.reader = conn
+            try:
+                yield conn
+            finally:
+                self._local.reader = None
+                self._last_used[id(conn)] = time.monotonic()
+                if conn.in_transaction:
+                    conn.rollback()
+                if self._closed:
+                    self._discard(conn)
+                else:
+                    self._idle_readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def writer(self):
+        """Checks out the single writer connection for the duration of the block.
+
+        Writers are serialized: only one thread holds the writer at a time.
+        """
+        self._ensure_open()
+        if not self._writer_lock.acquire(timeout=self.timeout):
+            raise TimeoutError(
+                f"Timed out after {self.timeout}s waiting for the writer connection."
+            )
+        try:
+            if self._writer is not None and not self._is_healthy(self._writer):
+                self._discard(self._writer)
+                self._writer = None
+            if self._writer is None:
+                self._writer = self._open(read_only=False)
+            try:
+                yield self._writer
+            finally:
+                self._last_used[id(self._writer)] = time.monotonic()
+        finally:
+            self._writer_lock.release()
+
+    # --- Introspection and shutdown ---
+    def stats(self) -> dict:
+        """Returns a snapshot of the pool's size and usage."""
+        with self._lock:
+            open_readers = len(self._all_readers)
+        return {
+            "max_readers": self.max_readers,
+            "open_readers": open_readers,
+            "idle_readers": self._idle_readers.qsize(),
+            "writer_open": self._writer is not None,
+            "closed": self._closed,
+        }
+
+    def close(self) -> None:
+        """Closes every idle connection and refuses further checkouts.
+
+        Connections that are checked out when this is called are closed as
+        soon as they are returned.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle_readers.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._all_readers.clear()
+        with self._writer_lock:
+            if self._writer is not None:
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+                self._discard(self._writer)
+                self._writer = None
+        logger.info("ConnectionPool: all connections closed.")
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+
+from loguru import logger
+
+# PRAGMA profiles for the SQLite backend. Select one with MCP_DB_PROFILE.
+#
+# - "default":     SQLite's own defaults (rollback journal, no mmap). A writer
+#                  blocks every reader while it commits.
+# - "performance": WAL journaling so readers never wait on the writer,
+#                  synchronous=NORMAL (durable across application crashes, may
+#                  lose the last commits on power loss), a 256 MiB memory-mapped
+#                  window and a 64 MiB page cache.
+# - "durable":     WAL journaling with synchronous=FULL, for when every commit
+#                  must survive a power failure.
+PROFILES = {
+    "default": {
+        "journal_mode": None,
+        "synchronous": None,
+        "cache_size": None,
+        "mmap_size": None,
+        "temp_store": None,
+        "busy_timeout": 5000,
+        "checkpoint_interval": 0,
+    },
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # Negative values are KiB: 64 MiB
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "checkpoint_interval": 60,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "mmap_size": 67108864,  # 64 MiB
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000,
+        "checkpoint_interval": 30,
+    },
+}
+
+DEFAULT_PROFILE = "performance"
+
+
+def get_profile(name: str | None = None) -> tuple[str, dict]:
+    """Resolves a profile by name, falling back to MCP_DB_PROFILE.
+
+    Returns:
+        A ``(name, settings)`` tuple.
+    """
+    name = (name or os.getenv("MCP_DB_PROFILE", DEFAULT_PROFILE)).lower()
+    if name not in PROFILES:
+        raise ValueError(
+            f"Unknown database profile '{name}'. Choose one of: {', '.join(PROFILES)}."
+        )
+    return name, PROFILES[name]
+
+
+def apply_profile(
+    conn: sqlite3.Connection,
+    profile: dict,
+    read_only: bool = False,
+    set_journal_mode: bool = True,
+) -> None:
+    """Applies a profile's PRAGMAs to a freshly opened connection.
+
+    ``journal_mode`` is stored in the database file and ``synchronous`` only
+    matters for connections that write, so both are skipped for read-only
+    connections. Pass ``set_journal_mode=False`` to keep the journal mode the
+    file already has instead of converting it.
+    """
+    if not read_only:
+        if profile["journal_mode"] and set_journal_mode:
+            conn.execute(f"PRAGMA journal_mode={profile['journal_mode']}")
+        if profile["synchronous"]:
+            conn.execute(f"PRAGMA synchronous={profile['synchronous']}")
+    if profile["cache_size"] is not None:
+        conn.execute(f"PRAGMA cache_size={int(profile['cache_size'])}")
+    if profile["mmap_size"] is not None:
+        conn.execute(f"PRAGMA mmap_size={int(profile['mmap_size'])}")
+    if profile["temp_store"]:
+        conn.execute(f"PRAGMA temp_store={profile['temp_store']}")
+    if profile["busy_timeout"] is not None:
+        conn.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+
+
+def describe_connection(conn: sqlite3.Connection) -> dict:
+    """Reads back the effective PRAGMA values of a connection."""
+    return {
+        pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in (
+            "journal_mode",
+            "synchronous",
+            "cache_size",
+            "mmap_size",
+            "temp_store",
+            "busy_timeout",
+        )
+    }
+
+
+def run_maintenance(conn: sqlite3.Connection) -> dict:
+    """Checkpoints the WAL and lets SQLite refresh its planner statistics.
+
+    Meant to be called periodically on the writer connection. A PASSIVE
+    checkpoint never blocks readers or the writer; it copies whatever it can.
+    """
+    result = {}
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode.lower() == "wal":
+        busy, wal_frames, checkpointed = conn.execute(
+            "PRAGMA wal_checkpoint(PASSIVE)"
+        ).fetchone()
+        result["checkpoint"] = {
+            "busy": bool(busy),
+            "wal_frames": wal_frames,
+            "checkpointed_frames": checkpointed,
+        }
+    conn.execute("PRAGMA optimize")
+    result["optimized"] = True
+    logger.debug(f"Database maintenance finished: {result}")
+    return result
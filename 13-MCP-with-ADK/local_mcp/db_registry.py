@@ -0,0 +1,232 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from loguru import logger
+
+# Names double as file names in the database directory; keep them plain.
+DATABASE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+DATABASE_SUFFIX = ".db"
+
+# Databases checked out by the tool call running on the current worker thread.
+_state = threading.local()
+
+
+def parse_database_config(spec: str) -> dict[str, str]:
+    """Parses ``"tenant_a=/data/a.db,tenant_b=/data/b.db"`` into {name: path}."""
+    databases = {}
+    for item in spec.split(","):
+        name, sep, path = item.partition("=")
+        if not item.strip():
+            continue
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"Invalid database entry '{item}', expected name=path.")
+        databases[name.strip()] = path.strip()
+    return databases
+
+
+class _Entry:
+    def __init__(self):
+        self.database: Any = None
+        self.error: Exception | None = None
+        self.ready = threading.Event()
+        self.active = 0
+
+
+class DatabaseRegistry:
+    """Named SQLite databases, opened on first use and closed when least recently used.
+
+    A database is looked up by name: the ones configured explicitly, or
+    ``<directory>/<name>.db``. ``open_database(name, path)`` builds its state
+    (pool, caches, ...) the first time it is used. At most ``max_open``
+    databases stay open; opening one more closes the least recently used
+    database that no tool call is using. The default database is never
+    closed.
+
+    Tool calls run inside ``scope()``; databases returned by ``get`` within
+    it cannot be closed until the scope ends, so eviction never pulls a pool
+    from under a running query. If every open database is in use the cap is
+    exceeded temporarily and enforced again when they are released.
+    """
+
+    def __init__(
+        self,
+        open_database: Callable[[str, str], Any],
+        default_path: str,
+        databases: dict[str, str] | None = None,
+        directory: str | None = None,
+        max_open: int = 32,
+        default_name: str = "default",
+    ):
+        """
+        Args:
+            open_database: Opens a database; must return an object with ``close()``.
+            default_path: Path of the database used when no name is given.
+            databases: Additional named databases, {name: path}.
+            directory: Directory searched for ``<name>.db`` for other names.
+            max_open: Open databases kept at most, the default one included.
+            default_name: Name the default database is listed under.
+        """
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1.")
+        self.default_name = default_name
+        self.directory = directory
+        self.max_open = max_open
+        self._open_database = open_database
+        self._paths = {default_name: default_path, **(databases or {})}
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+        self._opened = 0
+        self._evicted = 0
+        self._hits = 0
+
+    # --- Lookup ---
+    def resolve(self, name: str | None) -> tuple[str, str]:
+        """Returns ``(name, path)`` of a database, or raises ValueError if unknown."""
+        name = name or self.default_name
+        if name in self._paths:
+            return name, self._paths[name]
+        if self.directory and DATABASE_NAME_PATTERN.match(name):
+            path = os.path.join(self.directory, name + DATABASE_SUFFIX)
+            if os.path.isfile(path):
+                return name, path
+        raise ValueError(
+            f"Unknown database '{name}'. Use list_databases to see the available ones."
+        )
+
+    def names(self) -> list[str]:
+        """Every database that can be opened: configured ones first, then the directory's."""
+        names = list(self._paths)
+        if self.directory and os.path.isdir(self.directory):
+            discovered = sorted(
+                file_name[: -len(DATABASE_SUFFIX)]
+                for file_name in os.listdir(self.directory)
+                if file_name.endswith(DATABASE_SUFFIX)
+                and DATABASE_NAME_PATTERN.match(file_name[: -len(DATABASE_SUFFIX)])
+            )
+            names += [name for name in discovered if name not in self._paths]
+        return names
+
+    def opened(self) -> dict[str, Any]:
+        """The open databases by name, least recently used first."""
+        with self._lock:
+            return {
+                name: entry.database
+                for name, entry in self._entries.items()
+                if entry.ready.is_set() and entry.database is not None
+            }
+
+    # --- Checkout ---
+    def get(self, name: str | None = None):
+        """Returns the open database ``name`` (the default one if None), opening it if needed.
+
+        Inside ``scope()`` the database stays open until the scope ends.
+        """
+        name, path = self.resolve(name)
+        held: dict | None = getattr(_state, "held", None)
+        if held is not None and name in held:
+            return held[name].database
+
+        with self._lock:
+            entry = self._entries.get(name)
+            opening = entry is None
+            if opening:
+                entry = self._entries[name] = _Entry()
+            else:
+                self._entries.move_to_end(name)
+                self._hits += 1
+            entry.active += 1
+
+        if opening:
+            try:
+                entry.database = self._open_database(name, path)
+                self._opened += 1
+            except Exception as e:
+                entry.error = e
+                with self._lock:
+                    self._entries.pop(name, None)
+                raise
+            finally:
+                entry.ready.set()
+            self._evict()
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                with self._lock:
+                    entry.active -= 1
+                raise entry.error
+
+        if held is not None:
+            held[name] = entry
+        else:
+            self._release(entry)
+        return entry.database
+
+    def _release(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.active -= 1
+        self._evict()
+
+    @contextmanager
+    def scope(self):
+        """Keeps every database fetched with ``get`` in the block open until it ends."""
+        outer = getattr(_state, "held", None)
+        if outer is not None:
+            yield
+            return
+        _state.held = {}
+        try:
+            yield
+        finally:
+            held, _state.held = _state.held, None
+            for entry in held.values():
+                self._release(entry)
+
+    def _evict(self) -> None:
+        closing = []
+        with self._lock:
+            excess = len(self._entries) - self.max_open
+            for name, entry in list(self._entries.items()):
+                if excess <= 0:
+                    break
+                if name != self.default_name and entry.active == 0 and entry.ready.is_set():
+                    closing.append((name, self._entries.pop(name)))
+                    excess -= 1
+        for name, entry in closing:
+            self._evicted += 1
+            logger.info(f"DatabaseRegistry: closing least recently used database '{name}'.")
+            try:
+                entry.database.close()
+            except Exception as e:
+                logger.warning(f"DatabaseRegistry: error closing database '{name}': {e}")
+
+    # --- Introspection and shutdown ---
+    def stats(self) -> dict:
+        with self._lock:
+            in_use = {name: entry.active for name, entry in self._entries.items() if entry.active}
+            open_count = len(self._entries)
+        return {
+            "max_open": self.max_open,
+            "open": open_count,
+            "in_use": in_use,
+            "opened": self._opened,
+            "evicted": self._evicted,
+            "hits": self._hits,
+        }
+
+    def close(self) -> None:
+        """Closes every open database."""
+        with self._lock:
+            entries = list(self._entries.items())
+            self._entries.clear()
+        for name, entry in entries:
+            if entry.database is None:
+                continue
+            try:
+                entry.database.close()
+            except Exception as e:
+                logger.warning(f"DatabaseRegistry: error closing database '{name}': {e}")
@@ -0,0 +1,213 @@
+"""Bulk reads that don't go through the model's context.
+
+``export_rows`` streams a query result into a local file (NDJSON, CSV or,
+when pyarrow is installed, Parquet) batch by batch, so memory stays flat no
+matter how many rows are exported. ``summarize_columns`` computes per-column
+aggregates and histograms in SQL, so summarizing a table costs a few small
+result rows instead of the whole table.
+"""
+
+import base64
+import csv
+import os
+import sqlite3
+import tempfile
+
+from query_builder import quote_identifier
+from response_encoding import dumps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+_NUMERIC = "typeof({column}) IN ('integer', 'real')"
+
+
+def available_formats() -> list[str]:
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pyarrow is not None]
+
+
+def _csv_value(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+def _write_ndjson(f, columns: list[str], batches) -> None:
+    for batch in batches:
+        f.write("\n".join([dumps(dict(zip(columns, row))) for row in batch]))
+        f.write("\n")
+
+
+def _write_csv(f, columns: list[str], batches) -> None:
+    writer = csv.writer(f)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+
+
+def _write_parquet(path: str, columns: list[str], batches) -> None:
+    writer = None
+    try:
+        for batch in batches:
+            table = pyarrow.table(
+                {name: [row[i] for row in batch] for i, name in enumerate(columns)},
+                schema=writer.schema if writer is not None else None,
+            )
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+        raise ValueError(f"Rows don't fit one Parquet schema, export as ndjson instead: {e}")
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_rows(
+    cursor: sqlite3.Cursor,
+    path: str,
+    fmt: str = "ndjson",
+    batch_size: int = 5000,
+    sample_size: int = 3,
+) -> dict:
+    """Writes every row of an executed ``cursor`` to ``path``.
+
+    The file is written next to ``path`` under a temporary name and renamed
+    once complete, so a reader never sees a half-written export.
+
+    Returns:
+        dict: 'path', 'format', 'columns', 'row_count', 'bytes' and
+              'sample_rows' (the first few rows, as dicts).
+    """
+    if fmt not in available_formats():
+        raise ValueError(
+            f"Unsupported export format '{fmt}'. Available: {', '.join(available_formats())}."
+        )
+    columns = [description[0] for description in cursor.description]
+    # Plain tuples are cheaper to fetch than the connection's sqlite3.Row.
+    cursor.row_factory = None
+    stats = {"row_count": 0, "sample_rows": []}
+
+    def batches():
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            if len(stats["sample_rows"]) < sample_size:
+                stats["sample_rows"] += [
+                    dict(zip(columns, row)) for row in batch[: sample_size - len(stats["sample_rows"])]
+                ]
+            stats["row_count"] += len(batch)
+            yield batch
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".export-")
+    try:
+        if fmt == "parquet":
+            os.close(fd)
+            _write_parquet(tmp_path, columns, batches())
+        else:
+            with open(fd, "w", encoding="utf-8", newline="") as f:
+                if fmt == "csv":
+                    _write_csv(f, columns, batches())
+                else:
+                    _write_ndjson(f, columns, batches())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {
+        "path": os.path.abspath(path),
+        "format": fmt,
+        "columns": columns,
+        "row_count": stats["row_count"],
+        "bytes": os.path.getsize(path),
+        "sample_rows": stats["sample_rows"],
+    }
+
+
+def summarize_columns(
+    conn: sqlite3.Connection,
+    table_name: str,
+    columns: list[str],
+    condition: str = "",
+    histogram_bins: int = 10,
+    top_values: int = 5,
+) -> dict:
+    """Per-column aggregates of the rows of ``table_name`` matching ``condition``.
+
+    All counts, distinct counts and min/max/avg come from a single scan.
+    Numeric columns with more distinct values than ``histogram_bins`` then
+    get an equal-width histogram, the other columns their most frequent
+    values, one GROUP BY query each.
+
+    Returns:
+        dict: 'row_count' and 'columns', a dict per column with 'non_null',
+              'distinct', 'min', 'max', 'avg' for numeric columns, and either
+              'histogram' ({'lower', 'upper', 'count'} per bin) or
+              'top_values' ({'value', 'count'}).
+    """
+    table = quote_identifier(table_name)
+    where = f" WHERE ({condition})" if condition else ""
+    select = ["count(*)"]
+    for name in columns:
+        column = quote_identifier(name)
+        select += [
+            f"count({column})",
+            f"count(DISTINCT {column})",
+            f"min({column})",
+            f"max({column})",
+            f"avg(CASE WHEN {_NUMERIC.format(column=column)} THEN {column} END)",
+            f"sum({_NUMERIC.format(column=column)})",
+        ]
+    row = conn.execute(f"SELECT {', '.join(select)} FROM {table}{where}").fetchone()
+    row_count = row[0]
+
+    summary = {}
+    for i, name in enumerate(columns):
+        non_null, distinct, low, high, avg, numeric = row[1 + 6 * i : 7 + 6 * i]
+        stats = {"non_null": non_null, "distinct": distinct, "min": low, "max": high}
+        column = quote_identifier(name)
+        is_numeric = bool(numeric) and numeric == non_null
+        if is_numeric:
+            stats["avg"] = avg
+        if is_numeric and distinct > histogram_bins:
+            stats["histogram"] = _histogram(conn, table, column, where, low, high, histogram_bins)
+        elif non_null:
+            stats["top_values"] = [
+                {"value": value, "count": count}
+                for value, count in conn.execute(
+                    f"SELECT {column}, count(*) AS n FROM {table}{where} "
+                    f"GROUP BY {column} ORDER BY n DESC LIMIT ?",
+                    (max(top_values, histogram_bins) if is_numeric else top_values,),
+                )
+            ]
+        summary[name] = stats
+    return {"row_count": row_count, "columns": summary}
+
+
+def _histogram(conn, table, column, where, low, high, bins) -> list[dict]:
+    width = (high - low) / bins
+    bucket = f"min(CAST(({column} - ?) / ? AS INTEGER), ?)"
+    filters = f"{where} AND {column} IS NOT NULL" if where else f" WHERE {column} IS NOT NULL"
+    counts = dict(
+        conn.execute(
+            f"SELECT {bucket} AS bucket, count(*) FROM {table}{filters} GROUP BY bucket",
+            (low, width, bins - 1),
+        )
+    )
+    return [
+        {
+            "lower": round(low + i * width, 6),
+            "upper": high if i == bins - 1 else round(low + (i + 1) * width, 6),
+            "count": counts.get(i, 0),
+        }
+        for i in range(bins)
+    ]
@@ -0,0 +1,170 @@
+import sqlite3
+
+from loguru import logger
+
+from query_builder import quote_identifier
+
+FTS_SUFFIX = "_fts"
+# Columns indexed when MCP_FTS_COLUMNS is not set.
+DEFAULT_FTS_COLUMNS = "todos.task,users.username"
+# FTS5 keeps its index in these shadow tables next to the virtual table.
+_SHADOW_SUFFIXES = ("", "_data", "_idx", "_docsize", "_config", "_content")
+
+
+def parse_fts_config(spec: str) -> dict[str, list[str]]:
+    """Parses "todos.task,users.username" into {"todos": ["task"], "users": ["username"]}."""
+    config: dict[str, list[str]] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        table, _, column = item.partition(".")
+        if not column:
+            raise ValueError(f"Invalid full-text column '{item}'; expected 'table.column'.")
+        config.setdefault(table.strip(), []).append(column.strip())
+    return config
+
+
+def fts_table_name(table_name: str) -> str:
+    return f"{table_name}{FTS_SUFFIX}"
+
+
+def is_fts_table(name: str, indexed_tables) -> bool:
+    """True for the FTS virtual tables and their shadow tables."""
+    return any(
+        name == fts_table_name(table) + suffix
+        for table in indexed_tables
+        for suffix in _SHADOW_SUFFIXES
+    )
+
+
+def fts_trigger_names(table_name: str) -> list[str]:
+    return [f"{fts_table_name(table_name)}_{event}" for event in ("ai", "ad", "au")]
+
+
+def ensure_fts_index(
+    conn: sqlite3.Connection, table_name: str, columns: list[str]
+) -> bool:
+    """Creates (or rebuilds) the FTS5 index and sync triggers for one table.
+
+    The index is an external-content FTS5 table: it stores only the inverted
+    index and reads column values from ``table_name`` itself, so the text is
+    not duplicated. INSERT/UPDATE/DELETE triggers keep it in sync.
+
+    Returns:
+        True if the index was (re)built, False if it was already up to date.
+    """
+    fts_table = fts_table_name(table_name)
+    existing = [
+        row[0]
+        for row in conn.execute("SELECT name FROM pragma_table_info(?)", (fts_table,))
+    ]
+    if existing == columns:
+        return False
+
+    quoted_fts = quote_identifier(fts_table)
+    quoted_table = quote_identifier(table_name)
+    quoted_columns = [quote_identifier(column) for column in columns]
+    column_list = ", ".join(quoted_columns)
+    new_values = ", ".join(f"new.{column}" for column in quoted_columns)
+    old_values = ", ".join(f"old.{column}" for column in quoted_columns)
+    insert_trigger, delete_trigger, update_trigger = (
+        quote_identifier(name) for name in fts_trigger_names(table_name)
+    )
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for trigger in (insert_trigger, delete_trigger, update_trigger):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute(f"DROP TABLE IF EXISTS {quoted_fts}")
+        conn.execute(
+            f"CREATE VIRTUAL TABLE {quoted_fts} USING fts5("
+            f"{column_list}, content={quote_identifier(table_name)}, "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {insert_trigger} AFTER INSERT ON {quoted_table} BEGIN "
+            f"INSERT INTO {quoted_fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {delete_trigger} AFTER DELETE ON {quoted_table} BEGIN "
+            f"INSERT INTO {quoted_fts}({quoted_fts}, rowid, {column_list}) "
+            f"VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER {update_trigger} AFTER UPDATE ON {quoted_table} BEGIN "
+            f"INSERT INTO {quoted_fts}({quoted_fts}, rowid, {column_list}) "
+            f"VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {quoted_fts}(rowid, {column_list}) VALUES (new.rowid, {new_values}); END"
+        )
+        # Index the rows that already exist.
+        conn.execute(f"INSERT INTO {quoted_fts}({quoted_fts}) VALUES ('rebuild')")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    logger.info(f"FTS: built full-text index {fts_table} on {table_name}({', '.join(columns)}).")
+    return True
+
+
+def ensure_fts_indexes(conn: sqlite3.Connection, config: dict[str, list[str]]) -> list[str]:
+    """Runs ``ensure_fts_index`` for every configured table that exists.
+
+    Returns:
+        The tables whose index was (re)built.
+    """
+    rebuilt = []
+    for table_name, columns in config.items():
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,)
+        ).fetchone():
+            logger.warning(f"FTS: skipping full-text index, no table '{table_name}'.")
+            continue
+        if ensure_fts_index(conn, table_name, columns):
+            rebuilt.append(table_name)
+    return rebuilt
+
+
+def to_match_query(text: str) -> str:
+    """Turns free text into an FTS5 query that matches all of its words.
+
+    Every word is quoted so punctuation can't produce FTS5 syntax errors; a
+    trailing ``*`` is kept as a prefix search (``groc*`` matches "groceries").
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if not word:
+            continue
+        term = '"' + word.replace('"', '""') + '"'
+        terms.append(term + "*" if prefix else term)
+    return " ".join(terms)
+
+
+def search(
+    conn: sqlite3.Connection,
+    table_name: str,
+    query: str,
+    limit: int,
+    snippet_tokens: int = 12,
+) -> list[dict]:
+    """Runs a BM25-ranked full-text search and returns the matching rows.
+
+    Each hit contains the row itself, its BM25 score (lower is better) and a
+    snippet with the matched words wrapped in [brackets].
+    """
+    fts_table = quote_identifier(fts_table_name(table_name))
+    sql = (
+        f"SELECT t.*, bm25({fts_table}) AS __score__, "
+        f"snippet({fts_table}, -1, '[', ']', '…', ?) AS __snippet__ "
+        f"FROM {fts_table} JOIN {quote_identifier(table_name)} AS t ON t.rowid = {fts_table}.rowid "
+        f"WHERE {fts_table} MATCH ? ORDER BY __score__ LIMIT ?"
+    )
+    hits = []
+    for row in conn.execute(sql, (snippet_tokens, to_match_query(query), limit)):
+        record = dict(row)
+        score = record.pop("__score__")
+        snippet = record.pop("__snippet__")
+        hits.append({"score": round(score, 6), "snippet": snippet, "row": record})
+    return hits
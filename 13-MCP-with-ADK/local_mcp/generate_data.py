@@ -0,0 +1,163 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from itertools import accumulate
+
+from loguru import logger
+
+from create_db import create_tables
+from db_profile import apply_profile, get_profile
+from fts import DEFAULT_FTS_COLUMNS, ensure_fts_indexes, parse_fts_config
+
+FIRST_NAMES = [
+    "alice", "bob", "charlie", "diana", "ethan", "fatima", "george", "hana",
+    "ivan", "julia", "kenji", "lena", "mohamed", "nora", "oscar", "priya",
+    "quentin", "rosa", "samuel", "tuan", "uma", "victor", "wen", "yusuf", "zoe",
+]
+LAST_NAMES = [
+    "nguyen", "smith", "garcia", "kim", "muller", "rossi", "silva", "tanaka",
+    "khan", "ivanova", "dubois", "pham", "johnson", "lopez", "chen", "okafor",
+]
+EMAIL_DOMAINS = [("gmail.com", 45), ("outlook.com", 20), ("yahoo.com", 10), ("example.com", 25)]
+VERBS = [
+    "buy", "read", "finish", "call", "plan", "email", "fix", "review", "book",
+    "clean", "pay", "write", "schedule", "prepare", "update", "cancel",
+]
+OBJECTS = [
+    "groceries", "a book", "the project report", "mom", "the weekend trip",
+    "the landlord", "the bike", "pull request", "dentist appointment", "the garage",
+    "electricity bill", "blog post", "team meeting", "presentation", "passport",
+    "gym membership", "quarterly budget", "birthday gift", "car insurance",
+]
+QUALIFIERS = ["", "", "", " today", " tomorrow", " this week", " before friday", " asap"]
+
+
+def _users(count: int, rng: random.Random):
+    domains, weights = zip(*EMAIL_DOMAINS)
+    for i in range(1, count + 1):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        username = f"{first}.{last}{i}"
+        domain = rng.choices(domains, weights)[0]
+        yield (username, f"{username}@{domain}")
+
+
+def _todos(count: int, user_count: int, rng: random.Random):
+    # User activity is Pareto-distributed, so a minority of heavy users owns a
+    # large share of the todos; older (lower id) todos are more often completed.
+    activity = [rng.paretovariate(2.0) for _ in range(user_count)]
+    cumulative = list(accumulate(activity))
+    user_ids = range(1, user_count + 1)
+    for i in range(count):
+        user_id = rng.choices(user_ids, cum_weights=cumulative)[0]
+        task = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}{rng.choice(QUALIFIERS)}"
+        completed = int(rng.random() < 0.7 - 0.5 * i / count)
+        yield (user_id, task, completed)
+
+
+def _insert_chunked(conn: sqlite3.Connection, sql: str, rows, total: int, chunk_size: int, label: str):
+    chunk = []
+    inserted = 0
+    started = time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.executemany(sql, chunk)
+            inserted += len(chunk)
+            chunk.clear()
+            logger.info(
+                f"{label}: {inserted}/{total} rows ({inserted / (time.perf_counter() - started):,.0f} rows/s)"
+            )
+    if chunk:
+        conn.executemany(sql, chunk)
+        inserted += len(chunk)
+    conn.commit()
+    return inserted
+
+
+def generate_database(
+    path: str,
+    users: int,
+    todos: int,
+    seed: int = 42,
+    chunk_size: int = 50_000,
+    overwrite: bool = False,
+) -> dict:
+    """Builds a users/todos database of the given size.
+
+    The same ``seed`` always produces the same database, so benchmark runs on
+    different commits see identical data.
+
+    Returns:
+        dict: Row counts, file size and generation time.
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"{path} already exists; pass overwrite=True to replace it.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    # Bulk load without a journal; the regular profile is applied at the end.
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    create_tables(conn.cursor())
+    _insert_chunked(
+        conn,
+        "INSERT INTO users (username, email) VALUES (?, ?)",
+        _users(users, rng),
+        users,
+        chunk_size,
+        "users",
+    )
+    _insert_chunked(
+        conn,
+        "INSERT INTO todos (user_id, task, completed) VALUES (?, ?, ?)",
+        _todos(todos, users, rng),
+        todos,
+        chunk_size,
+        "todos",
+    )
+    conn.execute("ANALYZE")
+    conn.commit()
+
+    profile_name, profile = get_profile()
+    apply_profile(conn, profile)
+    ensure_fts_indexes(conn, parse_fts_config(os.getenv("MCP_FTS_COLUMNS", DEFAULT_FTS_COLUMNS)))
+    conn.close()
+    summary = {
+        "path": path,
+        "users": users,
+        "todos": todos,
+        "seed": seed,
+        "profile": profile_name,
+        "size_bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Generated database: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic users/todos database.")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "bench.db"))
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--todos", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+    generate_database(
+        args.output,
+        users=args.users,
+        todos=args.todos,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        overwrite=args.overwrite,
+    )
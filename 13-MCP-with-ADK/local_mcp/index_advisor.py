@@ -0,0 +1,238 @@
+import re
+import sqlite3
+import threading
+
+from loguru import logger
+
+from query_builder import quote_identifier
+
+# String and numeric literals are replaced with '?' so that queries differing
+# only in their values share one shape.
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_condition(condition: str) -> str:
+    """Collapses a free-form WHERE clause into a shape without literal values."""
+    shape = _LITERAL_RE.sub("?", condition or "")
+    return " ".join(shape.lower().split())
+
+
+def columns_in_condition(
+    condition: str, known_columns: list[str]
+) -> tuple[list[str], list[str]]:
+    """Guesses which columns a free-form condition filters on.
+
+    Returns:
+        ``(equality_columns, range_columns)``. A column compared with ``=`` or
+        ``IN`` counts as an equality column; anything else as a range column.
+    """
+    shape = normalize_condition(condition)
+    equality, ranges = [], []
+    for column in known_columns:
+        pattern = re.compile(rf'(?<![\w"]){re.escape(column.lower())}(?![\w"])\s*(=|==|in\b|is\b)?')
+        matches = list(pattern.finditer(shape))
+        if not matches:
+            continue
+        if any(match.group(1) for match in matches):
+            equality.append(column)
+        else:
+            ranges.append(column)
+    return equality, ranges
+
+
+def _uses_full_scan(plan: list[str], table_name: str) -> bool:
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1].strip('"') == table_name:
+            if "INDEX" not in detail:
+                return True
+    return False
+
+
+class IndexAdvisor:
+    """Records query shapes and suggests indexes for slow, frequent ones.
+
+    Every executed query is recorded with its latency. The first time a shape
+    runs slower than ``slow_query_ms`` its ``EXPLAIN QUERY PLAN`` is captured.
+    If the plan scans the whole table, an index on the filtered columns
+    (equality columns first, then one range column, then ORDER BY columns,
+    then the selected columns when that keeps the index small enough to cover
+    the query) is recommended.
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: float = 50.0,
+        min_calls: int = 20,
+        auto_create: bool = False,
+        max_shapes: int = 1000,
+        max_covering_columns: int = 4,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.min_calls = min_calls
+        self.auto_create = auto_create
+        self.max_shapes = max_shapes
+        self.max_covering_columns = max_covering_columns
+        self._lock = threading.Lock()
+        self._shapes: dict[str, dict] = {}
+        self.created_indexes: list[dict] = []
+
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        table_name: str,
+        shape: str,
+        sql: str,
+        params: list,
+        elapsed_ms: float,
+        equality_columns: list[str],
+        range_columns: list[str] | None = None,
+        order_columns: list[str] | None = None,
+        selected_columns: list[str] | None = None,
+    ) -> dict | None:
+        """Records one execution of a query shape.
+
+        ``conn`` is the connection the query ran on; it is used for
+        ``EXPLAIN QUERY PLAN`` the first time the shape is slow.
+
+        Returns:
+            The shape's recommendation when ``auto_create`` is on and the shape
+            just crossed the frequency and latency thresholds, otherwise None.
+        """
+        key = f"{table_name}|{shape}"
+        with self._lock:
+            stats = self._shapes.get(key)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    return None
+                stats = {
+                    "table_name": table_name,
+                    "shape": shape,
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "recommendation": None,
+                    "auto_created": False,
+                }
+                self._shapes[key] = stats
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            needs_plan = stats["plan"] is None and elapsed_ms >= self.slow_query_ms
+
+        if needs_plan:
+            try:
+                plan = [
+                    row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                ]
+            except sqlite3.Error as e:
+                logger.debug(f"IndexAdvisor: EXPLAIN QUERY PLAN failed: {e}")
+                plan = []
+            recommendation = None
+            if _uses_full_scan(plan, table_name):
+                recommendation = self._recommend(
+                    table_name,
+                    equality_columns,
+                    range_columns or [],
+                    order_columns or [],
+                    selected_columns or [],
+                )
+            with self._lock:
+                stats["plan"] = plan
+                stats["recommendation"] = recommendation
+
+        with self._lock:
+            if (
+                self.auto_create
+                and stats["recommendation"]
+                and not stats["auto_created"]
+                and stats["calls"] >= self.min_calls
+                and stats["total_ms"] / stats["calls"] >= self.slow_query_ms
+            ):
+                stats["auto_created"] = True
+                self.created_indexes.append(stats["recommendation"])
+                return stats["recommendation"]
+        return None
+
+    def _recommend(
+        self,
+        table_name: str,
+        equality_columns: list[str],
+        range_columns: list[str],
+        order_columns: list[str],
+        selected_columns: list[str],
+    ) -> dict | None:
+        columns: list[str] = []
+        for column in equality_columns + range_columns[:1] + order_columns:
+            if column not in columns:
+                columns.append(column)
+        if not columns:
+            return None
+        key_count = len(columns)
+        extra = [c for c in selected_columns if c not in columns]
+        covering = bool(selected_columns) and len(columns) + len(extra) <= self.max_covering_columns
+        if covering:
+            columns.extend(extra)
+
+        name = re.sub(r"\W+", "_", f"idx_auto_{table_name}_{'_'.join(columns)}").lower()
+        sql = (
+            f"CREATE INDEX IF NOT EXISTS {quote_identifier(name)} ON "
+            f"{quote_identifier(table_name)} ({', '.join(quote_identifier(c) for c in columns)})"
+        )
+        return {
+            "table_name": table_name,
+            "index_name": name,
+            "columns": columns,
+            "key_columns": columns[:key_count],
+            "covering": covering,
+            "sql": sql,
+        }
+
+    def forget_table(self, table_name: str) -> None:
+        """Drops captured plans for a table, e.g. after its indexes changed."""
+        with self._lock:
+            for stats in self._shapes.values():
+                if stats["table_name"] == table_name:
+                    stats["plan"] = None
+                    stats["recommendation"] = None
+
+    def report(self) -> list[dict]:
+        """Returns recorded shapes, slowest total time first."""
+        with self._lock:
+            shapes = [dict(stats) for stats in self._shapes.values()]
+        for stats in shapes:
+            stats["avg_ms"] = round(stats["total_ms"] / stats["calls"], 3)
+            stats["total_ms"] = round(stats["total_ms"], 3)
+            stats["max_ms"] = round(stats["max_ms"], 3)
+        return sorted(shapes, key=lambda stats: stats["total_ms"], reverse=True)
+
+
+def create_index(conn: sqlite3.Connection, recommendation: dict) -> None:
+    """Creates a recommended index and refreshes the planner statistics for its table."""
+    conn.execute(recommendation["sql"])
+    conn.execute(f"ANALYZE {quote_identifier(recommendation['table_name'])}")
+    conn.commit()
+    logger.info(
+        f"IndexAdvisor: created index {recommendation['index_name']} "
+        f"on {recommendation['table_name']}({', '.join(recommendation['columns'])})."
+    )
+
+
+def table_statistics(conn: sqlite3.Connection, table_name: str) -> dict:
+    """Returns the ANALYZE statistics (sqlite_stat1) and indexes of a table."""
+    indexes = [
+        {"name": row["name"], "unique": bool(row["unique"]), "origin": row["origin"]}
+        for row in conn.execute("SELECT * FROM pragma_index_list(?)", (table_name,))
+    ]
+    try:
+        stats = [
+            {"index": row["idx"], "stat": row["stat"]}
+            for row in conn.execute(
+                "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ?", (table_name,)
+            )
+        ]
+    except sqlite3.OperationalError:
+        # sqlite_stat1 only exists once ANALYZE has run.
+        stats = []
+    return {"table_name": table_name, "indexes": indexes, "analyze_stats": stats}
@@ -0,0 +1,50 @@
+import itertools
+import reprlib
+from collections import defaultdict
+
+
+class _PreviewRepr(reprlib.Repr):
+    """``repr`` that stops descending into large containers and strings.
+
+    Unlike ``str(value)`` followed by slicing, the cost is bounded by the
+    limits below, not by the size of ``value``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.maxlevel = 3
+        self.maxdict = 8
+        self.maxlist = 5
+        self.maxtuple = 5
+        self.maxstring = 80
+        self.maxother = 80
+
+
+_preview_repr = _PreviewRepr()
+
+
+def preview(value, max_bytes: int = 512) -> str:
+    """A short, bounded-cost rendering of a tool argument or result for logs."""
+    text = _preview_repr.repr(value)
+    if len(text) > max_bytes:
+        return f"{text[:max_bytes]}… ({len(text) - max_bytes} more chars)"
+    return text
+
+
+class LogSampler:
+    """Decides which calls of a high-volume tool get logged.
+
+    Tools listed in ``sampled_tools`` are logged on their first call and then
+    once every ``every`` calls; all other tools are always logged.
+    """
+
+    def __init__(self, every: int = 1, sampled_tools: set[str] | None = None):
+        self.every = max(every, 1)
+        self.sampled_tools = set(sampled_tools or ())
+        self._counters: dict[str, itertools.count] = defaultdict(itertools.count)
+
+    def should_log(self, tool_name: str) -> bool:
+        if self.every == 1 or tool_name not in self.sampled_tools:
+            return True
+        # next() on itertools.count is atomic under the GIL.
+        return next(self._counters[tool_name]) % self.every == 0
@@ -0,0 +1,266 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from mcp import types as mcp_types
+
+# Upper bounds of the histogram buckets; the last bucket is unbounded.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+PHASES = ("queue_wait", "execute", "serialize", "transport", "total")
+
+# Phase timings of the tool call handled by the current task. call_mcp_tool
+# sets it; ToolExecutor's timing hook fills in queue_wait and execute.
+call_timings: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "call_timings", default=None
+)
+# The TimedWriteStream of the session the current request arrived on.
+active_write_stream: contextvars.ContextVar = contextvars.ContextVar(
+    "active_write_stream", default=None
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus style) with estimated percentiles."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.min = value if not self.count else min(self.min, value)
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimates a percentile by interpolating inside its bucket.
+
+        Bucket edges are narrowed to the observed min and max, so a single
+        sample (or samples that are all equal) yields the exact value.
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return self.max
+                lower = max(self.bounds[index - 1] if index else 0.0, self.min)
+                upper = min(self.bounds[index], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3),
+            "p50": round(self.percentile(0.50), 3),
+            "p95": round(self.percentile(0.95), 3),
+            "p99": round(self.percentile(0.99), 3),
+            "max": round(self.max, 3),
+        }
+
+
+class _ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.phases = {phase: Histogram(LATENCY_BUCKETS_MS) for phase in PHASES}
+        self.response_bytes = Histogram(BYTES_BUCKETS)
+        self.rows = Histogram(ROWS_BUCKETS)
+
+
+def result_row_count(result) -> int:
+    """Number of rows a tool returned or changed, as far as its result tells."""
+    if isinstance(result, dict):
+        for key in ("row_count", "rows_affected", "rows_deleted"):
+            if isinstance(result.get(key), int):
+                return result[key]
+        for key in ("rows", "hits", "tables", "columns"):
+            if isinstance(result.get(key), list):
+                return len(result[key])
+        return 1 if result.get("row_id") is not None else 0
+    if isinstance(result, list):
+        return len(result)
+    return 0
+
+
+class ToolMetrics:
+    """Per-tool latency histograms (split by phase), row counts and payload sizes.
+
+    Phases:
+        queue_wait  Waiting for a worker slot in the ToolExecutor.
+        execute     Running the tool on the worker thread (mostly SQL).
+        serialize   Encoding the result into the response text.
+        transport   From the handler returning until the JSON-RPC response
+                    was handed to the transport's writer (stdio and SSE only).
+        total       The whole call_tool handler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: dict[str, _ToolStats] = {}
+        self.started_at = time.time()
+
+    def _stats(self, tool_name: str) -> _ToolStats:
+        stats = self._tools.get(tool_name)
+        if stats is None:
+            stats = self._tools[tool_name] = _ToolStats()
+        return stats
+
+    def record_call(
+        self,
+        tool_name: str,
+        timings_ms: dict,
+        rows: int,
+        response_bytes: int,
+        error: bool,
+    ) -> None:
+        with self._lock:
+            stats = self._stats(tool_name)
+            stats.calls += 1
+            stats.errors += int(error)
+            for phase, value in timings_ms.items():
+                if phase in stats.phases:
+                    stats.phases[phase].observe(value)
+            stats.rows.observe(rows)
+            stats.response_bytes.observe(response_bytes)
+
+    def record_phase(self, tool_name: str, phase: str, value_ms: float) -> None:
+        with self._lock:
+            self._stats(tool_name).phases[phase].observe(value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            tools = {
+                name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "latency_ms": {
+                        phase: histogram.snapshot()
+                        for phase, histogram in stats.phases.items()
+                        if histogram.count
+                    },
+                    "rows": stats.rows.snapshot(),
+                    "response_bytes": stats.response_bytes.snapshot(),
+                }
+                for name, stats in sorted(self._tools.items())
+            }
+        return {"uptime_seconds": round(time.time() - self.started_at, 1), "tools": tools}
+
+    def prometheus_text(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP mcp_tool_calls_total Tool calls handled.",
+            "# TYPE mcp_tool_calls_total counter",
+        ]
+        with self._lock:
+            tools = sorted(self._tools.items())
+            for name, stats in tools:
+                lines.append(f'mcp_tool_calls_total{{tool="{name}"}} {stats.calls}')
+            lines += [
+                "# HELP mcp_tool_errors_total Tool calls that failed or returned success=false.",
+                "# TYPE mcp_tool_errors_total counter",
+            ]
+            for name, stats in tools:
+                lines.append(f'mcp_tool_errors_total{{tool="{name}"}} {stats.errors}')
+
+            lines += [
+                "# HELP mcp_tool_phase_seconds Tool call latency by phase.",
+                "# TYPE mcp_tool_phase_seconds histogram",
+            ]
+            for name, stats in tools:
+                for phase, histogram in stats.phases.items():
+                    if histogram.count:
+                        lines += _histogram_lines(
+                            "mcp_tool_phase_seconds",
+                            f'tool="{name}",phase="{phase}"',
+                            histogram,
+                            scale=0.001,
+                        )
+            for metric, attribute, help_text in (
+                ("mcp_tool_response_bytes", "response_bytes", "Size of the encoded tool responses."),
+                ("mcp_tool_rows", "rows", "Rows returned or changed per tool call."),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for name, stats in tools:
+                    lines += _histogram_lines(metric, f'tool="{name}"', getattr(stats, attribute))
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(metric: str, labels: str, histogram: Histogram, scale: float = 1.0) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+        cumulative += bucket_count
+        lines.append(f'{metric}_bucket{{{labels},le="{bound * scale:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum * scale:g}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+class TimedWriteStream:
+    """Wraps a session's write stream to time how long responses take to send.
+
+    ``call_mcp_tool`` registers its request id with ``expect``; when the
+    matching JSON-RPC response passes through ``send`` the time since the
+    handler returned is recorded as the tool's ``transport`` phase.
+
+    A response that is never written (cancelled request, broken transport)
+    would leave its id behind, so ids older than ``max_age`` seconds are
+    dropped and at most ``max_pending`` are kept.
+    """
+
+    def __init__(
+        self, stream, metrics: ToolMetrics, max_age: float = 60.0, max_pending: int = 1024
+    ):
+        self._stream = stream
+        self._metrics = metrics
+        self.max_age = max_age
+        self.max_pending = max_pending
+        # request id -> (tool name, time the handler returned), oldest first
+        self._pending: dict = {}
+
+    def expect(self, request_id, tool_name: str) -> None:
+        now = time.perf_counter()
+        self._pending.pop(request_id, None)
+        self._pending[request_id] = (tool_name, now)
+        while True:
+            oldest = next(iter(self._pending))
+            if len(self._pending) <= self.max_pending and now - self._pending[oldest][1] <= self.max_age:
+                break
+            del self._pending[oldest]
+
+    async def send(self, session_message) -> None:
+        await self._stream.send(session_message)
+        root = session_message.message.root
+        if isinstance(root, (mcp_types.JSONRPCResponse, mcp_types.JSONRPCError)):
+            pending = self._pending.pop(root.id, None)
+            if pending is not None:
+                tool_name, returned_at = pending
+                self._metrics.record_phase(
+                    tool_name, "transport", (time.perf_counter() - returned_at) * 1000
+                )
+
+    async def __aenter__(self):
+        await self._stream.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._stream.__aexit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
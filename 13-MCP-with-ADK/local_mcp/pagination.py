@@ -0,0 +1,167 @@
+import base64
+import binascii
+import hashlib
+import json
+import re
+import sqlite3
+
+from response_encoding import dumps
+
+# Name of the rowid column added to paginated SELECTs. It is stripped from the
+# rows before they are returned to the client.
+ROWID_ALIAS = "__rowid__"
+
+# String literals, quoted identifiers and comments; skipped when looking for
+# clause keywords in a free-form condition.
+_QUOTED_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?(?:\*/|$)", re.S)
+_CLAUSE_WORDS = {"order", "group", "having", "window", "limit", "offset", "union", "except", "intersect"}
+
+
+def query_fingerprint(*parts: str) -> str:
+    """Hashes the shape of a query so a page token can't be replayed against another one."""
+    digest = hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def _top_level_words(condition: str) -> set[str] | None:
+    """Clause keywords outside literals, comments and parentheses; None if unbalanced."""
+    text = _QUOTED_RE.sub(" ", condition)
+    words = set()
+    depth = 0
+    for token in re.findall(r"[()]|;|[A-Za-z_]\w*", text):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif token == ";":
+            words.add(token)
+        elif depth == 0 and token.lower() in _CLAUSE_WORDS:
+            words.add(token.lower())
+    return words if depth == 0 else None
+
+
+def is_bare_predicate(condition: str) -> bool:
+    """True if ``condition`` is a single WHERE expression and nothing more.
+
+    Conditions that carry their own ``ORDER BY``, ``GROUP BY``, ``LIMIT``,
+    compound ``UNION`` etc., a statement separator or a comment cannot be
+    combined with a keyset filter and ordering. Keywords inside string
+    literals, quoted identifiers and parenthesised subqueries don't count.
+    """
+    if "--" in condition or "/*" in condition:
+        return False
+    return _top_level_words(condition) == set()
+
+
+def has_order_by(condition: str) -> bool:
+    """True if ``condition`` ends in its own top-level ``ORDER BY``."""
+    words = _top_level_words(condition)
+    return words is not None and "order" in words
+
+
+def plain_column_list(columns: str, known_columns: list[str]) -> bool:
+    """True if ``columns`` is ``*`` or a comma-separated list of the table's own columns."""
+    if columns.strip() == "*":
+        return True
+    known = {column.lower() for column in known_columns}
+    for column in columns.split(","):
+        name = column.strip()
+        if len(name) > 1 and name[0] + name[-1] in ('""', "``", "[]"):
+            name = name[1:-1]
+        if name.lower() not in known:
+            return False
+    return True
+
+
+def offset_page_query(conn: sqlite3.Connection, query: str, keep_order: bool) -> str:
+    """Wraps ``query`` for LIMIT/OFFSET paging (two parameters: limit, offset).
+
+    Without an ORDER BY SQLite may return rows in a different order on each
+    call, and pages would repeat or skip rows. Unless ``keep_order`` (the
+    query sorts itself), the rows are sorted by every selected column; rows
+    that tie on all of them are identical, so their order doesn't matter.
+    """
+    if keep_order:
+        return f"SELECT * FROM ({query}) LIMIT ? OFFSET ?;"
+    width = len(conn.execute(f"SELECT * FROM ({query}) LIMIT 0").description)
+    order = ", ".join(str(position) for position in range(1, width + 1))
+    return f"SELECT * FROM ({query}) ORDER BY {order} LIMIT ? OFFSET ?;"
+
+
+def encode_page_token(fingerprint: str, last_rowid: int) -> str:
+    """Builds the opaque continuation token handed back to the client."""
+    payload = json.dumps({"q": fingerprint, "after": last_rowid}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_token(token: str, fingerprint: str) -> int:
+    """Returns the rowid to continue after, validating the token against the query.
+
+    Raises:
+        ValueError: If the token is malformed or belongs to a different query.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        after = int(payload["after"])
+        token_fingerprint = payload["q"]
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise ValueError("Invalid page_token. Start again without a page_token.")
+    if token_fingerprint != fingerprint:
+        raise ValueError(
+            "page_token does not match this query (table, columns or condition changed). "
+            "Start again without a page_token."
+        )
+    return after
+
+
+def fetch_page(
+    cursor: sqlite3.Cursor,
+    page_size: int,
+    chunk_size: int = 64,
+    key_column: str | None = ROWID_ALIAS,
+    max_bytes: int = 0,
+) -> tuple[list[dict], int | None, bool]:
+    """Reads at most ``page_size`` rows from an executed query.
+
+    The query must use ``LIMIT page_size + 1`` so that the extra row tells us
+    whether another page exists. For keyset queries it must also select
+    ``key_column``, which is removed from the returned rows; pass
+    ``key_column=None`` for queries without one. Rows are pulled with
+    ``fetchmany`` so only the current page is ever held in memory.
+
+    With ``max_bytes`` the page also ends before the row that would take the
+    JSON-encoded rows past that many bytes (the first row is always kept).
+    The page then reports ``has_more``, and the next one starts at that row
+    instead of the response encoder cutting it off after the page token
+    was built.
+
+    Returns:
+        ``(rows, last_rowid, has_more)``.
+    """
+    rows: list[dict] = []
+    last_rowid = None
+    has_more = False
+    size = 0
+    while True:
+        batch = cursor.fetchmany(chunk_size)
+        if not batch:
+            break
+        for row in batch:
+            if len(rows) == page_size:
+                has_more = True
+                break
+            record = dict(row)
+            key = record.pop(key_column) if key_column is not None else None
+            if max_bytes > 0:
+                size += len(dumps(record).encode("utf-8")) + 1
+                if size > max_bytes and rows:
+                    has_more = True
+                    break
+            last_rowid = key
+            rows.append(record)
+        if has_more:
+            break
+    return rows, last_rowid, has_more
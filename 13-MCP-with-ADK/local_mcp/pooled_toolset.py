@@ -0,0 +1,120 @@
+import asyncio
+import weakref
+from typing import Callable, Dict, Optional
+
+import google.adk
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    MCPSessionManager,
+    StreamableHTTPConnectionParams,
+)
+from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
+from mcp import ClientSession
+
+# The classes below use private members of ADK's MCPSessionManager and
+# MCPToolset; they were written against this release (see requirements.txt).
+TESTED_ADK_VERSION = "1.4.1"
+_SESSION_MANAGER_MEMBERS = ("_generate_session_key", "_merge_headers", "_is_session_disconnected")
+
+
+def _require(obj, members) -> None:
+    missing = [name for name in members if not hasattr(obj, name)]
+    if missing:
+        raise RuntimeError(
+            f"google-adk {google.adk.__version__} lacks {missing}, which the pooled MCP "
+            f"toolset relies on; install google-adk=={TESTED_ADK_VERSION} or run without "
+            f"MCP_SERVER_POOL_SIZE."
+        )
+
+
+_require(MCPSessionManager, _SESSION_MANAGER_MEMBERS)
+
+
+class PooledSessionManager(MCPSessionManager):
+    """Session manager that picks the server URL each time it connects.
+
+    ``MCPSessionManager`` reuses a session while it is connected and opens a
+    new one once it was closed. Here every new session asks ``pick_url``
+    where to connect, so sessions spread over a server pool.
+
+    A pool server can also go away under a session that still looks
+    connected: the supervisor recycles it, or it crashes. Before a session
+    is reused ``server_pid`` is asked for its server; if the server is
+    draining, down, or a different process than the one the session was
+    opened with, the session is dropped and a new one opened on another
+    server. ``SharedServerPool.server_pid`` answers from cached health
+    checks, not with a request per tool call.
+    """
+
+    def __init__(
+        self,
+        pick_url: Callable[[], str],
+        server_pid: Callable[[str], int | None],
+        **params,
+    ):
+        """
+        Args:
+            pick_url: Returns the streamable HTTP URL for a new session. It may
+                      block (it runs in a worker thread).
+            server_pid: Returns the PID of the server behind a URL, or None
+                        while it is down or draining. It may block too.
+            **params: Further ``StreamableHTTPConnectionParams`` fields.
+        """
+        super().__init__(StreamableHTTPConnectionParams(url="", **params))
+        _require(self, ("_sessions", "_connection_params"))
+        self._pick_url = pick_url
+        self._get_server_pid = server_pid
+        # session -> (url, pid of the server it was opened on)
+        self._servers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._retired: weakref.WeakSet = weakref.WeakSet()
+
+    def _is_session_disconnected(self, session: ClientSession) -> bool:
+        return session in self._retired or super()._is_session_disconnected(session)
+
+    async def _server_pid(self, url: str) -> int | None:
+        return await asyncio.to_thread(self._get_server_pid, url)
+
+    async def create_session(
+        self, headers: Optional[Dict[str, str]] = None
+    ) -> ClientSession:
+        session_key = self._generate_session_key(self._merge_headers(headers))
+        current = self._sessions.get(session_key)
+        if current is not None and current[0] in self._servers:
+            url, pid = self._servers[current[0]]
+            if await self._server_pid(url) != pid:
+                self._retired.add(current[0])
+        if current is None or self._is_session_disconnected(current[0]):
+            url = await asyncio.to_thread(self._pick_url)
+            self._connection_params = self._connection_params.model_copy(
+                update={"url": url}
+            )
+        session = await super().create_session(headers)
+        if session not in self._servers:
+            url = self._connection_params.url
+            pid = await self._server_pid(url)
+            if pid is not None:
+                self._servers[session] = (url, pid)
+        return session
+
+
+class PooledMCPToolset(MCPToolset):
+    """``MCPToolset`` whose sessions connect to a server chosen per connection."""
+
+    def __init__(
+        self,
+        pick_url: Callable[[], str],
+        server_pid: Callable[[str], int | None],
+        **kwargs,
+    ):
+        """
+        Args:
+            pick_url: Returns the streamable HTTP URL for each new session,
+                      e.g. ``SharedServerPool.acquire_url``.
+            server_pid: Returns the PID of the server behind a URL while it
+                        takes sessions, e.g. ``SharedServerPool.server_pid``.
+            **kwargs: Further ``MCPToolset`` arguments (``tool_filter`` etc.).
+        """
+        super().__init__(
+            connection_params=StreamableHTTPConnectionParams(url=""), **kwargs
+        )
+        _require(self, ("_mcp_session_manager",))
+        self._mcp_session_manager = PooledSessionManager(pick_url, server_pid)
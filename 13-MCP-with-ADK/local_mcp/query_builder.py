@@ -0,0 +1,205 @@
+"""Compiles structured query arguments into parameterized SQL.
+
+Identifiers (tables, columns) are validated against the schema catalog and
+quoted; values are always bound as parameters. Two calls with the same query
+shape therefore produce byte-identical SQL, which lets sqlite3's per-connection
+statement cache (``cached_statements``) skip re-parsing it.
+"""
+
+# Filter operators accepted from clients, mapped to their SQL spelling.
+FILTER_OPERATORS = {
+    "=": "=",
+    "==": "=",
+    "!=": "!=",
+    "<>": "!=",
+    "<": "<",
+    "<=": "<=",
+    ">": ">",
+    ">=": ">=",
+    "like": "LIKE",
+    "not like": "NOT LIKE",
+    "in": "IN",
+    "not in": "NOT IN",
+    "between": "BETWEEN",
+    "is null": "IS NULL",
+    "is not null": "IS NOT NULL",
+}
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def quote_identifier(name: str) -> str:
+    """Quotes a table or column name for safe use in SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _check_column(column, known_columns: list[str], table_name: str) -> str:
+    if not isinstance(column, str) or column not in known_columns:
+        raise ValueError(
+            f"Unknown column '{column}' for table '{table_name}'. "
+            f"Available columns: {', '.join(known_columns)}."
+        )
+    return quote_identifier(column)
+
+
+def _check_scalar(value, column: str):
+    if not isinstance(value, SCALAR_TYPES):
+        raise ValueError(
+            f"Filter value for column '{column}' must be a string, number, boolean or null."
+        )
+    return value
+
+
+def compile_filters(
+    filters: list[dict] | None, known_columns: list[str], table_name: str
+) -> tuple[str, list]:
+    """Compiles filter predicates into a WHERE clause body and its parameters.
+
+    Each filter is a dict like ``{"column": "user_id", "op": "=", "value": 2}``.
+    Filters are combined with AND. ``in`` / ``not in`` take a list value,
+    ``between`` takes a two-element list, ``is null`` / ``is not null`` take no
+    value.
+
+    Returns:
+        ``(sql, params)``; ``sql`` is empty when there are no filters.
+    """
+    clauses = []
+    params = []
+    for predicate in filters or []:
+        if not isinstance(predicate, dict):
+            raise ValueError(f"Each filter must be an object, got {predicate!r}.")
+        column = _check_column(predicate.get("column"), known_columns, table_name)
+        op_name = str(predicate.get("op", "=")).strip().lower()
+        if op_name not in FILTER_OPERATORS:
+            raise ValueError(
+                f"Unsupported filter operator '{op_name}'. "
+                f"Use one of: {', '.join(FILTER_OPERATORS)}."
+            )
+        op = FILTER_OPERATORS[op_name]
+        value = predicate.get("value")
+
+        if op in ("IS NULL", "IS NOT NULL"):
+            clauses.append(f"{column} {op}")
+        elif op in ("IN", "NOT IN"):
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"Operator '{op_name}' needs a non-empty list value.")
+            placeholders = ", ".join("?" for _ in value)
+            clauses.append(f"{column} {op} ({placeholders})")
+            params.extend(_check_scalar(item, predicate["column"]) for item in value)
+        elif op == "BETWEEN":
+            if not isinstance(value, list) or len(value) != 2:
+                raise ValueError("Operator 'between' needs a [low, high] list value.")
+            clauses.append(f"{column} BETWEEN ? AND ?")
+            params.extend(_check_scalar(item, predicate["column"]) for item in value)
+        else:
+            clauses.append(f"{column} {op} ?")
+            params.append(_check_scalar(value, predicate["column"]))
+    return " AND ".join(clauses), params
+
+
+def compile_order_by(
+    order_by: list[dict] | None, known_columns: list[str], table_name: str
+) -> str:
+    """Compiles ``[{"column": "id", "direction": "desc"}, ...]`` into an ORDER BY body."""
+    terms = []
+    for term in order_by or []:
+        if not isinstance(term, dict):
+            raise ValueError(f"Each order_by entry must be an object, got {term!r}.")
+        column = _check_column(term.get("column"), known_columns, table_name)
+        direction = str(term.get("direction", "asc")).strip().upper()
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Order direction must be 'asc' or 'desc', got '{direction}'.")
+        terms.append(f"{column} {direction}")
+    return ", ".join(terms)
+
+
+def compile_select(
+    table_name: str,
+    known_columns: list[str],
+    columns: list[str] | None = None,
+    filters: list[dict] | None = None,
+    order_by: list[dict] | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+) -> tuple[str, list]:
+    """Builds a parameterized SELECT statement.
+
+    Args:
+        table_name: Table to read; must already be validated by the caller.
+        known_columns: Column names of ``table_name`` from the schema catalog.
+        columns: Columns to return; all columns when empty.
+        filters: Filter predicates, see ``compile_filters``.
+        order_by: Sort terms, see ``compile_order_by``.
+        limit: Maximum number of rows.
+        offset: Number of rows to skip.
+
+    Returns:
+        ``(sql, params)``.
+    """
+    if columns:
+        select_list = ", ".join(
+            _check_column(column, known_columns, table_name) for column in columns
+        )
+    else:
+        select_list = "*"
+    sql = f"SELECT {select_list} FROM {quote_identifier(table_name)}"
+
+    where_sql, params = compile_filters(filters, known_columns, table_name)
+    if where_sql:
+        sql += f" WHERE {where_sql}"
+    order_sql = compile_order_by(order_by, known_columns, table_name)
+    if order_sql:
+        sql += f" ORDER BY {order_sql}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+        if offset:
+            sql += " OFFSET ?"
+            params.append(int(offset))
+    return sql, params
+
+
+def _compile_assignments(values: dict, known_columns: list[str], table_name: str) -> tuple[list, list]:
+    if not isinstance(values, dict) or not values:
+        raise ValueError("'values' must be a non-empty object of column name -> value.")
+    columns = [_check_column(column, known_columns, table_name) for column in values]
+    for column, value in values.items():
+        if not isinstance(value, SCALAR_TYPES):
+            raise ValueError(f"Value for column '{column}' must be a string, number, boolean or null.")
+    return columns, list(values.values())
+
+
+def compile_insert(table_name: str, known_columns: list[str], values: dict) -> tuple[str, list]:
+    """Builds a parameterized INSERT of one row (``values``: column name -> value)."""
+    columns, params = _compile_assignments(values, known_columns, table_name)
+    placeholders = ", ".join("?" for _ in columns)
+    return (
+        f"INSERT INTO {quote_identifier(table_name)} ({', '.join(columns)}) VALUES ({placeholders})",
+        params,
+    )
+
+
+def compile_update(
+    table_name: str, known_columns: list[str], values: dict, filters: list[dict]
+) -> tuple[str, list]:
+    """Builds a parameterized UPDATE setting ``values`` on the rows matching ``filters``.
+
+    ``filters`` must not be empty, so a malformed request cannot update every row.
+    """
+    columns, params = _compile_assignments(values, known_columns, table_name)
+    where_sql, where_params = compile_filters(filters, known_columns, table_name)
+    if not where_sql:
+        raise ValueError("An update needs at least one filter.")
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    return (
+        f"UPDATE {quote_identifier(table_name)} SET {assignments} WHERE {where_sql}",
+        params + where_params,
+    )
+
+
+def compile_delete(table_name: str, known_columns: list[str], filters: list[dict]) -> tuple[str, list]:
+    """Builds a parameterized DELETE of the rows matching ``filters`` (which must not be empty)."""
+    where_sql, params = compile_filters(filters, known_columns, table_name)
+    if not where_sql:
+        raise ValueError("A delete needs at least one filter.")
+    return f"DELETE FROM {quote_identifier(table_name)} WHERE {where_sql}", params
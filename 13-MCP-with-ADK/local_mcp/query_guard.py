@@ -0,0 +1,117 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from loguru import logger
+
+# The deadline of the tool call running on the current worker thread.
+_state = threading.local()
+
+
+class _CallDeadline:
+    __slots__ = ("deadline", "cancelled", "started", "steps", "reason")
+
+    def __init__(self, timeout: float, cancelled: threading.Event):
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout > 0 else None
+        self.cancelled = cancelled
+        self.steps = 0
+        self.reason: str | None = None
+
+
+def install_progress_handler(conn: sqlite3.Connection, steps: int = 1000) -> None:
+    """Lets tool-call deadlines and cancellations interrupt statements on ``conn``.
+
+    SQLite calls the handler every ``steps`` virtual machine instructions;
+    returning non-zero aborts the running statement with
+    ``sqlite3.OperationalError: interrupted``. Outside a guarded tool call the
+    handler returns immediately.
+    """
+
+    def on_progress() -> int:
+        active: _CallDeadline | None = getattr(_state, "active", None)
+        if active is None:
+            return 0
+        active.steps += steps
+        if active.cancelled.is_set():
+            active.reason = "cancelled"
+            return 1
+        if active.deadline is not None and time.monotonic() >= active.deadline:
+            active.reason = "timeout"
+            return 1
+        return 0
+
+    conn.set_progress_handler(on_progress, steps)
+
+
+def disarm_deadline() -> None:
+    """Stops the current tool call's deadline from interrupting further statements.
+
+    Write tools call it once their transaction has committed: the
+    bookkeeping after a commit (change log, cache invalidation) must not be
+    interrupted, and the tool's result must not be turned into an error when
+    the write already went through.
+    """
+    _state.active = None
+
+
+def _interrupted(error: BaseException | None) -> bool:
+    """True if ``error``, or an error it was raised from, is SQLite's ``interrupted``."""
+    while error is not None:
+        if isinstance(error, sqlite3.OperationalError) and "interrupted" in str(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def run_with_deadline(
+    func: Callable[..., Any],
+    kwargs: dict,
+    cancelled: threading.Event,
+    timeout: float = 30.0,
+) -> Any:
+    """Runs a tool function with a deadline on every SQL statement it executes.
+
+    Meant to be used as ``ToolExecutor``'s ``call_wrapper``. If the tool
+    raised because a statement was interrupted (the deadline passed or
+    ``cancelled`` was set), the error is replaced by a structured one. A
+    result the tool returned is passed through as it is, even if the
+    deadline passed meanwhile.
+
+    Returns:
+        The tool's result, or a dict with 'success': False, 'error'
+        ('timeout' or 'cancelled'), 'elapsed_ms' and 'vm_steps' (SQLite
+        virtual machine instructions executed, a measure of how many rows
+        were scanned).
+    """
+    active = _CallDeadline(timeout, cancelled)
+    _state.active = active
+    try:
+        return func(**kwargs)
+    except Exception as e:
+        if active.reason is None or not _interrupted(e):
+            raise
+    finally:
+        _state.active = None
+
+    elapsed_ms = round((time.monotonic() - active.started) * 1000, 1)
+    if active.reason == "timeout":
+        message = (
+            f"Query stopped after {elapsed_ms} ms: it exceeded the {timeout:g}s time "
+            "limit. Narrow the condition or select fewer rows."
+        )
+    else:
+        message = f"Query cancelled by the client after {elapsed_ms} ms."
+    logger.warning(
+        f"QueryGuard: {func.__name__} {active.reason} after {elapsed_ms} ms "
+        f"({active.steps} VM steps)."
+    )
+    return {
+        "success": False,
+        "error": active.reason,
+        "message": message,
+        "elapsed_ms": elapsed_ms,
+        "vm_steps": active.steps,
+        "timeout_seconds": timeout,
+    }
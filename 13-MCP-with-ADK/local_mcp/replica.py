@@ -0,0 +1,353 @@
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+from loguru import logger
+
+from db_pool import ConnectionPool
+
+REPLICA_MODES = ("memory", "file", "auto")
+
+# Snapshot reads made by the tool call running on the current worker thread.
+_state = threading.local()
+
+
+class _Snapshot:
+    """One immutable copy of the primary database and its reader connections."""
+
+    def __init__(self, generation: int, mode: str, uri: str, size_bytes: int):
+        self.generation = generation
+        self.mode = mode
+        self.uri = uri
+        self.size_bytes = size_bytes
+        self.taken_at = time.time()
+        # Last time the primary was confirmed to be unchanged since the copy.
+        self.as_of = self.taken_at
+        self.keeper: sqlite3.Connection | None = None  # keeps a memory snapshot alive
+        self.path: str | None = None  # file of a file snapshot
+        self.active = 0
+        self.retired = False
+        # Reader connections not checked out; all of them once retired and idle.
+        self.idle: list[sqlite3.Connection] = []
+
+    def release(self) -> None:
+        """Closes the connections and frees the copy; called once no read uses it."""
+        for conn in self.idle:
+            conn.close()
+        self.idle.clear()
+        if self.keeper is not None:
+            self.keeper.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                logger.warning(f"ReplicaSet: could not remove {self.path}: {e}")
+
+
+class ReadStamp:
+    """What a tool call read from: the oldest snapshot it used, or the primary."""
+
+    def __init__(self):
+        self.as_of: float | None = None
+        self.source = "primary"
+        self.generation: int | None = None
+
+    def record(self, as_of: float, source: str, generation: int | None = None) -> None:
+        if self.as_of is None or as_of < self.as_of:
+            self.as_of, self.source, self.generation = as_of, source, generation
+
+    def as_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "generation": self.generation,
+            "as_of": self.as_of if self.as_of is not None else time.time(),
+        }
+
+
+class ReplicaSet:
+    """Periodically refreshed read-only snapshots of the primary database.
+
+    A background thread copies the primary with SQLite's online backup API,
+    either into a shared-cache in-memory database or into a file next to it
+    (``mode="auto"`` picks memory for databases up to ``memory_max_bytes``).
+    Reads on a snapshot never wait for, or hold up, writers on the primary.
+
+    Each refresh builds a new snapshot and swaps it in; reads still running
+    on the previous one finish there, and it is released afterwards. A
+    refresh is skipped, and the current snapshot's ``as_of`` moved forward,
+    when ``PRAGMA data_version`` shows that nothing was committed since the
+    last copy.
+
+    ``reader()`` falls back to the primary's pool when the current snapshot
+    is older than ``max_staleness`` seconds (e.g. a refresh is failing), so a
+    read never sees data older than that bound.
+    """
+
+    def __init__(
+        self,
+        source_path: str,
+        connect_snapshot: Callable[[str], sqlite3.Connection],
+        primary: ConnectionPool,
+        mode: str = "auto",
+        max_staleness: float = 5.0,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        max_readers: int = 4,
+        directory: str | None = None,
+    ):
+        """
+        Args:
+            source_path: Path of the primary database file.
+            connect_snapshot: Opens a reader connection to a snapshot URI.
+            primary: Pool of the primary, used when no fresh snapshot exists.
+            mode: 'memory', 'file' or 'auto'.
+            max_staleness: Maximum age, in seconds, of the data a read may see.
+                           Snapshots are refreshed at twice this rate.
+            memory_max_bytes: Largest database ``auto`` mode copies into memory.
+            max_readers: Idle reader connections kept open per snapshot.
+            directory: Where file snapshots are written (default: next to the primary).
+        """
+        if mode not in REPLICA_MODES:
+            raise ValueError(f"Replica mode must be one of {', '.join(REPLICA_MODES)}.")
+        if max_staleness <= 0:
+            raise ValueError("max_staleness must be positive.")
+        self.source_path = source_path
+        self.mode = mode
+        self.max_staleness = max_staleness
+        self.memory_max_bytes = memory_max_bytes
+        self.max_readers = max_readers
+        self.directory = directory or str(Path(source_path).resolve().parent)
+        self._connect_snapshot = connect_snapshot
+        self._primary = primary
+
+        self._lock = threading.Lock()
+        self._current: _Snapshot | None = None
+        self._retired: list[_Snapshot] = []
+        self._generations = itertools.count(1)
+        self._source: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._refreshes = 0
+        self._skipped_refreshes = 0
+        self._failed_refreshes = 0
+        self._last_refresh_ms = 0.0
+        self._snapshot_reads = 0
+        self._primary_reads = 0
+
+    # --- Refreshing ---
+    def _source_connection(self) -> sqlite3.Connection:
+        if self._source is None:
+            uri = f"{Path(self.source_path).resolve().as_uri()}?mode=ro"
+            self._source = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._source
+
+    def _copy(self, source: sqlite3.Connection, generation: int) -> _Snapshot:
+        page_size = source.execute("PRAGMA page_size").fetchone()[0]
+        size_bytes = source.execute("PRAGMA page_count").fetchone()[0] * page_size
+        mode = self.mode
+        if mode == "auto":
+            mode = "memory" if size_bytes <= self.memory_max_bytes else "file"
+
+        keeper = path = None
+        if mode == "memory":
+            uri = f"file:mcp-replica-{os.getpid()}-{generation}?mode=memory&cache=shared"
+            keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            source.backup(keeper)
+        else:
+            path = os.path.join(
+                self.directory,
+                f".{Path(self.source_path).name}.replica-{os.getpid()}-{generation}",
+            )
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target)
+                # The copy never changes, so it needs neither a WAL nor locks.
+                target.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                target.close()
+            uri = f"{Path(path).as_uri()}?mode=ro&immutable=1"
+
+        snapshot = _Snapshot(generation, mode, uri, size_bytes)
+        snapshot.keeper, snapshot.path = keeper, path
+        return snapshot
+
+    def refresh(self, force: bool = False) -> bool:
+        """Copies the primary into a new snapshot if it changed since the last copy.
+
+        Returns:
+            True if a new snapshot was taken.
+        """
+        source = self._source_connection()
+        checked_at = time.time()
+        data_version = source.execute("PRAGMA data_version").fetchone()[0]
+        current = self._current
+        if not force and current is not None and data_version == self._data_version:
+            current.as_of = checked_at
+            self._skipped_refreshes += 1
+            return False
+
+        started = time.perf_counter()
+        snapshot = self._copy(source, next(self._generations))
+        # The copy reflects everything committed before it started.
+        snapshot.as_of = checked_at
+        with self._lock:
+            previous, self._current = self._current, snapshot
+            if previous is not None:
+                previous.retired = True
+                self._retired.append(previous)
+            self._data_version = data_version
+        self._release_retired()
+        self._refreshes += 1
+        self._last_refresh_ms = (time.perf_counter() - started) * 1000
+        logger.debug(
+            f"ReplicaSet: snapshot {snapshot.generation} ({snapshot.mode}, "
+            f"{snapshot.size_bytes} bytes) taken in {self._last_refresh_ms:.1f} ms."
+        )
+        return True
+
+    def _release_retired(self) -> None:
+        with self._lock:
+            idle = [snapshot for snapshot in self._retired if snapshot.active == 0]
+            self._retired = [snapshot for snapshot in self._retired if snapshot.active]
+        for snapshot in idle:
+            snapshot.release()
+
+    def _refresh_loop(self) -> None:
+        interval = self.max_staleness / 2
+        while not self._stopped.is_set():
+            self._wake.wait(interval)
+            # Coalesce the refreshes requested by a burst of writes.
+            if self._stopped.wait(self.max_staleness / 8):
+                return
+            self._wake.clear()
+            try:
+                self.refresh()
+            except sqlite3.Error as e:
+                self._failed_refreshes += 1
+                logger.warning(f"ReplicaSet: refresh failed, reads keep the previous snapshot: {e}")
+
+    def request_refresh(self) -> None:
+        """Asks for a refresh now (after a write) instead of at the next interval."""
+        self._wake.set()
+
+    def start(self) -> None:
+        """Takes the first snapshot and starts refreshing in the background."""
+        self.refresh(force=True)
+        self._thread = threading.Thread(
+            target=self._refresh_loop, name="mcp-replica-refresh", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"ReplicaSet: serving reads from snapshots: {self.stats()}")
+
+    def close(self) -> None:
+        """Stops refreshing and releases every snapshot once its reads finish."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            if self._current is not None:
+                self._current.retired = True
+                self._retired.append(self._current)
+                self._current = None
+        self._release_retired()
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    @property
+    def generation(self) -> int | None:
+        """Generation of the current snapshot; it grows with every refresh."""
+        current = self._current
+        return current.generation if current else None
+
+    # --- Reading ---
+    @contextmanager
+    def reader(self):
+        """Checks out a connection to the current snapshot (or the primary)."""
+        stamp: ReadStamp | None = getattr(_state, "stamp", None)
+        held = getattr(_state, "held", None)
+        if held is not None:
+            # Re-entrant use on the same thread stays on the same snapshot.
+            yield held
+            return
+
+        conn = None
+        with self._lock:
+            snapshot = self._current
+            if snapshot is not None and time.time() - snapshot.as_of <= self.max_staleness:
+                snapshot.active += 1
+                conn = snapshot.idle.pop() if snapshot.idle else None
+            else:
+                snapshot = None
+
+        if snapshot is None:
+            self._primary_reads += 1
+            if stamp is not None:
+                stamp.record(time.time(), "primary")
+            with self._primary.reader() as conn:
+                yield conn
+            return
+
+        self._snapshot_reads += 1
+        if stamp is not None:
+            stamp.record(snapshot.as_of, "replica", snapshot.generation)
+        try:
+            if conn is None:
+                conn = self._connect_snapshot(snapshot.uri)
+            _state.held = conn
+            try:
+                yield conn
+            finally:
+                _state.held = None
+                if conn.in_transaction:
+                    conn.rollback()
+        finally:
+            with self._lock:
+                keep = conn is not None and len(snapshot.idle) < self.max_readers
+                if keep:
+                    snapshot.idle.append(conn)
+                snapshot.active -= 1
+                release = snapshot.retired and snapshot.active == 0
+            if conn is not None and not keep:
+                conn.close()
+            if release:
+                self._release_retired()
+
+    @contextmanager
+    def track(self):
+        """Collects, into the yielded ``ReadStamp``, the data age of the reads in the block."""
+        outer = getattr(_state, "stamp", None)
+        stamp = ReadStamp()
+        _state.stamp = stamp
+        try:
+            yield stamp
+        finally:
+            _state.stamp = outer
+            if outer is not None and stamp.as_of is not None:
+                outer.record(stamp.as_of, stamp.source, stamp.generation)
+
+    def stats(self) -> dict:
+        current = self._current
+        return {
+            "mode": self.mode,
+            "max_staleness_seconds": self.max_staleness,
+            "generation": current.generation if current else None,
+            "snapshot_mode": current.mode if current else None,
+            "snapshot_bytes": current.size_bytes if current else 0,
+            "staleness_seconds": round(time.time() - current.as_of, 3) if current else None,
+            "retired_in_use": len(self._retired),
+            "refreshes": self._refreshes,
+            "skipped_refreshes": self._skipped_refreshes,
+            "failed_refreshes": self._failed_refreshes,
+            "last_refresh_ms": round(self._last_refresh_ms, 1),
+            "snapshot_reads": self._snapshot_reads,
+            "primary_reads": self._primary_reads,
+        }
@@ -0,0 +1,149 @@
+"""Encodes tool results into the text sent back to MCP clients.
+
+Tool results end up in the model's prompt, so every byte counts twice:
+once on the wire and once as tokens. The encoder therefore
+
+- writes compact JSON (no indentation, no spaces after separators), using
+  orjson when it is installed and the standard library otherwise;
+- turns lists of same-shaped records into ``{"columns": [...], "rows":
+  [[...], ...]}``, so column names appear once instead of once per row;
+- encodes BLOB values (``bytes``) as base64 strings;
+- enforces a byte budget by dropping trailing rows from the largest list and
+  adding a ``truncated`` marker that says how many rows were left out.
+"""
+
+import base64
+import json
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+TRUNCATION_KEY = "truncated"
+
+
+def _default(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return str(value)
+
+
+def dumps(value) -> str:
+    """Compact JSON text for ``value``."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode(
+            "utf-8"
+        )
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+def json_backend() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def _as_columns(records: list):
+    """``{"columns", "rows"}`` for a list of records sharing the same keys, else None."""
+    if len(records) < 2 or not isinstance(records[0], dict) or not records[0]:
+        return None
+    columns = tuple(records[0])
+    if any(not isinstance(record, dict) or tuple(record) != columns for record in records):
+        return None
+    return {
+        "columns": list(columns),
+        "rows": [list(record.values()) for record in records],
+    }
+
+
+def to_columnar(value):
+    """Rewrites top-level record lists of a tool result into columnar form."""
+    if isinstance(value, list):
+        return _as_columns(value) or value
+    if isinstance(value, dict):
+        return {
+            key: (_as_columns(item) or item) if isinstance(item, list) else item
+            for key, item in value.items()
+        }
+    return value
+
+
+def _largest_list(value):
+    """Returns ``(container, key)`` of the longest row list in a result, or None."""
+    candidates = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "columns" and isinstance(value.get("rows"), list):
+                continue  # header of a top-level columnar result
+            if isinstance(item, list):
+                candidates.append((value, key))
+            elif isinstance(item, dict) and isinstance(item.get("rows"), list):
+                candidates.append((item, "rows"))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: len(candidate[0][candidate[1]]))
+
+
+def _truncate(value, max_bytes: int, original_size: int) -> str:
+    if isinstance(value, list):
+        value = {"rows": value}
+    # Copy the two levels we may trim: the value can be a shared cached result.
+    value = {
+        key: dict(item) if isinstance(item, dict) else item for key, item in value.items()
+    }
+    located = _largest_list(value)
+    if located is None or not located[0][located[1]]:
+        return dumps(
+            {
+                "success": False,
+                "message": (
+                    f"Response of {original_size} bytes exceeds the {max_bytes} byte "
+                    "budget and has no rows to trim. Request fewer columns or a "
+                    "narrower condition."
+                ),
+                TRUNCATION_KEY: {"original_bytes": original_size, "max_bytes": max_bytes},
+            }
+        )
+
+    container, key = located
+    rows = container[key]
+    total = len(rows)
+    marker = {
+        "rows_returned": 0,
+        "rows_omitted": total,
+        "original_bytes": original_size,
+        "max_bytes": max_bytes,
+    }
+
+    def encode(keep: int) -> str:
+        container[key] = rows[:keep]
+        marker["rows_returned"] = keep
+        marker["rows_omitted"] = total - keep
+        return dumps({**value, TRUNCATION_KEY: marker})
+
+    # Binary search for the largest number of rows that fits.
+    low, high = 0, total
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(encode(middle).encode("utf-8")) <= max_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return encode(low)
+
+
+def encode_response(value, columnar: bool = True, max_bytes: int = 0) -> str:
+    """Encodes a tool result.
+
+    Args:
+        value: The tool's return value (JSON-compatible, may contain bytes).
+        columnar: Rewrite record lists as ``{"columns", "rows"}``.
+        max_bytes: Byte budget for the encoded text (0 = unlimited).
+    """
+    if columnar:
+        value = to_columnar(value)
+    text = dumps(value)
+    if max_bytes > 0:
+        size = len(text.encode("utf-8"))
+        if size > max_bytes:
+            return _truncate(value, max_bytes, size)
+    return text
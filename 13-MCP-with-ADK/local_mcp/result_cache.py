@@ -0,0 +1,242 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from loguru import logger
+
+
+class ResultCache:
+    """LRU cache for read-tool results with TTL, entry and byte limits.
+
+    Every entry records the tables it read. Writes made through the server call
+    ``invalidate_tables`` for the tables they touched, which drops exactly the
+    entries that depend on them. Each table also has a generation counter: a
+    read that was running while a write to one of its tables committed is not
+    stored, so a cached result can never predate a write made through the
+    server.
+
+    Writes from other processes (another server of the pool, a script) don't
+    call ``invalidate_tables``. Pass ``version`` to catch them: it is read on
+    every lookup, and when it changed since the last one every entry is
+    dropped. The server's own commits change it too; ``acknowledge_version``
+    after each of them keeps those to the per-table invalidation. Without
+    ``version`` other writers are only picked up when the TTL expires.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl: float = 60.0,
+        version: Callable[[], Any] | None = None,
+    ):
+        """
+        Args:
+            max_entries: Maximum number of cached results.
+            max_bytes: Maximum total size of the cached results (serialized).
+            ttl: Seconds a result stays valid.
+            version: Returns a value that changes whenever the database does,
+                     e.g. ``PRAGMA data_version`` (see ``DataVersion``).
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._version = version
+        self._seen_version = None
+        self._lock = threading.Lock()
+        # key -> (value, tables, size_bytes, expires_at)
+        self._entries: OrderedDict[str, tuple[Any, frozenset, int, float]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._global_generation = 0
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+        self._version_changes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(tool_name: str, args: dict) -> str:
+        """Builds a cache key from the tool name and its (normalized) arguments."""
+        normalized = {
+            name: value.strip() if isinstance(value, str) else value
+            for name, value in args.items()
+            if value is not None
+        }
+        return tool_name + ":" + json.dumps(normalized, sort_keys=True, default=str)
+
+    def _snapshot(self, tables: frozenset) -> tuple:
+        return (
+            self._global_generation,
+            tuple(self._generations.get(table, 0) for table in sorted(tables)),
+        )
+
+    def _drop(self, key: str) -> None:
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _clear(self) -> None:
+        self._global_generation += 1
+        self._invalidations += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+
+    def _check_version(self, version) -> None:
+        """Drops every entry if the database changed since the last check (call under the lock)."""
+        if version != self._seen_version:
+            if self._seen_version is not None:
+                self._version_changes += 1
+                self._clear()
+            self._seen_version = version
+
+    def read_version(self):
+        """The current ``version``, or None without one."""
+        return self._version() if self._version is not None else None
+
+    def acknowledge_version(self, before) -> None:
+        """Records the change of ``version`` caused by a commit made through the server.
+
+        Call it right after the commit, once the tables it wrote were
+        invalidated, with the ``read_version()`` taken before the write
+        started. If nothing else had committed by then, the new version is
+        recorded as seen and the commit does not clear the whole cache. A
+        commit from another process while the write was running is missed
+        until the TTL expires.
+        """
+        if self._version is None:
+            return
+        version = self._version()
+        with self._lock:
+            if before == self._seen_version:
+                self._seen_version = version
+
+    def get_or_compute(self, key: str, tables: set[str], compute: Callable[[], Any]) -> Any:
+        """Returns the cached value for ``key`` or computes and caches it.
+
+        Args:
+            key: Cache key from ``make_key``.
+            tables: Tables the result depends on.
+            compute: Produces the value on a miss.
+        """
+        if not self.enabled:
+            return compute()
+
+        tables = frozenset(tables)
+        version = self.read_version()
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, _, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                self._drop(key)
+            self._misses += 1
+            snapshot = self._snapshot(tables)
+
+        value = compute()
+
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return value
+        version = self.read_version()
+        with self._lock:
+            # The database changed while we were reading (drops the entries
+            # and bumps the generation, so the check below fails too).
+            self._check_version(version)
+            # A write to one of our tables committed while we were reading.
+            if self._snapshot(tables) != snapshot:
+                return value
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, tables, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+        return value
+
+    def invalidate_tables(self, tables: set[str]) -> None:
+        """Drops every entry that read from any of ``tables``."""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                self._drop(key)
+            self._invalidations += len(stale)
+        if stale:
+            logger.debug(f"ResultCache: invalidated {len(stale)} entries for {sorted(tables)}.")
+
+    def discard(self, key: str) -> None:
+        """Drops a single entry, e.g. one whose data turned out to be too old."""
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self._invalidations += 1
+
+    def clear(self) -> None:
+        """Drops every entry, e.g. after a write whose side effects are unknown."""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "checks_data_version": self._version is not None,
+                "data_version_changes": self._version_changes,
+            }
+
+
+class DataVersion:
+    """``PRAGMA data_version`` of a connection opened only to read it.
+
+    The value changes whenever any other connection commits to the database,
+    in this process or another one. The connection never writes, so every
+    commit counts, including the server's own (see
+    ``ResultCache.acknowledge_version``). Values of different connections
+    can't be compared, so all lookups share this one connection.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection]):
+        """
+        Args:
+            connect: Opens the connection, on the first call.
+        """
+        self._connect = connect
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
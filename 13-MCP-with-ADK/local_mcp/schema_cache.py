@@ -0,0 +1,167 @@
+import re
+import sqlite3
+import threading
+import time
+from contextlib import AbstractContextManager
+from typing import Callable
+
+from loguru import logger
+
+_WITHOUT_ROWID_RE = re.compile(r"\bwithout\s+rowid\b", re.I)
+
+
+def _base_tables(view: str, view_sql: dict[str, str], tables) -> set[str]:
+    """Tables whose name appears in the SQL of ``view`` or of the views it names.
+
+    Like ``Database.referenced_tables`` this may name a table too many, never
+    one too few.
+    """
+    found, pending, seen = set(), [view], {view}
+    while pending:
+        sql = view_sql[pending.pop()]
+        found.update(table for table in tables if table.lower() in sql)
+        for other in view_sql:
+            if other not in seen and other.lower() in sql:
+                seen.add(other)
+                pending.append(other)
+    return found
+
+
+class SchemaCatalog:
+    """In-memory catalog of the database's tables and columns.
+
+    ``list_db_tables`` and ``get_table_schema`` are answered from this catalog
+    instead of querying ``sqlite_master`` / ``PRAGMA table_info`` every time.
+    The catalog is rebuilt when:
+
+    - the server runs DDL itself and calls ``invalidate()``, or
+    - ``PRAGMA schema_version`` changes, which catches DDL from other
+      processes. That check runs at most once every ``check_interval``
+      seconds, so back-to-back lookups never touch the database.
+    """
+
+    def __init__(
+        self,
+        reader: Callable[[], AbstractContextManager[sqlite3.Connection]],
+        check_interval: float = 2.0,
+    ):
+        """
+        Args:
+            reader: Returns a context manager yielding a connection, e.g.
+                    ``ConnectionPool.reader``.
+            check_interval: Minimum seconds between ``schema_version`` checks.
+        """
+        self._reader = reader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._schema_version: int | None = None
+        self._tables: dict[str, list[dict]] = {}
+        self._triggers: dict[str, list[str]] = {}
+        self._rowid_tables: set[str] = set()
+        self._view_tables: dict[str, set[str]] = {}
+        self._last_check = 0.0
+        self._hits = 0
+        self._refreshes = 0
+
+    def invalidate(self) -> None:
+        """Forces a rebuild on the next lookup. Call after running DDL."""
+        with self._lock:
+            self._schema_version = None
+
+    def _load(self, conn: sqlite3.Connection, schema_version: int) -> None:
+        tables = {}
+        rowid_tables = set()
+        for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='table' ORDER BY rowid;"
+        ):
+            tables[name] = None
+            if not _WITHOUT_ROWID_RE.search(sql or ""):
+                rowid_tables.add(name)
+        for name in list(tables):
+            tables[name] = [
+                {
+                    "name": row["name"],
+                    "type": row["type"],
+                    "notnull": bool(row["notnull"]),
+                    "default": row["dflt_value"],
+                    "pk": row["pk"],
+                }
+                for row in conn.execute(
+                    "SELECT name, type, \"notnull\", dflt_value, pk "
+                    "FROM pragma_table_info(?) ORDER BY cid;",
+                    (name,),
+                )
+            ]
+        view_sql = {
+            name: (sql or "").lower()
+            for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type='view';")
+        }
+        view_tables = {name: _base_tables(name, view_sql, tables) for name in view_sql}
+        triggers: dict[str, list[str]] = {}
+        for name, table in conn.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type='trigger';"
+        ):
+            triggers.setdefault(table, []).append(name)
+        self._tables = tables
+        self._triggers = triggers
+        self._rowid_tables = rowid_tables
+        self._view_tables = view_tables
+        self._schema_version = schema_version
+        self._refreshes += 1
+        logger.debug(
+            f"SchemaCatalog: loaded {len(tables)} tables (schema_version={schema_version})."
+        )
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._schema_version is not None
+                and now - self._last_check < self.check_interval
+            ):
+                self._hits += 1
+                return
+            with self._reader() as conn:
+                version = conn.execute("PRAGMA schema_version;").fetchone()[0]
+                if version != self._schema_version:
+                    self._load(conn, version)
+                else:
+                    self._hits += 1
+            self._last_check = now
+
+    def refresh(self) -> None:
+        """Rebuilds the catalog immediately (used at server startup)."""
+        self.invalidate()
+        self._ensure_fresh()
+
+    def list_tables(self) -> list[str]:
+        self._ensure_fresh()
+        return list(self._tables)
+
+    def get_columns(self, table_name: str) -> list[dict] | None:
+        """Returns the column descriptions of a table, or None if it doesn't exist."""
+        self._ensure_fresh()
+        return self._tables.get(table_name)
+
+    def has_rowid(self, table_name: str) -> bool:
+        """True if the table exists and is not a WITHOUT ROWID table."""
+        self._ensure_fresh()
+        return table_name in self._rowid_tables
+
+    def view_tables(self) -> dict[str, set[str]]:
+        """The tables each view reads, through nested views too."""
+        self._ensure_fresh()
+        return self._view_tables
+
+    def triggers(self, table_name: str) -> list[str]:
+        """Names of the triggers fired by writes to the table."""
+        self._ensure_fresh()
+        return list(self._triggers.get(table_name, []))
+
+    def stats(self) -> dict:
+        return {
+            "tables": len(self._tables),
+            "schema_version": self._schema_version,
+            "hits": self._hits,
+            "refreshes": self._refreshes,
+        }
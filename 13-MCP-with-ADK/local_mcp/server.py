@@ -1,49 +1,580 @@
+import argparse
 import asyncio
+import contextlib
+import functools
 import json
 import os
 import sqlite3  # For database operations
+import sys
+import time
+from pathlib import Path
+from typing import Optional
 
 import mcp.server.stdio  # For running as a stdio server
-from dotenv import load_dotenv
-from loguru import logger  
-# ADK Tool Imports
-from google.adk.tools.function_tool import FunctionTool
-from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+from loguru import logger
 
 # MCP Server Imports
 from mcp import types as mcp_types  # Use alias to avoid conflict
 from mcp.server.lowlevel import NotificationOptions, Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.models import InitializationOptions
 
-load_dotenv()
+from batch_ops import run_batch
+from change_feed import (
+    CHANGES_URI_SCHEME,
+    ChangeLog,
+    ChangeSubscriptions,
+    changes_uri,
+    drain_changes,
+    fetch_rows,
+    install_change_triggers,
+    parse_changes_uri,
+)
+from db_pool import ConnectionPool
+from db_profile import apply_profile, describe_connection, get_profile, run_maintenance
+from db_registry import DatabaseRegistry, parse_database_config
+from export import available_formats, export_rows, summarize_columns
+from fts import (
+    DEFAULT_FTS_COLUMNS,
+    ensure_fts_index,
+    fts_table_name,
+    fts_trigger_names,
+    is_fts_table,
+    parse_fts_config,
+    search,
+    to_match_query,
+)
+from index_advisor import (
+    IndexAdvisor,
+    columns_in_condition,
+    create_index,
+    normalize_condition,
+    table_statistics,
+)
+from log_utils import LogSampler, preview
+from metrics import (
+    TimedWriteStream,
+    ToolMetrics,
+    active_write_stream,
+    call_timings,
+    result_row_count,
+)
+from pagination import (
+    ROWID_ALIAS,
+    decode_page_token,
+    encode_page_token,
+    fetch_page,
+    has_order_by,
+    is_bare_predicate,
+    offset_page_query,
+    plain_column_list,
+    query_fingerprint,
+)
+from query_builder import compile_select, quote_identifier
+from query_guard import disarm_deadline, install_progress_handler, run_with_deadline
+from replica import ReplicaSet
+from response_encoding import dumps, encode_response, json_backend
+from result_cache import DataVersion, ResultCache
+from schema_cache import SchemaCatalog
+from tool_catalog import ToolCatalog, convert_with_adk, write_schema_file
+from tool_executor import ToolExecutor
+from tool_registry import LocalTool, tools_fingerprint
+from transaction import TransactionStepError, run_operations
 
+try:
+    from dotenv import load_dotenv
+except ImportError:  # optional: only needed to read a .env file
+    pass
+else:
+    load_dotenv()
 
-DATABASE_PATH = os.path.join(os.path.dirname(__file__), "database.db")
+
+# MCP_DB_PATH points the server at another database (e.g. one built by generate_data.py)
+DATABASE_PATH = os.getenv(
+    "MCP_DB_PATH", os.path.join(os.path.dirname(__file__), "database.db")
+)
+
+# More databases, selected with the tools' `database` argument: named paths
+# ("tenant_a=/data/a.db,...") and <MCP_DATABASE_DIR>/<name>.db files. At most
+# MCP_MAX_OPEN_DATABASES are open at once; the least recently used are closed.
+DATABASES = parse_database_config(os.getenv("MCP_DATABASES", ""))
+DATABASE_DIR = os.getenv("MCP_DATABASE_DIR") or None
+MAX_OPEN_DATABASES = int(os.getenv("MCP_MAX_OPEN_DATABASES", "32"))
+
+# PRAGMA profile applied to every connection (see db_profile.py)
+DB_PROFILE_NAME, DB_PROFILE = get_profile()
+# Let the server convert a database file when it opens it: switch it to the
+# profile's journal mode and build missing full-text indexes. Off by default,
+# so merely starting the server never rewrites a database such as the
+# checked-in database.db; prepare files with `create_db.py --prepare PATH`.
+DB_PREPARE_ON_OPEN = os.getenv("MCP_DB_PREPARE_ON_OPEN", "0").lower() in ("1", "true", "yes")
+
+# Connection pool settings (override via environment / .env)
+DB_POOL_SIZE = int(os.getenv("MCP_DB_POOL_SIZE", "4"))
+DB_POOL_TIMEOUT = float(os.getenv("MCP_DB_POOL_TIMEOUT", "5.0"))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(
+    os.getenv("MCP_DB_POOL_HEALTH_CHECK_INTERVAL", "30.0")
+)
+
+# Prepared statements kept per pooled connection (sqlite3's cached_statements)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("MCP_DB_STATEMENT_CACHE_SIZE", "256"))
+
+# How often (seconds) the schema catalog re-checks PRAGMA schema_version
+SCHEMA_CHECK_INTERVAL = float(os.getenv("MCP_SCHEMA_CHECK_INTERVAL", "2.0"))
+
+# Read-through cache for query results (0 entries disables it)
+RESULT_CACHE_ENTRIES = int(os.getenv("MCP_RESULT_CACHE_ENTRIES", "256"))
+RESULT_CACHE_BYTES = int(os.getenv("MCP_RESULT_CACHE_BYTES", str(8 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv("MCP_RESULT_CACHE_TTL", "60"))
+# Check PRAGMA data_version on every cache lookup, so writes from other
+# processes (other servers of a pool, scripts) invalidate cached results.
+# Meant for multi-writer setups: a commit from elsewhere clears the whole
+# cache, and the lookups share one connection to read it.
+RESULT_CACHE_CHECK_DATA_VERSION = os.getenv("MCP_RESULT_CACHE_CHECK_DATA_VERSION", "0") == "1"
+
+# query_db_table paging: rows per page by default, and the hard cap per page
+QUERY_DEFAULT_PAGE_SIZE = int(os.getenv("MCP_QUERY_PAGE_SIZE", "100"))
+QUERY_MAX_ROWS = int(os.getenv("MCP_QUERY_MAX_ROWS", "500"))
+
+# Index advisor: queries slower than this get their plan captured; with
+# MCP_AUTO_INDEX=1 the recommended index is created once a shape has run
+# MCP_AUTO_INDEX_MIN_CALLS times with an average above the threshold.
+SLOW_QUERY_MS = float(os.getenv("MCP_SLOW_QUERY_MS", "50"))
+AUTO_INDEX = os.getenv("MCP_AUTO_INDEX", "0").lower() in ("1", "true", "yes")
+AUTO_INDEX_MIN_CALLS = int(os.getenv("MCP_AUTO_INDEX_MIN_CALLS", "20"))
+
+# Text columns indexed with FTS5 for search_text ("table.column,..."; empty disables)
+FTS_COLUMNS = parse_fts_config(os.getenv("MCP_FTS_COLUMNS", DEFAULT_FTS_COLUMNS))
+
+# Rows per executemany() call in the *_many batch tools
+BATCH_CHUNK_SIZE = int(os.getenv("MCP_BATCH_CHUNK_SIZE", "500"))
+
+# Most operations accepted by one run_transaction call
+TRANSACTION_MAX_OPS = int(os.getenv("MCP_TRANSACTION_MAX_OPS", "100"))
+
+# Change feed for changes_since: the last MCP_CHANGE_LOG_SIZE row changes
+# made through the server are kept per database (0 disables it)
+CHANGE_LOG_SIZE = int(os.getenv("MCP_CHANGE_LOG_SIZE", "10000"))
+
+# Read-only snapshot replicas for the read tools: MCP_REPLICA_MODE is off,
+# memory, file or auto (memory up to MCP_REPLICA_MEMORY_MAX_MB). Reads never
+# see data older than MCP_REPLICA_MAX_STALENESS seconds.
+REPLICA_MODE = os.getenv("MCP_REPLICA_MODE", "off").lower()
+REPLICA_MAX_STALENESS = float(os.getenv("MCP_REPLICA_MAX_STALENESS", "5"))
+REPLICA_MEMORY_MAX_MB = int(os.getenv("MCP_REPLICA_MEMORY_MAX_MB", "64"))
+REPLICA_DIR = os.getenv("MCP_REPLICA_DIR") or None
+
+# Precomputed tool schemas (see tool_catalog.py); empty always generates them
+# with ADK. Startup taking longer than the budget is logged as a warning.
+TOOL_SCHEMA_FILE = os.getenv(
+    "MCP_TOOL_SCHEMA_FILE", os.path.join(os.path.dirname(__file__), "tool_schemas.json")
+)
+STARTUP_BUDGET_MS = float(os.getenv("MCP_STARTUP_BUDGET_MS", "1000"))
+
+# export_table writes its files here, streaming this many rows per batch
+EXPORT_DIR = os.getenv("MCP_EXPORT_DIR", os.path.join(os.path.dirname(__file__), "exports"))
+EXPORT_BATCH_SIZE = int(os.getenv("MCP_EXPORT_BATCH_SIZE", "5000"))
+
+# Worker executor settings: DB tools run off the event loop on these threads
+TOOL_WORKERS = int(os.getenv("MCP_TOOL_WORKERS", str(DB_POOL_SIZE + 1)))
+TOOL_MAX_CONCURRENCY = int(os.getenv("MCP_TOOL_MAX_CONCURRENCY", str(TOOL_WORKERS)))
+TOOL_MAX_QUEUE = int(os.getenv("MCP_TOOL_MAX_QUEUE", "64"))
+
+# Per-call time limit (seconds, 0 = none) for the SQL a tool runs, and how
+# many SQLite VM instructions run between two deadline/cancellation checks
+QUERY_TIMEOUT = float(os.getenv("MCP_QUERY_TIMEOUT", "30"))
+QUERY_PROGRESS_STEPS = int(os.getenv("MCP_QUERY_PROGRESS_STEPS", "1000"))
+
+# Transport: "stdio" (one server per client) or "http" (one shared server,
+# streamable HTTP on /mcp and SSE on /sse). Overridable with --transport etc.
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+HTTP_HOST = os.getenv("MCP_HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.getenv("MCP_HTTP_PORT", "8765"))
+# Idle seconds before a kept-alive HTTP connection is closed
+HTTP_KEEP_ALIVE = int(os.getenv("MCP_HTTP_KEEP_ALIVE", "30"))
+# Seconds in-flight requests get to finish on shutdown before being cut off
+HTTP_DRAIN_TIMEOUT = int(os.getenv("MCP_HTTP_DRAIN_TIMEOUT", "15"))
+
+# Logging: sink level, size of argument/response previews in DEBUG logs, and
+# sampling of the per-call log lines for high-volume (read) tools
+LOG_LEVEL = os.getenv("MCP_LOG_LEVEL", "INFO").upper()
+LOG_PREVIEW_BYTES = int(os.getenv("MCP_LOG_PREVIEW_BYTES", "512"))
+LOG_SAMPLE_EVERY = int(os.getenv("MCP_LOG_SAMPLE_EVERY", "10"))
+LOG_SAMPLED_TOOLS = {
+    name.strip()
+    for name in os.getenv(
+        "MCP_LOG_SAMPLED_TOOLS",
+        "list_db_tables,get_table_schema,query_db_table,query_rows,search_text",
+    ).split(",")
+    if name.strip()
+}
+
+# Tool response encoding (see response_encoding.py): record lists are sent as
+# {"columns", "rows"}, and responses above the byte budget lose trailing rows.
+RESPONSE_COLUMNAR = os.getenv("MCP_RESPONSE_COLUMNAR", "1").lower() in ("1", "true", "yes")
+RESPONSE_MAX_BYTES = int(os.getenv("MCP_RESPONSE_MAX_BYTES", str(256 * 1024)))
+
+
+logger.remove()
+logger.add(sys.stderr, level=LOG_LEVEL)
+log_sampler = LogSampler(every=LOG_SAMPLE_EVERY, sampled_tools=LOG_SAMPLED_TOOLS)
 
 
 # --- Database Utility Functions ---
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
+def get_db_connection(path: str, read_only: bool = False):
+    if read_only:
+        uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+        )
+    else:
+        # The pool hands connections between threads, but never to two at once.
+        conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+        )
     conn.row_factory = sqlite3.Row  # To access columns by name
+    apply_profile(conn, DB_PROFILE, read_only=read_only, set_journal_mode=DB_PREPARE_ON_OPEN)
+    install_progress_handler(conn, QUERY_PROGRESS_STEPS)
+    return conn
+
+
+def get_snapshot_connection(uri: str):
+    """Opens a reader connection to a replica snapshot (see replica.py)."""
+    conn = sqlite3.connect(
+        uri,
+        uri=True,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only=ON")
+    apply_profile(conn, DB_PROFILE, read_only=True)
+    install_progress_handler(conn, QUERY_PROGRESS_STEPS)
     return conn
 
 
-def list_db_tables(dummy_param: str) -> dict:
+class Database:
+    """One SQLite database and the state the server keeps for it.
+
+    Every database gets its own connection pool, replicas (if enabled),
+    schema catalog, result cache, index advisor and change log, so tenants
+    never see each other's cached data or changes. ``databases`` (see db_registry.py) opens them
+    on first use and closes the least recently used ones.
+    """
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.pool = ConnectionPool(
+            functools.partial(get_db_connection, path),
+            max_readers=DB_POOL_SIZE,
+            timeout=DB_POOL_TIMEOUT,
+            health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+        )
+        self.replicas = (
+            ReplicaSet(
+                path,
+                get_snapshot_connection,
+                self.pool,
+                mode=REPLICA_MODE,
+                max_staleness=REPLICA_MAX_STALENESS,
+                memory_max_bytes=REPLICA_MEMORY_MAX_MB * 1024 * 1024,
+                max_readers=DB_POOL_SIZE,
+                directory=REPLICA_DIR,
+            )
+            if REPLICA_MODE != "off"
+            else None
+        )
+        # Table and column metadata served from memory (see schema_cache.py)
+        self.schema_catalog = SchemaCatalog(self.pool.reader, check_interval=SCHEMA_CHECK_INTERVAL)
+        # Query results keyed by tool arguments, invalidated by writes (see result_cache.py)
+        self.data_version = (
+            DataVersion(functools.partial(get_db_connection, path, read_only=True))
+            if RESULT_CACHE_CHECK_DATA_VERSION
+            else None
+        )
+        self.result_cache = ResultCache(
+            max_entries=RESULT_CACHE_ENTRIES,
+            max_bytes=RESULT_CACHE_BYTES,
+            ttl=RESULT_CACHE_TTL,
+            version=self.data_version,
+        )
+        # Query shape statistics and index recommendations (see index_advisor.py)
+        self.index_advisor = IndexAdvisor(
+            slow_query_ms=SLOW_QUERY_MS,
+            min_calls=AUTO_INDEX_MIN_CALLS,
+            auto_create=AUTO_INDEX,
+        )
+        # Row changes for changes_since and subscribed clients (see change_feed.py)
+        self.change_log = (
+            ChangeLog(CHANGE_LOG_SIZE, on_change=functools.partial(change_subscriptions.notify, name))
+            if CHANGE_LOG_SIZE > 0
+            else None
+        )
+        # The writer connection the change triggers were created on, and for which tables
+        self._change_conn = None
+        self._change_tables: tuple[str, ...] = ()
+
+    def start(self) -> None:
+        """Loads the schema, checks (or builds) the full-text indexes and takes the first snapshot."""
+        self.schema_catalog.refresh()
+        if DB_PREPARE_ON_OPEN:
+            self.setup_fts_indexes()
+        else:
+            missing = [
+                table
+                for table in FTS_COLUMNS
+                if self.schema_catalog.get_columns(table) and not self.fts_ready(table)
+            ]
+            if missing:
+                logger.warning(
+                    f"MCP Server: No up-to-date full-text index on {missing} in '{self.name}'; "
+                    f"search_text is unavailable there. Run `create_db.py --prepare {self.path}` "
+                    f"or set MCP_DB_PREPARE_ON_OPEN=1."
+                )
+        if self.replicas is not None:
+            self.replicas.start()
+
+    @contextlib.contextmanager
+    def writer(self):
+        """The pool's writer connection, with the row changes it commits added to the change log."""
+        with self.pool.writer() as conn:
+            if self.change_log is not None:
+                self._ensure_change_triggers(conn)
+            version = self.result_cache.read_version()
+            changes = conn.total_changes
+            try:
+                yield conn
+            finally:
+                if not conn.in_transaction:
+                    disarm_deadline()
+                    if conn.total_changes != changes:
+                        self.result_cache.acknowledge_version(version)
+                if self.change_log is not None and not conn.in_transaction:
+                    try:
+                        self.change_log.append(drain_changes(conn))
+                    except sqlite3.Error as e:
+                        logger.warning(f"MCP Server: Could not record changes in '{self.name}': {e}")
+
+    def _ensure_change_triggers(self, conn) -> None:
+        tables = tuple(self.schema_catalog.list_tables())
+        # New tables, or a new writer connection (TEMP triggers live on the connection)
+        if conn is self._change_conn and tables == self._change_tables:
+            return
+        install_change_triggers(conn, [table for table in tables if not is_fts_table(table, FTS_COLUMNS)])
+        self._change_conn, self._change_tables = conn, tables
+
+    def read_connection(self):
+        """Connection for the read tools: a replica snapshot if enabled, else a pooled reader."""
+        return self.replicas.reader() if self.replicas is not None else self.pool.reader()
+
+    def referenced_tables(self, *sql_fragments: str) -> set[str]:
+        """Tables whose name appears in any of the SQL fragments, or that a view named there reads.
+
+        This over-approximates (a column or string literal may share a table's
+        name), which only costs an extra invalidation, never a stale read.
+        """
+        text = " ".join(fragment for fragment in sql_fragments if fragment).lower()
+        tables = {table for table in self.schema_catalog.list_tables() if table.lower() in text}
+        # A view's results change with the tables it reads.
+        for view, view_tables in self.schema_catalog.view_tables().items():
+            if view.lower() in text:
+                tables |= view_tables
+        return tables
+
+    def apply_index_recommendation(self, recommendation: dict) -> None:
+        """Creates an index suggested by the advisor (used when MCP_AUTO_INDEX is on)."""
+        try:
+            with self.pool.writer() as conn:
+                create_index(conn, recommendation)
+        except sqlite3.Error as e:
+            logger.warning(
+                f"MCP Server: Could not create index {recommendation['index_name']}: {e}"
+            )
+            return
+        self.schema_catalog.invalidate()
+        self.index_advisor.forget_table(recommendation["table_name"])
+
+    def invalidate_after_write(self, table_name: str) -> None:
+        """Drops cached results that may have been changed by a write to ``table_name``."""
+        # The write is committed; a deadline must not interrupt what follows.
+        disarm_deadline()
+        if self.replicas is not None:
+            self.replicas.request_refresh()
+        fts_triggers = fts_trigger_names(table_name) if table_name in FTS_COLUMNS else []
+        if any(name not in fts_triggers for name in self.schema_catalog.triggers(table_name)):
+            # User-defined triggers can write to other tables; don't guess which.
+            self.result_cache.clear()
+        elif fts_triggers:
+            self.result_cache.invalidate_tables({table_name, fts_table_name(table_name)})
+        else:
+            self.result_cache.invalidate_tables({table_name})
+
+    def snapshot_read(self, compute, cache_key: str | None = None, tables: set[str] = frozenset()):
+        """Runs a read tool's query, through the result cache when ``cache_key`` is given.
+
+        With replicas enabled the result gains a 'snapshot' entry saying whether
+        the data came from a replica and how many seconds old it may be.
+        """
+        replicas, result_cache = self.replicas, self.result_cache
+        if replicas is None:
+            return compute() if cache_key is None else result_cache.get_or_compute(cache_key, tables, compute)
+
+        def run():
+            with replicas.track() as stamp:
+                value = compute()
+            if isinstance(value, dict):
+                value = {**value, "snapshot": stamp.as_dict()}
+            return value
+
+        if cache_key is None:
+            value = run()
+        else:
+            # Until the replicas catch up with a write, reads still see the data
+            # from before it; keep what they cache apart from later snapshots.
+            cache_key = f"{cache_key}@{replicas.generation}"
+            value = result_cache.get_or_compute(cache_key, tables, run)
+            # Cached values keep the time their data was current. Don't serve one
+            # that is older than the replicas themselves are allowed to be.
+            if isinstance(value, dict) and "snapshot" in value:
+                if time.time() - value["snapshot"]["as_of"] > replicas.max_staleness:
+                    result_cache.discard(cache_key)
+                    value = result_cache.get_or_compute(cache_key, tables, run)
+        if not isinstance(value, dict) or "snapshot" not in value:
+            return value
+        stamp = value["snapshot"]
+        return {
+            **value,
+            "snapshot": {
+                "source": stamp["source"],
+                "generation": stamp["generation"],
+                "staleness_seconds": round(max(0.0, time.time() - stamp["as_of"]), 3),
+                "max_staleness_seconds": replicas.max_staleness,
+            },
+        }
+
+    def fts_ready(self, table_name: str) -> bool:
+        """True if the table's FTS5 index exists with the configured columns."""
+        index_columns = self.schema_catalog.get_columns(fts_table_name(table_name)) or []
+        return [column["name"] for column in index_columns] == FTS_COLUMNS.get(table_name)
+
+    def setup_fts_indexes(self) -> None:
+        """Builds the FTS5 indexes configured in MCP_FTS_COLUMNS, if missing or outdated."""
+        rebuilt = False
+        for table_name, columns in FTS_COLUMNS.items():
+            if not self.schema_catalog.get_columns(table_name):
+                logger.warning(
+                    f"MCP Server: Skipping full-text index in '{self.name}', no table '{table_name}'."
+                )
+                continue
+            try:
+                with self.pool.writer() as conn:
+                    rebuilt = ensure_fts_index(conn, table_name, columns) or rebuilt
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"MCP Server: Could not build full-text index on '{table_name}' in '{self.name}': {e}"
+                )
+        if rebuilt:
+            self.schema_catalog.invalidate()
+            self.result_cache.clear()
+
+    def maintain(self) -> dict:
+        """Checkpoints the WAL and runs PRAGMA optimize (see db_profile.py)."""
+        with self.pool.writer() as conn:
+            return run_maintenance(conn)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "connection_pool": self.pool.stats(),
+            "result_cache": self.result_cache.stats(),
+            "replicas": self.replicas.stats() if self.replicas is not None else None,
+            "change_log": self.change_log.stats() if self.change_log is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stops the replicas, checkpoints the WAL and closes the pool."""
+        if self.replicas is not None:
+            self.replicas.close()
+        try:
+            self.maintain()
+        except Exception as e:
+            logger.warning(f"MCP Server: Final maintenance of database '{self.name}' failed: {e}")
+        if self.data_version is not None:
+            self.data_version.close()
+        self.pool.close()
+
+
+def open_database(name: str, path: str) -> Database:
+    database = Database(name, path)
+    try:
+        database.start()
+    except Exception:
+        database.close()
+        raise
+    logger.info(
+        f"MCP Server: Opened database '{name}' ({path}): {database.schema_catalog.stats()}"
+    )
+    return database
+
+
+# MCP sessions subscribed to changes://<database>/<table> (see change_feed.py)
+change_subscriptions = ChangeSubscriptions()
+
+# Named databases, opened on first use with an LRU cap (see db_registry.py).
+# Tools take a `database` argument; without it they use MCP_DB_PATH.
+databases = DatabaseRegistry(
+    open_database,
+    DATABASE_PATH,
+    databases=DATABASES,
+    directory=DATABASE_DIR,
+    max_open=MAX_OPEN_DATABASES,
+)
+
+
+def list_databases(dummy_param: str) -> dict:
+    """Lists the databases this server can open; pass a name as `database` to the other tools.
+
+    Args:
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+    Returns:
+        dict: 'success', 'default' (the database used when `database` is omitted),
+              'databases' (names) and 'open' (names of the databases open right now).
+    """
+    return {
+        "success": True,
+        "default": databases.default_name,
+        "databases": databases.names(),
+        "open": list(databases.opened()),
+    }
+
+
+def list_db_tables(dummy_param: str, database: Optional[str] = None) -> dict:
     """Lists all tables in the SQLite database.
 
     Args:
         dummy_param (str): This parameter is not used by the function
                            but helps ensure schema generation. A non-empty string is expected.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
     Returns:
         dict: A dictionary with keys 'success' (bool), 'message' (str),
               and 'tables' (list[str]) containing the table names if successful.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        db = databases.get(database)
+        # FTS5 index tables are an implementation detail of search_text.
+        tables = [
+            table
+            for table in db.schema_catalog.list_tables()
+            if not is_fts_table(table, FTS_COLUMNS)
+        ]
         return {
             "success": True,
             "message": "Tables listed successfully.",
@@ -59,49 +590,282 @@ def list_db_tables(dummy_param: str) -> dict:
         }
 
 
-def get_table_schema(table_name: str) -> dict:
-    """Gets the schema (column names and types) of a specific table."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(f"PRAGMA table_info('{table_name}');")  # Use PRAGMA for schema
-    schema_info = cursor.fetchall()
-    conn.close()
+def get_table_schema(table_name: str, database: Optional[str] = None) -> dict:
+    """Gets the schema (column names and types) of a specific table.
+
+    Args:
+        table_name (str): The table to describe.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+    """
+    db = databases.get(database)
+    schema_info = db.schema_catalog.get_columns(table_name)
     if not schema_info:
         raise ValueError(f"Table '{table_name}' not found or no schema information.")
 
-    columns = [{"name": row["name"], "type": row["type"]} for row in schema_info]
+    columns = [{"name": column["name"], "type": column["type"]} for column in schema_info]
     return {"table_name": table_name, "columns": columns}
 
 
-def query_db_table(table_name: str, columns: str, condition: str) -> list[dict]:
+def query_db_table(
+    table_name: str,
+    columns: str,
+    condition: str,
+    page_size: Optional[int] = None,
+    page_token: Optional[str] = None,
+    database: Optional[str] = None,
+) -> dict:
     """
-    Queries a table with an optional condition.
+    Queries a table with an optional condition, one page of rows at a time.
 
     Args:
         table_name: The name of the table to query.
         columns: Comma-separated list of columns to retrieve (e.g., "id, name"). Defaults to "*".
         condition: Optional SQL WHERE clause condition (e.g., "id = 1" or "completed = 0").
+        page_size: Optional maximum number of rows to return in this page
+                   (capped by the server).
+        page_token: Optional 'next_page_token' from a previous call with the same
+                    table, columns and condition. Omit it to fetch the first page.
+        database: Optional name of the database to use (see list_databases).
+                  Omit it for the default database.
     Returns:
-        A list of dictionaries, where each dictionary represents a row.
+        dict: A dictionary with 'rows' (list of row dictionaries), 'row_count',
+              'has_more' and 'next_page_token'. Pass 'next_page_token' back to
+              fetch the next page while 'has_more' is true.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    query = f"SELECT {columns} FROM {table_name}"
-    if condition:
-        query += f" WHERE {condition}"
-    query += ";"
+    db = databases.get(database)
+    page_size = max(1, min(int(page_size or QUERY_DEFAULT_PAGE_SIZE), QUERY_MAX_ROWS))
+    fingerprint = query_fingerprint(db.name, table_name, columns, condition or "")
+    after_rowid = decode_page_token(page_token, fingerprint) if page_token else None
 
-    try:
-        cursor.execute(query)
-        results = [dict(row) for row in cursor.fetchall()]
-    except sqlite3.Error as e:
-        conn.close()
-        raise ValueError(f"Error querying table '{table_name}': {e}")
-    conn.close()
-    return results
+    cache_key = db.result_cache.make_key(
+        "query_db_table",
+        {
+            "table_name": table_name,
+            "columns": columns,
+            "condition": condition,
+            "page_size": page_size,
+            "after_rowid": after_rowid,
+        },
+    )
+    return db.snapshot_read(
+        lambda: _run_query_db_table(
+            db, table_name, columns, condition, page_size, after_rowid, fingerprint
+        ),
+        cache_key,
+        db.referenced_tables(table_name, columns, condition),
+    )
+
+
+def _run_query_db_table(
+    db: Database,
+    table_name: str,
+    columns: str,
+    condition: str,
+    page_size: int,
+    after_rowid: int | None,
+    fingerprint: str,
+) -> dict:
+    known_columns = [c["name"] for c in db.schema_catalog.get_columns(table_name) or []]
+    params = []
+    keyset = (
+        db.schema_catalog.has_rowid(table_name)
+        and plain_column_list(columns, known_columns)
+        and is_bare_predicate(condition or "")
+    )
+    if keyset:
+        # Keyset pagination: walk the table in rowid order and resume after the
+        # last rowid of the previous page, so deep pages cost the same as the first.
+        query = f"SELECT rowid AS {ROWID_ALIAS}, {columns} FROM {table_name}"
+        filters = []
+        if condition:
+            filters.append(f"({condition})")
+        if after_rowid is not None:
+            filters.append("rowid > ?")
+            params.append(after_rowid)
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        query += " ORDER BY rowid LIMIT ?;"
+        params.append(page_size + 1)
+    else:
+        # DISTINCT or computed columns, joins and views, or a condition with its
+        # own ORDER BY / GROUP BY / LIMIT: there is no rowid to resume after,
+        # so page over the query as written with LIMIT/OFFSET. The page token
+        # then holds the offset of the next page.
+        query = f"SELECT {columns} FROM {table_name}"
+        if condition:
+            query += f" WHERE {condition}\n"
+        params.extend([page_size + 1, after_rowid or 0])
+
+    # Cap the page by its encoded size here, before the page token is built;
+    # rows cut off later by the response encoder would be skipped by a client
+    # that follows the token.
+    row_budget = 0
+    if RESPONSE_MAX_BYTES > 0:
+        envelope = {
+            "table_name": table_name,
+            "rows": [],
+            "row_count": page_size,
+            "has_more": True,
+            "next_page_token": encode_page_token(fingerprint, 2**63 - 1),
+        }
+        row_budget = max(1, RESPONSE_MAX_BYTES - len(dumps(envelope).encode("utf-8")))
+
+    with db.read_connection() as conn:
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        try:
+            if not keyset:
+                query = offset_page_query(conn, query, keep_order=has_order_by(condition or ""))
+            cursor.execute(query, params)
+            if keyset:
+                rows, last_rowid, has_more = fetch_page(
+                    cursor, page_size, max_bytes=row_budget
+                )
+            else:
+                rows, _, has_more = fetch_page(
+                    cursor, page_size, key_column=None, max_bytes=row_budget
+                )
+                last_rowid = (after_rowid or 0) + len(rows)
+        except sqlite3.Error as e:
+            raise ValueError(f"Error querying table '{table_name}': {e}")
+        finally:
+            cursor.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        equality_columns, range_columns = columns_in_condition(condition, known_columns)
+        selected_columns = [c.strip() for c in columns.split(",")]
+        auto_index = db.index_advisor.record(
+            conn,
+            table_name,
+            f"{normalize_condition(condition)} | {' '.join(columns.lower().split())}",
+            query,
+            params,
+            elapsed_ms,
+            equality_columns,
+            range_columns,
+            selected_columns=[c for c in selected_columns if c in known_columns],
+        )
+    if auto_index:
+        db.apply_index_recommendation(auto_index)
+
+    return {
+        "table_name": table_name,
+        "rows": rows,
+        "row_count": len(rows),
+        "has_more": has_more,
+        "next_page_token": encode_page_token(fingerprint, last_rowid)
+        if has_more
+        else None,
+    }
+
+
+def query_rows(
+    table_name: str,
+    columns: Optional[list[str]] = None,
+    filters: Optional[list[dict]] = None,
+    order_by: Optional[list[dict]] = None,
+    limit: Optional[int] = None,
+    offset: Optional[int] = None,
+    database: Optional[str] = None,
+) -> dict:
+    """
+    Queries a table using structured, parameterized arguments instead of raw SQL.
+
+    Args:
+        table_name: The name of the table to query.
+        columns: Optional list of column names to return. All columns if omitted.
+        filters: Optional list of predicates combined with AND. Each predicate is an
+                 object {"column": str, "op": str, "value": any}. Supported ops:
+                 "=", "!=", "<", "<=", ">", ">=", "like", "not like",
+                 "in" / "not in" (value is a list), "between" (value is [low, high]),
+                 "is null" / "is not null" (no value).
+        order_by: Optional list of objects {"column": str, "direction": "asc" | "desc"}.
+        limit: Optional maximum number of rows to return (capped by the server).
+        offset: Optional number of matching rows to skip.
+        database: Optional name of the database to use (see list_databases).
+                  Omit it for the default database.
+    Returns:
+        dict: A dictionary with 'rows' (list of row dictionaries), 'row_count'
+              and 'has_more' (true when more rows match beyond 'limit').
+    """
+    db = databases.get(database)
+    known_columns = db.schema_catalog.get_columns(table_name)
+    if not known_columns:
+        raise ValueError(f"Table '{table_name}' not found.")
+    limit = max(1, min(int(limit or QUERY_DEFAULT_PAGE_SIZE), QUERY_MAX_ROWS))
 
+    cache_key = db.result_cache.make_key(
+        "query_rows",
+        {
+            "table_name": table_name,
+            "columns": columns,
+            "filters": filters,
+            "order_by": order_by,
+            "limit": limit,
+            "offset": offset,
+        },
+    )
+    # Ask for one extra row to find out whether there is more to read.
+    query, params = compile_select(
+        table_name,
+        [column["name"] for column in known_columns],
+        columns=columns,
+        filters=filters,
+        order_by=order_by,
+        limit=limit + 1,
+        offset=offset,
+    )
 
-def insert_data(table_name: str, data: dict) -> dict:
+    equality_columns, range_columns = [], []
+    for predicate in filters or []:
+        op = str(predicate.get("op", "=")).strip().lower()
+        if op in ("=", "==", "in", "is null"):
+            equality_columns.append(predicate.get("column"))
+        else:
+            range_columns.append(predicate.get("column"))
+    shape = json.dumps(
+        [columns, equality_columns, range_columns, order_by, bool(offset)],
+        sort_keys=True,
+    )
+
+    def run_query() -> dict:
+        with db.read_connection() as conn:
+            cursor = conn.cursor()
+            started = time.perf_counter()
+            try:
+                cursor.execute(query, params)
+                rows, _, has_more = fetch_page(cursor, limit, key_column=None)
+            except sqlite3.Error as e:
+                raise ValueError(f"Error querying table '{table_name}': {e}")
+            finally:
+                cursor.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            auto_index = db.index_advisor.record(
+                conn,
+                table_name,
+                shape,
+                query,
+                params,
+                elapsed_ms,
+                equality_columns,
+                range_columns,
+                order_columns=[term.get("column") for term in order_by or []],
+                selected_columns=columns or [c["name"] for c in known_columns],
+            )
+        if auto_index:
+            db.apply_index_recommendation(auto_index)
+        return {
+            "table_name": table_name,
+            "rows": rows,
+            "row_count": len(rows),
+            "has_more": has_more,
+        }
+
+    return db.snapshot_read(run_query, cache_key, {table_name})
+
+
+def insert_data(table_name: str, data: dict, database: Optional[str] = None) -> dict:
     """
     Inserts a new row of data into the specified table.
 
@@ -109,6 +873,8 @@ def insert_data(table_name: str, data: dict) -> dict:
         table_name (str): The name of the table to insert data into.
         data (dict): A dictionary where keys are column names and values are the
                      corresponding values for the new row.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
 
     Returns:
         dict: A dictionary with keys 'success' (bool) and 'message' (str).
@@ -117,35 +883,33 @@ def insert_data(table_name: str, data: dict) -> dict:
     if not data:
         return {"success": False, "message": "No data provided for insertion."}
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     columns = ", ".join(data.keys())
     placeholders = ", ".join(["?" for _ in data])
     values = tuple(data.values())
 
     query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
 
-    try:
-        cursor.execute(query, values)
-        conn.commit()
-        last_row_id = cursor.lastrowid
-        return {
-            "success": True,
-            "message": f"Data inserted successfully. Row ID: {last_row_id}",
-            "row_id": last_row_id,
-        }
-    except sqlite3.Error as e:
-        conn.rollback()  # Roll back changes on error
-        return {
-            "success": False,
-            "message": f"Error inserting data into table '{table_name}': {e}",
-        }
-    finally:
-        conn.close()
+    db = databases.get(database)
+    with db.writer() as conn:
+        try:
+            cursor = conn.execute(query, values)
+            conn.commit()
+            db.invalidate_after_write(table_name)
+            last_row_id = cursor.lastrowid
+            return {
+                "success": True,
+                "message": f"Data inserted successfully. Row ID: {last_row_id}",
+                "row_id": last_row_id,
+            }
+        except sqlite3.Error as e:
+            conn.rollback()  # Roll back changes on error
+            return {
+                "success": False,
+                "message": f"Error inserting data into table '{table_name}': {e}",
+            }
 
 
-def delete_data(table_name: str, condition: str) -> dict:
+def delete_data(table_name: str, condition: str, database: Optional[str] = None) -> dict:
     """
     Deletes rows from a table based on a given SQL WHERE clause condition.
 
@@ -153,6 +917,8 @@ def delete_data(table_name: str, condition: str) -> dict:
         table_name (str): The name of the table to delete data from.
         condition (str): The SQL WHERE clause condition to specify which rows to delete.
                          This condition MUST NOT be empty to prevent accidental mass deletion.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
 
     Returns:
         dict: A dictionary with keys 'success' (bool) and 'message' (str).
@@ -164,28 +930,565 @@ def delete_data(table_name: str, condition: str) -> dict:
             "message": "Deletion condition cannot be empty. This is a safety measure to prevent accidental deletion of all rows.",
         }
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     query = f"DELETE FROM {table_name} WHERE {condition}"
 
-    try:
-        cursor.execute(query)
-        rows_deleted = cursor.rowcount
-        conn.commit()
+    db = databases.get(database)
+    with db.writer() as conn:
+        try:
+            cursor = conn.execute(query)
+            rows_deleted = cursor.rowcount
+            conn.commit()
+            db.invalidate_after_write(table_name)
+            return {
+                "success": True,
+                "message": f"{rows_deleted} row(s) deleted successfully from table '{table_name}'.",
+                "rows_deleted": rows_deleted,
+            }
+        except sqlite3.Error as e:
+            conn.rollback()
+            return {
+                "success": False,
+                "message": f"Error deleting data from table '{table_name}': {e}",
+            }
+
+
+def _run_batch_tool(
+    mode: str,
+    table_name: str,
+    rows: list[dict],
+    key_columns: list[str] | None = None,
+    database: str | None = None,
+) -> dict:
+    if not rows:
+        return {"success": False, "message": "No rows provided."}
+    db = databases.get(database)
+    known_columns = db.schema_catalog.get_columns(table_name)
+    if not known_columns:
+        return {"success": False, "message": f"Table '{table_name}' not found."}
+
+    with db.writer() as conn:
+        try:
+            result = run_batch(
+                conn,
+                mode,
+                table_name,
+                rows,
+                [column["name"] for column in known_columns],
+                key_columns=key_columns,
+                chunk_size=BATCH_CHUNK_SIZE,
+            )
+            db.invalidate_after_write(table_name)
+        except (sqlite3.Error, ValueError) as e:
+            return {
+                "success": False,
+                "message": f"Error running {mode}_many on table '{table_name}': {e} No rows were written.",
+            }
+
+    applied = len(rows) - len(result["conflicts"])
+    return {
+        "success": True,
+        "message": f"{applied} of {len(rows)} row(s) applied to table '{table_name}' in one transaction; "
+        f"{len(result['conflicts'])} skipped due to conflicts.",
+        **result,
+    }
+
+
+def insert_many(table_name: str, rows: list[dict], database: Optional[str] = None) -> dict:
+    """
+    Inserts many rows into a table in a single transaction.
+
+    Args:
+        table_name (str): The name of the table to insert data into.
+        rows (list[dict]): Rows to insert; each is a dictionary of column name -> value.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'message', 'rows_affected' and 'conflicts', a list of
+              {'index', 'error'} for rows skipped because they violated a
+              constraint (e.g., a duplicate unique value). Other rows are still inserted.
+    """
+    return _run_batch_tool("insert", table_name, rows, database=database)
+
+
+def update_many(
+    table_name: str, rows: list[dict], key_columns: list[str], database: Optional[str] = None
+) -> dict:
+    """
+    Updates many rows in a table in a single transaction.
+
+    Args:
+        table_name (str): The name of the table to update.
+        rows (list[dict]): One dictionary per row to update. Each must contain the
+                           key columns (to find the row) and the columns to change.
+        key_columns (list[str]): Columns that identify a row, e.g. ["id"].
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'message', 'rows_affected' and 'conflicts', a list of
+              {'index', 'error'} for rows that could not be applied.
+    """
+    return _run_batch_tool("update", table_name, rows, key_columns, database)
+
+
+def upsert_many(
+    table_name: str, rows: list[dict], key_columns: list[str], database: Optional[str] = None
+) -> dict:
+    """
+    Inserts many rows, updating the existing row instead when the key already exists.
+
+    Args:
+        table_name (str): The name of the table to write to.
+        rows (list[dict]): Rows to insert or update; each is a dictionary of column name -> value.
+        key_columns (list[str]): Columns of the primary key or a unique constraint,
+                                 e.g. ["id"] or ["username"], used to detect existing rows.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'message', 'rows_affected' and 'conflicts', a list of
+              {'index', 'error'} for rows that could not be applied.
+    """
+    return _run_batch_tool("upsert", table_name, rows, key_columns, database)
+
+
+def run_transaction(operations: list[dict], database: Optional[str] = None) -> dict:
+    """
+    Runs several insert/update/delete/select operations atomically: all of them or none.
+
+    Use this instead of separate insert_data/delete_data calls when the changes
+    belong together, e.g. moving a todo to another user, or creating a user and
+    their todos.
+
+    Args:
+        operations (list[dict]): The steps, run in order. Each is an object with
+            "op" ("insert", "update", "delete" or "select"), "table_name" and:
+              - insert: "values", an object of column name -> value.
+              - update: "values" and "filters" (required).
+              - delete: "filters" (required).
+              - select: optional "columns", "filters", "order_by" and "limit";
+                it sees the changes of the earlier steps.
+            "filters" are predicates like in query_rows:
+            {"column": str, "op": str, "value": any}, combined with AND.
+            A value of {"$row_id": n} stands for the row ID inserted by step n
+            (counting from 0). An optional "expect_rows" (int) fails the whole
+            transaction unless the step changed (or selected) exactly that many rows.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'message' and 'steps', one result per operation with
+              'rows_affected' (plus 'row_id' for inserts) or, for selects,
+              'rows', 'row_count' and 'has_more'. On failure nothing is written
+              and 'failed_step' gives the index of the step that failed.
+    """
+    if not operations:
+        return {"success": False, "message": "No operations provided."}
+    if len(operations) > TRANSACTION_MAX_OPS:
+        return {
+            "success": False,
+            "message": f"Too many operations ({len(operations)}); at most {TRANSACTION_MAX_OPS} per transaction.",
+        }
+    db = databases.get(database)
+
+    def columns_of(table_name: str) -> list[str]:
+        return [column["name"] for column in db.schema_catalog.get_columns(table_name) or []]
+
+    with db.writer() as conn:
+        try:
+            result = run_operations(conn, operations, columns_of, max_rows=QUERY_MAX_ROWS)
+        except TransactionStepError as e:
+            return {
+                "success": False,
+                "message": f"Transaction rolled back, nothing was written. {e}",
+                "failed_step": e.step,
+            }
+        except sqlite3.Error as e:
+            return {
+                "success": False,
+                "message": f"Transaction rolled back, nothing was written: {e}",
+            }
+    for table_name in result["tables_written"]:
+        db.invalidate_after_write(table_name)
+    return {
+        "success": True,
+        "message": f"{len(operations)} operation(s) committed in one transaction.",
+        "steps": result["steps"],
+    }
+
+
+def changes_since(
+    table_name: str,
+    seq: Optional[int] = None,
+    limit: Optional[int] = None,
+    database: Optional[str] = None,
+) -> dict:
+    """Returns the rows of a table inserted, updated or deleted after a sequence number.
+
+    Use this to watch a table for new or changed rows instead of re-reading it:
+    call it once without `seq` to get the current position, then pass the
+    returned `next_seq` each time to get only what changed in between.
+    Only changes made through this server are seen.
+
+    Args:
+        table_name (str): The name of the table to watch.
+        seq (Optional[int]): The `next_seq` returned by the previous call.
+                             Omit it to start watching from now.
+        limit (Optional[int]): Most changes to return. Defaults to the server's
+                               page size and is capped by its maximum rows.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'changes' (oldest first, each with 'seq', 'op'
+              ('insert', 'update' or 'delete'), 'row_id' and 'row', the row
+              as it is now, or null if it was deleted since), 'next_seq',
+              'has_more' and 'reset'. If 'reset' is true some changes were
+              missed (only the most recent ones are kept, or the server
+              restarted): re-read the table, then continue from 'next_seq'.
+    """
+    db = databases.get(database)
+    if db.change_log is None:
+        return {"success": False, "message": "The change feed is disabled on this server."}
+    if not db.schema_catalog.get_columns(table_name):
+        return {"success": False, "message": f"Table '{table_name}' not found."}
+    if seq is None:
+        latest = db.change_log.latest_seq
+        return {"success": True, "changes": [], "next_seq": latest, "has_more": False, "reset": False}
+    seq = int(seq or 0)
+    limit = max(1, min(int(limit or QUERY_DEFAULT_PAGE_SIZE), QUERY_MAX_ROWS))
+
+    page = db.change_log.since(table_name, seq, limit)
+    live_ids = {row_id for _, op, row_id in page["changes"] if op != "delete"}
+    rows = {}
+    if live_ids:
+        # The primary, not a replica: a snapshot may not have the rows yet.
+        with db.pool.reader() as conn:
+            rows = fetch_rows(conn, table_name, live_ids)
+    result = {
+        "success": True,
+        "changes": [
+            {"seq": change_seq, "op": op, "row_id": row_id, "row": rows.get(row_id)}
+            for change_seq, op, row_id in page["changes"]
+        ],
+        "next_seq": page["next_seq"],
+        "has_more": page["has_more"],
+        "reset": page["reset"],
+    }
+    if page["reset"]:
+        result["message"] = (
+            "Changes after this seq are no longer available. Re-read the table, "
+            "then call changes_since again with next_seq."
+        )
+    return result
+
+
+def search_text(
+    table_name: str, query: str, limit: Optional[int] = None, database: Optional[str] = None
+) -> dict:
+    """
+    Full-text searches a table's indexed text columns, best matches first.
+
+    Use this instead of query_db_table with "LIKE '%word%'" conditions.
+
+    Args:
+        table_name (str): The table to search (e.g., "todos" or "users").
+        query (str): Words to search for. All words must match; end a word with *
+                     for a prefix search (e.g., "groc*").
+        limit (int): Optional maximum number of hits to return.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'hits', a list of {'row', 'score', 'snippet'} ordered by BM25
+              relevance (lower score is a better match), and 'columns', the
+              text columns that were searched.
+    """
+    if table_name not in FTS_COLUMNS:
+        return {
+            "success": False,
+            "message": f"Table '{table_name}' has no full-text index. "
+            f"Indexed tables: {', '.join(FTS_COLUMNS) or 'none'}.",
+        }
+    if not query or not query.strip():
+        return {"success": False, "message": "Search query cannot be empty."}
+    # Only '*' and whitespace: an empty MATCH string is an FTS5 syntax error.
+    if not to_match_query(query):
+        return {"success": False, "message": "query has no searchable words"}
+    limit = max(1, min(int(limit or QUERY_DEFAULT_PAGE_SIZE), QUERY_MAX_ROWS))
+    db = databases.get(database)
+    fts_missing = {
+        "success": False,
+        "message": f"The full-text index of '{table_name}' has not been built in this "
+        f"database yet. Ask the operator to run `python3 local_mcp/create_db.py --prepare "
+        f"{db.path}` (or to start the server with MCP_DB_PREPARE_ON_OPEN=1).",
+    }
+    if not db.fts_ready(table_name):
+        return fts_missing
+
+    def run_search() -> dict:
+        with db.read_connection() as conn:
+            try:
+                hits = search(conn, table_name, query, limit)
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):
+                    raise ValueError(f"Error searching table '{table_name}': {e}")
+                # The index was dropped after the schema catalog was read; the
+                # next call sees that in the catalog and answers fts_missing.
+                db.schema_catalog.invalidate()
+                raise ValueError(fts_missing["message"])
+            except sqlite3.Error as e:
+                raise ValueError(f"Error searching table '{table_name}': {e}")
         return {
             "success": True,
-            "message": f"{rows_deleted} row(s) deleted successfully from table '{table_name}'.",
-            "rows_deleted": rows_deleted,
+            "table_name": table_name,
+            "columns": FTS_COLUMNS[table_name],
+            "hits": hits,
+            "hit_count": len(hits),
         }
-    except sqlite3.Error as e:
-        conn.rollback()
+
+    cache_key = db.result_cache.make_key(
+        "search_text", {"table_name": table_name, "query": query, "limit": limit}
+    )
+    return db.snapshot_read(run_search, cache_key, {table_name, fts_table_name(table_name)})
+
+
+def export_table(
+    table_name: str,
+    columns: str,
+    condition: str,
+    output_format: Optional[str] = None,
+    database: Optional[str] = None,
+) -> dict:
+    """
+    Writes all rows matching a condition to a local file instead of returning them.
+
+    Use this (or summarize_table) when a task needs a whole table or a large
+    part of it; only the file's location and a few sample rows come back.
+
+    Args:
+        table_name (str): The name of the table to export.
+        columns (str): Comma-separated list of columns to export (e.g., "id, task") or "*".
+        condition (str): Optional SQL WHERE clause condition (e.g., "completed = 0").
+        output_format (Optional[str]): 'ndjson' (default, one JSON object per line),
+            'csv', or 'parquet' (columnar; only if pyarrow is installed).
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'success', 'path' of the written file, 'format', 'columns',
+              'row_count', 'bytes' and 'sample_rows' (the first 3 rows).
+    """
+    db = databases.get(database)
+    if not db.schema_catalog.get_columns(table_name):
+        return {"success": False, "message": f"Table '{table_name}' not found."}
+    fmt = (output_format or "ndjson").lower()
+    if fmt not in available_formats():
         return {
             "success": False,
-            "message": f"Error deleting data from table '{table_name}': {e}",
+            "message": f"Unsupported format '{fmt}'. Available: {', '.join(available_formats())}.",
         }
-    finally:
-        conn.close()
+    query = f"SELECT {columns or '*'} FROM {quote_identifier(table_name)}"
+    if condition:
+        query += f" WHERE ({condition})"
+    prefix = table_name if db.name == databases.default_name else f"{db.name}-{table_name}"
+    path = os.path.join(
+        EXPORT_DIR,
+        f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}.{fmt}",
+    )
+
+    def run_export() -> dict:
+        started = time.perf_counter()
+        with db.read_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                exported = export_rows(cursor, path, fmt, batch_size=EXPORT_BATCH_SIZE)
+            except sqlite3.Error as e:
+                raise ValueError(f"Error exporting table '{table_name}': {e}")
+            finally:
+                cursor.close()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"MCP Server: Exported {exported['row_count']} rows of '{table_name}' "
+            f"to {exported['path']} ({exported['bytes']} bytes) in {elapsed_ms} ms."
+        )
+        return {"success": True, "table_name": table_name, **exported, "elapsed_ms": elapsed_ms}
+
+    return db.snapshot_read(run_export)
+
+
+def summarize_table(
+    table_name: str,
+    columns: Optional[list[str]] = None,
+    condition: Optional[str] = None,
+    histogram_bins: Optional[int] = None,
+    database: Optional[str] = None,
+) -> dict:
+    """
+    Summarizes a table's columns with aggregates computed inside the database.
+
+    Prefer this over reading all rows when asked about totals, distributions,
+    ranges or the most common values of a table.
+
+    Args:
+        table_name (str): The name of the table to summarize.
+        columns (Optional[list[str]]): Columns to summarize; all columns if omitted.
+        condition (Optional[str]): Optional SQL WHERE clause limiting the rows summarized.
+        histogram_bins (Optional[int]): Bins in the histogram of numeric columns (default 10).
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+
+    Returns:
+        dict: 'row_count' and 'columns', per column 'non_null', 'distinct', 'min',
+              'max', plus 'avg' and 'histogram' for numeric columns or
+              'top_values' ({'value', 'count'}) for the others.
+    """
+    db = databases.get(database)
+    known_columns = [c["name"] for c in db.schema_catalog.get_columns(table_name) or []]
+    if not known_columns:
+        return {"success": False, "message": f"Table '{table_name}' not found."}
+    columns = columns or known_columns
+    unknown = [c for c in columns if c not in known_columns]
+    if unknown:
+        return {
+            "success": False,
+            "message": f"Unknown column(s) {', '.join(unknown)} in table '{table_name}'.",
+        }
+    bins = max(1, min(int(histogram_bins or 10), 100))
+
+    def run_summary() -> dict:
+        with db.read_connection() as conn:
+            try:
+                summary = summarize_columns(conn, table_name, columns, condition or "", bins)
+            except sqlite3.Error as e:
+                raise ValueError(f"Error summarizing table '{table_name}': {e}")
+        return {"success": True, "table_name": table_name, **summary}
+
+    cache_key = db.result_cache.make_key(
+        "summarize_table",
+        {"table_name": table_name, "columns": columns, "condition": condition, "bins": bins},
+    )
+    return db.snapshot_read(run_summary, cache_key, db.referenced_tables(table_name, condition))
+
+
+def index_recommendations(dummy_param: str, database: Optional[str] = None) -> dict:
+    """Lists slow query shapes and the indexes that would speed them up.
+
+    Args:
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+    Returns:
+        dict: 'recommendations' (CREATE INDEX statements for shapes whose query plan
+              scans a whole table), 'auto_created_indexes' and 'query_shapes'
+              (call counts, latency and query plans of the busiest query shapes).
+    """
+    db = databases.get(database)
+    shapes = db.index_advisor.report()
+    recommendations = []
+    for stats in shapes:
+        recommendation = stats["recommendation"]
+        if recommendation and recommendation not in recommendations:
+            recommendations.append(
+                {
+                    **recommendation,
+                    "calls": stats["calls"],
+                    "avg_ms": stats["avg_ms"],
+                    "auto_created": stats["auto_created"],
+                }
+            )
+    return {
+        "success": True,
+        "slow_query_ms": db.index_advisor.slow_query_ms,
+        "auto_create": db.index_advisor.auto_create,
+        "recommendations": recommendations,
+        "auto_created_indexes": db.index_advisor.created_indexes,
+        "query_shapes": shapes[:20],
+    }
+
+
+def get_table_statistics(
+    table_name: str, refresh: bool, database: Optional[str] = None
+) -> dict:
+    """Shows a table's indexes and the ANALYZE statistics the query planner uses.
+
+    Args:
+        table_name (str): The table to inspect.
+        refresh (bool): If true, run ANALYZE on the table first so the statistics
+                        reflect the current data.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+    Returns:
+        dict: 'indexes' and 'analyze_stats' (rows of sqlite_stat1: for each index,
+              the row count followed by the average rows per distinct key prefix).
+    """
+    db = databases.get(database)
+    if not db.schema_catalog.get_columns(table_name):
+        return {"success": False, "message": f"Table '{table_name}' not found."}
+    if refresh:
+        with db.pool.writer() as conn:
+            conn.execute(f"ANALYZE {quote_identifier(table_name)}")
+            conn.commit()
+        db.index_advisor.forget_table(table_name)
+    with db.pool.reader() as conn:
+        return {"success": True, **table_statistics(conn, table_name)}
+
+
+def server_metrics(output_format: Optional[str] = None) -> dict:
+    """Reports per-tool latency percentiles, row counts and response sizes.
+
+    Latency is split into phases: queue_wait (waiting for a worker),
+    execute (running the tool, mostly SQL), serialize (encoding the result),
+    transport (handing the response to the client connection; stdio and SSE
+    only) and total.
+
+    Args:
+        output_format (Optional[str]): 'json' (default) for a summary with
+            p50/p95/p99 per phase, or 'prometheus' for the raw histograms in
+            the Prometheus text format.
+    Returns:
+        dict: 'success' and either 'metrics' (plus 'tool_executor' counters
+              and the pool, cache and replica stats of every open database)
+              or 'prometheus' with the text dump.
+    """
+    if output_format and output_format.lower() == "prometheus":
+        return {"success": True, "prometheus": tool_metrics.prometheus_text()}
+    if output_format and output_format.lower() != "json":
+        return {"success": False, "message": "output_format must be 'json' or 'prometheus'."}
+    return {
+        "success": True,
+        "metrics": tool_metrics.snapshot(),
+        "tool_executor": tool_executor.stats(),
+        "databases": database_stats(),
+        "startup": startup_report(),
+    }
+
+
+def cache_stats(dummy_param: str, database: Optional[str] = None) -> dict:
+    """Reports hit/miss counters and size of the query result cache.
+
+    Args:
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+        database (Optional[str]): Name of the database to use (see list_databases).
+                                  Omit it for the default database.
+    Returns:
+        dict: 'success' and 'cache' with entries, bytes, hits, misses,
+              hit_rate, evictions and invalidations.
+    """
+    return {"success": True, "cache": databases.get(database).result_cache.stats()}
+
+
+def database_stats() -> dict:
+    """Registry counters plus the pool, cache, replica and change log stats of every open database."""
+    return {
+        **databases.stats(),
+        "open_databases": {name: db.stats() for name, db in databases.opened().items()},
+        "change_subscriptions": change_subscriptions.stats(),
+    }
 
 
 # --- MCP Server Setup ---
@@ -194,116 +1497,555 @@ logger.info(
 )  # Changed print to logger.info
 app = Server("sqlite-db-mcp-server")
 
-# Wrap database utility functions as ADK FunctionTools
-ADK_DB_TOOLS = {
-    "list_db_tables": FunctionTool(func=list_db_tables),
-    "get_table_schema": FunctionTool(func=get_table_schema),
-    "query_db_table": FunctionTool(func=query_db_table),
-    "insert_data": FunctionTool(func=insert_data),
-    "delete_data": FunctionTool(func=delete_data),
+# Per-tool latency histograms, row counts and response sizes (see metrics.py)
+tool_metrics = ToolMetrics()
+
+
+def record_executor_timing(queue_wait: float, run: float) -> None:
+    """ToolExecutor timing hook: files the times under the current tool call."""
+    timings = call_timings.get()
+    if timings is not None:
+        timings["queue_wait"] = queue_wait * 1000
+        timings["execute"] = run * 1000
+
+
+def run_tool_call(func, kwargs: dict, cancelled):
+    """ToolExecutor call wrapper: keeps the databases a call uses open until it returns."""
+    with databases.scope():
+        return run_with_deadline(func, kwargs, cancelled, timeout=QUERY_TIMEOUT)
+
+
+# The database functions are blocking sqlite3 code, so they run on a bounded
+# worker pool instead of the event loop that serves MCP requests.
+# Every call gets a SQL deadline and is interrupted if the client cancels it
+# (see query_guard.py).
+tool_executor = ToolExecutor(
+    max_workers=TOOL_WORKERS,
+    max_concurrency=TOOL_MAX_CONCURRENCY,
+    max_queue=TOOL_MAX_QUEUE,
+    call_wrapper=run_tool_call,
+    timing_hook=record_executor_timing,
+)
+
+# Database utility functions exposed as tools, wrapped to run on the executor
+DB_TOOL_FUNCTIONS = {
+    func.__name__: tool_executor.wrap(func)
+    for func in (
+        list_databases,
+        list_db_tables,
+        get_table_schema,
+        query_db_table,
+        query_rows,
+        insert_data,
+        insert_many,
+        update_many,
+        upsert_many,
+        delete_data,
+        run_transaction,
+        changes_since,
+        search_text,
+        export_table,
+        summarize_table,
+        cache_stats,
+        server_metrics,
+        index_recommendations,
+        get_table_statistics,
+    )
 }
+# Called like ADK FunctionTools, without importing ADK (see tool_registry.py)
+DB_TOOLS = {name: LocalTool(func, name) for name, func in DB_TOOL_FUNCTIONS.items()}
+
+# Tool schemas are loaded once (precomputed, or generated with ADK when the
+# file is stale) and served from memory (see tool_catalog.py)
+_catalog_started = time.perf_counter()
+tool_catalog = ToolCatalog.load(
+    DB_TOOL_FUNCTIONS, tools_fingerprint(DB_TOOL_FUNCTIONS), TOOL_SCHEMA_FILE
+)
+TOOL_CATALOG_MS = (time.perf_counter() - _catalog_started) * 1000
 
 
-@app.list_tools()
-async def list_mcp_tools() -> list[mcp_types.Tool]:
+async def list_mcp_tools(_request: mcp_types.ListToolsRequest) -> mcp_types.ServerResult:
     """MCP handler to list tools this server exposes."""
-    logger.info(
-        "MCP Server: Received list_tools request."
-    )  # Changed print to logger.info
-    mcp_tools_list = []
-    for tool_name, adk_tool_instance in ADK_DB_TOOLS.items():
-        if not adk_tool_instance.name:
-            adk_tool_instance.name = tool_name
-
-        mcp_tool_schema = adk_to_mcp_tool_type(adk_tool_instance)
-        logger.info(  # Changed print to logger.info
-            f"MCP Server: Advertising tool: {mcp_tool_schema.name}, InputSchema: {mcp_tool_schema.inputSchema}"
-        )
-        mcp_tools_list.append(mcp_tool_schema)
-    return mcp_tools_list
+    logger.debug("MCP Server: Received list_tools request.")
+    return tool_catalog.list_tools_result
+
+
+# Registered directly instead of through @app.list_tools() so the prebuilt
+# result, including its schema hash in _meta, is returned as is.
+app.request_handlers[mcp_types.ListToolsRequest] = list_mcp_tools
 
 
 @app.call_tool()
 async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.TextContent]:
     """MCP handler to execute a tool call requested by an MCP client."""
-    logger.info(
-        f"MCP Server: Received call_tool request for '{name}' with args: {arguments}"
-    )  # Changed print to logger.info
+    return await _call_tool(name, arguments, name)
 
-    if name in ADK_DB_TOOLS:
-        adk_tool_instance = ADK_DB_TOOLS[name]
+
+async def _call_tool(
+    name: str, arguments: dict, metric_name: str
+) -> list[mcp_types.TextContent]:
+    """Runs a tool; its metrics are recorded under ``metric_name``."""
+    # Payload previews are built only if a DEBUG sink is active (lazy=True).
+    sampled = log_sampler.should_log(name)
+    if sampled:
+        logger.opt(lazy=True).debug(
+            "MCP Server: Received call_tool request for '{}' with args: {}",
+            lambda: name,
+            lambda: preview(arguments, LOG_PREVIEW_BYTES),
+        )
+
+    if name in DB_TOOLS:
+        adk_tool_instance = DB_TOOLS[name]
+        timings = {}
+        call_timings.set(timings)
+        started = time.perf_counter()
         try:
             adk_tool_response = await adk_tool_instance.run_async(
                 args=arguments,
                 tool_context=None,  # type: ignore
             )
-            logger.info(  # Changed print to logger.info
-                f"MCP Server: ADK tool '{name}' executed. Response: {adk_tool_response}"
+            encode_started = time.perf_counter()
+            response_text = encode_response(
+                adk_tool_response,
+                columnar=RESPONSE_COLUMNAR,
+                max_bytes=RESPONSE_MAX_BYTES,
             )
-            response_text = json.dumps(adk_tool_response, indent=2)
+            finished = time.perf_counter()
+            timings["serialize"] = (finished - encode_started) * 1000
+            timings["total"] = (finished - started) * 1000
+            record_tool_call(metric_name, timings, adk_tool_response, len(response_text))
+            if sampled:
+                logger.info(
+                    "MCP Server: ADK tool '{}' executed in {:.1f} ms ({} bytes).",
+                    name,
+                    timings["total"],
+                    len(response_text),
+                )
+                logger.opt(lazy=True).debug(
+                    "MCP Server: ADK tool '{}' response: {}",
+                    lambda: name,
+                    lambda: preview(adk_tool_response, LOG_PREVIEW_BYTES),
+                )
             return [mcp_types.TextContent(type="text", text=response_text)]
 
         except Exception as e:
-            logger.error(
-                f"MCP Server: Error executing ADK tool '{name}': {e}", exc_info=True
-            )  # Changed print to logger.error, added exc_info
+            logger.opt(exception=e).error(
+                "MCP Server: Error executing ADK tool '{}': {}", name, e
+            )
             error_payload = {
                 "success": False,
                 "message": f"Failed to execute tool '{name}': {str(e)}",
             }
-            error_text = json.dumps(error_payload)
+            error_text = dumps(error_payload)
+            timings["total"] = (time.perf_counter() - started) * 1000
+            record_tool_call(metric_name, timings, error_payload, len(error_text))
             return [mcp_types.TextContent(type="text", text=error_text)]
     else:
         logger.warning(
-            f"MCP Server: Tool '{name}' not found/exposed by this server."
+            "MCP Server: Tool '{}' not found/exposed by this server.", name
         )  # Changed print to logger.warning
         error_payload = {
             "success": False,
             "message": f"Tool '{name}' not implemented by this server.",
         }
-        error_text = json.dumps(error_payload)
+        error_text = dumps(error_payload)
         return [mcp_types.TextContent(type="text", text=error_text)]
 
 
+# --- Change Feed Subscriptions ---
+# A client that subscribes to changes://<database>/<table> gets a
+# notifications/resources/updated whenever rows of that table change, and
+# then fetches the changes with changes_since.
+CHANGES_URI_TEMPLATE = f"{CHANGES_URI_SCHEME}://{{database}}/{{table}}"
+
+
+def _check_change_feed(database_name: str, table_name: str) -> str:
+    """Returns the canonical changes:// URI, or raises ValueError if there is no such feed."""
+    db = databases.get(database_name)
+    if db.change_log is None:
+        raise ValueError("The change feed is disabled on this server.")
+    if not db.schema_catalog.get_columns(table_name):
+        raise ValueError(f"Table '{table_name}' not found in database '{db.name}'.")
+    return changes_uri(db.name, table_name)
+
+
+@app.list_resources()
+async def list_mcp_resources() -> list[mcp_types.Resource]:
+    """MCP handler: the change feeds are offered through a resource template only."""
+    return []
+
+
+@app.list_resource_templates()
+async def list_mcp_resource_templates() -> list[mcp_types.ResourceTemplate]:
+    return [
+        mcp_types.ResourceTemplate(
+            uriTemplate=CHANGES_URI_TEMPLATE,
+            name="table_changes",
+            description="Row changes of a table. Subscribe to be notified of new changes, "
+            "then call changes_since to fetch them.",
+            mimeType="application/json",
+        )
+    ]
+
+
+@app.read_resource()
+async def read_mcp_resource(uri) -> list[ReadResourceContents]:
+    """MCP handler: reading a change feed returns its current position (use with changes_since)."""
+    database_name, table_name = parse_changes_uri(str(uri))
+    # Served like a changes_since tool call: same executor limits and queue,
+    # deadline and logging. Metrics keep it apart from the tool's own calls.
+    content = await _call_tool(
+        "changes_since",
+        {"table_name": table_name, "database": database_name},
+        f"resource:{CHANGES_URI_SCHEME}",
+    )
+    return [ReadResourceContents(content=content[0].text, mime_type="application/json")]
+
+
+@app.subscribe_resource()
+async def subscribe_mcp_resource(uri) -> None:
+    database_name, table_name = parse_changes_uri(str(uri))
+    canonical = await tool_executor.run(
+        _check_change_feed, database_name=database_name, table_name=table_name
+    )
+    change_subscriptions.subscribe(canonical, app.request_context.session)
+    logger.info(f"MCP Server: Client subscribed to {canonical}.")
+
+
+@app.unsubscribe_resource()
+async def unsubscribe_mcp_resource(uri) -> None:
+    database_name, table_name = parse_changes_uri(str(uri))
+    change_subscriptions.unsubscribe(changes_uri(database_name, table_name), app.request_context.session)
+
+
+def record_tool_call(name: str, timings: dict, result, response_bytes: int) -> None:
+    """Records a finished tool call and starts timing its transport write."""
+    error = isinstance(result, dict) and result.get("success") is False
+    tool_metrics.record_call(
+        name, timings, result_row_count(result), response_bytes, error
+    )
+    write_stream = active_write_stream.get()
+    if write_stream is not None:
+        write_stream.expect(app.request_context.request_id, name)
+
+
+def serve_session(read_stream, write_stream):
+    """``app.run`` for one client connection, with its response writes timed."""
+    timed_stream = TimedWriteStream(write_stream, tool_metrics, max_age=QUERY_TIMEOUT or 60.0)
+    # Request handlers run in tasks spawned by app.run and inherit this value.
+    active_write_stream.set(timed_stream)
+    return app.run(read_stream, timed_stream, initialization_options())
+
+
+# --- Background Maintenance ---
+def _run_db_maintenance() -> None:
+    for name, db in databases.opened().items():
+        try:
+            db.maintain()
+        except Exception as e:
+            logger.warning(f"MCP Server: Maintenance of database '{name}' failed: {e}")
+
+
+async def db_maintenance_loop(interval: float):
+    """Periodically checkpoints the WAL and runs PRAGMA optimize on every open database."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_run_db_maintenance)
+        except Exception as e:
+            logger.warning(f"MCP Server: Database maintenance failed: {e}")
+
+
+def process_rss_bytes() -> int:
+    """Current resident memory of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_uptime_seconds() -> float | None:
+    """Seconds since this process started, interpreter start-up included (Linux only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def startup_report() -> dict:
+    """Where the time before the MCP handshake went, against MCP_STARTUP_BUDGET_MS."""
+    uptime = process_uptime_seconds()
+    return {
+        "ready_after_ms": round(uptime * 1000) if uptime is not None else None,
+        "budget_ms": STARTUP_BUDGET_MS,
+        "tool_catalog_source": tool_catalog.source,
+        "tool_catalog_ms": round(TOOL_CATALOG_MS, 1),
+        "adk_imported": "google.adk" in sys.modules,
+        "modules_loaded": len(sys.modules),
+    }
+
+
+def log_startup_report() -> None:
+    report = startup_report()
+    message = f"MCP Server: Startup report: {report}"
+    if report["ready_after_ms"] is not None and report["ready_after_ms"] > STARTUP_BUDGET_MS:
+        logger.warning(
+            f"{message}. Over the startup budget; run with `python -X importtime` to see "
+            "which imports are slow."
+        )
+    else:
+        logger.info(message)
+
+
+def log_db_profile(db: Database):
+    """Reports the active PRAGMA profile and the values SQLite actually applied."""
+    with db.pool.writer() as conn:
+        effective = describe_connection(conn)
+    logger.info(
+        f"MCP Server: Database profile '{DB_PROFILE_NAME}' active for {db.path}: {effective}"
+    )
+    wanted = DB_PROFILE["journal_mode"]
+    if wanted and effective["journal_mode"].lower() != wanted.lower():
+        logger.info(
+            f"MCP Server: {db.path} uses journal_mode={effective['journal_mode']}, not "
+            f"{wanted}; run `create_db.py --prepare {db.path}` or set MCP_DB_PREPARE_ON_OPEN=1."
+        )
+
+
 # --- MCP Server Runner ---
+def start_server_services() -> asyncio.Task | None:
+    """Warms up the shared state and starts background maintenance.
+
+    Returns:
+        The maintenance task (or None), to be handed to ``stop_server_services``.
+    """
+    default_db = databases.get()
+    log_db_profile(default_db)
+    logger.info(f"MCP Server: Connection pool ready: {default_db.pool.stats()}")
+    logger.info(
+        f"MCP Server: Serving {len(databases.names())} database(s), "
+        f"at most {databases.max_open} open at a time."
+    )
+    logger.info(f"MCP Server: Tool executor ready: {tool_executor.stats()}")
+    logger.info(
+        f"MCP Server: Responses encoded with {json_backend()} "
+        f"(columnar={RESPONSE_COLUMNAR}, max_bytes={RESPONSE_MAX_BYTES or 'unlimited'})."
+    )
+    log_startup_report()
+    if DB_PROFILE["checkpoint_interval"]:
+        return asyncio.create_task(
+            db_maintenance_loop(DB_PROFILE["checkpoint_interval"])
+        )
+    return None
+
+
+def stop_server_services(maintenance_task: asyncio.Task | None):
+    """Waits for running tools, then checkpoints and closes every open database."""
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+    tool_executor.shutdown()
+    databases.close()
+
+
+def initialization_options() -> InitializationOptions:
+    capabilities = app.get_capabilities(
+        notification_options=NotificationOptions(),
+        experimental_capabilities={},
+    )
+    # The low-level server never advertises subscriptions; the change feeds support them.
+    capabilities.resources.subscribe = True
+    return InitializationOptions(
+        server_name=app.name,
+        server_version="0.1.0",
+        capabilities=capabilities,
+    )
+
+
 async def run_mcp_stdio_server():
     """Runs the MCP server, listening for connections over standard input/output."""
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        logger.info(
-            "MCP Stdio Server: Starting handshake with client..."
-        )  # Changed print to logger.info
-        await app.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name=app.name,
-                server_version="0.1.0",
-                capabilities=app.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
+    maintenance_task = start_server_services()
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            logger.info(
+                "MCP Stdio Server: Starting handshake with client..."
+            )  # Changed print to logger.info
+            await serve_session(read_stream, write_stream)
+            logger.info(
+                "MCP Stdio Server: Run loop finished or client disconnected."
+            )  # Changed print to logger.info
+    finally:
+        stop_server_services(maintenance_task)
+
+
+def create_http_app():
+    """Builds the Starlette app that serves ``app`` to many clients over HTTP.
+
+    Routes:
+        /mcp       Streamable HTTP transport. Each client gets its own session
+                   (``mcp-session-id`` header) on the shared server state.
+        /sse       Legacy SSE transport (one session per open stream), with
+                   client messages posted to /messages/.
+        /health    Liveness probe with session, pool and executor statistics.
+        /drain     POST: report "draining" from now on, so pool clients move
+                   to another server before this one is recycled.
+        /metrics   Per-tool latency histograms in the Prometheus text format.
+    """
+    from mcp.server.sse import SseServerTransport
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, PlainTextResponse, Response
+    from starlette.routing import Mount, Route
+
+    session_manager = StreamableHTTPSessionManager(app=app)
+    sse_transport = SseServerTransport("/messages/")
+    clients = {"http_requests": 0, "sse_streams": 0}
+    draining = False
+
+    async def handle_streamable_http(scope, receive, send):
+        clients["http_requests"] += 1
+        try:
+            await session_manager.handle_request(scope, receive, send)
+        finally:
+            clients["http_requests"] -= 1
+
+    async def handle_sse(request):
+        clients["sse_streams"] += 1
+        logger.info(f"MCP HTTP Server: SSE client connected from {request.client}.")
+        try:
+            async with sse_transport.connect_sse(
+                request.scope, request.receive, request._send
+            ) as (read_stream, write_stream):
+                await serve_session(read_stream, write_stream)
+        finally:
+            clients["sse_streams"] -= 1
+            logger.info(f"MCP HTTP Server: SSE client {request.client} disconnected.")
+        return Response()
+
+    async def health(request):
+        return JSONResponse(
+            {
+                "status": "draining" if draining else "ok",
+                "pid": os.getpid(),
+                "clients": dict(clients),
+                "rss_bytes": process_rss_bytes(),
+                "tool_schema_hash": tool_catalog.schema_hash,
+                "databases": database_stats(),
+                "tool_executor": tool_executor.stats(),
+                "startup": startup_report(),
+            }
         )
-        logger.info(
-            "MCP Stdio Server: Run loop finished or client disconnected."
-        )  # Changed print to logger.info
+
+    async def drain(request):
+        nonlocal draining
+        draining = True
+        logger.info("MCP HTTP Server: Draining, clients are asked to reconnect elsewhere.")
+        return await health(request)
+
+    async def metrics(request):
+        return PlainTextResponse(
+            tool_metrics.prometheus_text(),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(starlette_app):
+        maintenance_task = start_server_services()
+        try:
+            async with session_manager.run():
+                logger.info("MCP HTTP Server: Accepting client sessions.")
+                yield
+        finally:
+            logger.info("MCP HTTP Server: Sessions closed, releasing resources.")
+            stop_server_services(maintenance_task)
+
+    return Starlette(
+        routes=[
+            Mount("/mcp", app=handle_streamable_http),
+            Route("/sse", endpoint=handle_sse),
+            Mount("/messages/", app=sse_transport.handle_post_message),
+            Route("/health", endpoint=health),
+            Route("/drain", endpoint=drain, methods=["POST"]),
+            Route("/metrics", endpoint=metrics),
+        ],
+        lifespan=lifespan,
+    )
+
+
+async def run_mcp_http_server(host: str, port: int):
+    """Runs one shared MCP server that many agent processes can connect to.
+
+    On SIGINT/SIGTERM uvicorn stops accepting connections and gives in-flight
+    requests up to ``MCP_HTTP_DRAIN_TIMEOUT`` seconds to finish before the
+    sessions are closed and the database pool is released.
+    """
+    import uvicorn
+
+    config = uvicorn.Config(
+        create_http_app(),
+        host=host,
+        port=port,
+        timeout_keep_alive=HTTP_KEEP_ALIVE,
+        timeout_graceful_shutdown=HTTP_DRAIN_TIMEOUT,
+        log_level="warning",
+    )
+    logger.info(
+        f"MCP HTTP Server: Listening on http://{host}:{port}/mcp (streamable HTTP) "
+        f"and http://{host}:{port}/sse (SSE)."
+    )
+    await uvicorn.Server(config).serve()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SQLite DB MCP Server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=HTTP_HOST)
+    parser.add_argument("--port", type=int, default=HTTP_PORT)
+    parser.add_argument(
+        "--rebuild-tool-schemas",
+        action="store_true",
+        help="Regenerate MCP_TOOL_SCHEMA_FILE with ADK and exit.",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.rebuild_tool_schemas:
+        write_schema_file(
+            TOOL_SCHEMA_FILE,
+            tools_fingerprint(DB_TOOL_FUNCTIONS),
+            convert_with_adk(DB_TOOL_FUNCTIONS),
+        )
+        sys.exit(0)
     logger.info(
-        "Launching SQLite DB MCP Server via stdio..."
+        f"Launching SQLite DB MCP Server via {args.transport}..."
     )  # Changed print to logger.info
     try:
-        asyncio.run(run_mcp_stdio_server())
+        if args.transport == "http":
+            asyncio.run(run_mcp_http_server(args.host, args.port))
+        else:
+            asyncio.run(run_mcp_stdio_server())
     except KeyboardInterrupt:
         logger.info(
-            "\nMCP Server (stdio) stopped by user."
+            f"\nMCP Server ({args.transport}) stopped by user."
         )  # Changed print to logger.info
     except Exception as e:
         logger.critical(
-            f"MCP Server (stdio) encountered an unhandled error: {e}", exc_info=True
+            f"MCP Server ({args.transport}) encountered an unhandled error: {e}", exc_info=True
         )  # Changed print to logger.critical, added exc_info
     finally:
         logger.info(
-            "MCP Server (stdio) process exiting."
-        )  # Changed print to logger.info
\ No newline at end of file
+            f"MCP Server ({args.transport}) process exiting."
+        )  # Changed print to logger.info
@@ -0,0 +1,586 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SERVER_SCRIPT = str((Path(__file__).parent / "server.py").resolve())
+# Seconds a client process reuses a server's /health answer (SharedServerPool).
+HEALTH_TTL = 2.0
+
+
+def server_load(health: dict) -> int:
+    """Open HTTP requests and SSE streams of a server, from its /health answer.
+
+    A streamable HTTP session keeps a GET stream open besides its in-flight
+    calls, so this counts connected clients as well as running tool calls.
+    """
+    clients = health.get("clients", {})
+    return clients.get("http_requests", 0) + clients.get("sse_streams", 0)
+
+
+def fetch_health(host: str, port: int, timeout: float = 2.0) -> dict | None:
+    try:
+        with urllib.request.urlopen(
+            f"http://{host}:{port}/health", timeout=timeout
+        ) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def port_in_use(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def claim_pool_lock(host: str, base_port: int):
+    """Takes the host-wide lock of the pool on ``base_port``.
+
+    Only the process holding it runs a ServerSupervisor for that pool, so two
+    agent processes never spawn servers on the same ports.
+
+    Returns:
+        The open lock file, to keep open while supervising, or None if another
+        process holds the lock.
+    """
+    path = os.path.join(tempfile.gettempdir(), f"mcp-server-pool-{host}-{base_port}.lock")
+    lock_file = open(path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class _ServerSlot:
+    """One server process bound to a fixed port.
+
+    The port never changes, but the process behind it is replaced on restart
+    and recycle, which ends the sessions connected to it. A recycle drains
+    the slot first (see ``ServerSupervisor._drain``) so clients can move.
+    """
+
+    def __init__(self, port: int):
+        self.port = port
+        self.process: subprocess.Popen | None = None
+        self.ready = False
+        self.started_at = 0.0
+        self.restarts = 0
+        self.crashes = 0
+        self.recycles = 0
+        self.failed_checks = 0
+        self.last_health: dict = {}
+
+
+class ServerSupervisor:
+    """Keeps a pool of warm MCP server processes (HTTP transport) ready.
+
+    Each process is started with ``server.py --transport http`` on its own
+    port and is considered ready once its ``/health`` endpoint answers, so the
+    import and database warm-up cost is paid before the first tool call.
+    A monitor thread then:
+
+    - restarts processes that exited unexpectedly,
+    - recycles a process once it has served ``max_requests`` tool calls or its
+      RSS exceeds ``max_rss_mb``. Recycling first drains the slot: the
+      server is told to report ``draining`` on ``/health``, so no new
+      session is sent to it and ``PooledMCPToolset`` sessions reconnect to
+      another server on their next call; the supervisor then waits for the
+      running tool calls to finish before sending SIGTERM. Only one slot
+      recycles at a time while others are ready.
+
+    Only one supervisor per host may run a pool on a given ``base_port``; it
+    holds a lock file while running (see ``claim_pool_lock``). Health answers
+    are only trusted if they come from the process this supervisor spawned.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        host: str = "127.0.0.1",
+        base_port: int = 8765,
+        max_requests: int = 0,
+        max_rss_mb: float = 0.0,
+        check_interval: float = 2.0,
+        startup_timeout: float = 60.0,
+        drain_timeout: float = 30.0,
+        server_script: str = SERVER_SCRIPT,
+        env: dict | None = None,
+    ):
+        """
+        Args:
+            size: Number of server processes to keep running.
+            host: Address the servers bind to.
+            base_port: Port of the first server; the others use the next ports.
+            max_requests: Tool calls after which a process is recycled (0 = never).
+            max_rss_mb: Resident memory after which a process is recycled (0 = never).
+            check_interval: Seconds between health checks.
+            startup_timeout: Seconds a new process gets to become healthy.
+            drain_timeout: Seconds a recycled process gets to finish its tool
+                           calls before it is stopped anyway.
+            server_script: Path to ``server.py``.
+            env: Extra environment variables for the server processes.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+        self.host = host
+        self.max_requests = max_requests
+        self.max_rss_mb = max_rss_mb
+        self.check_interval = check_interval
+        self.startup_timeout = startup_timeout
+        self.drain_timeout = drain_timeout
+        self.server_script = server_script
+        self.env = dict(env or {})
+        self.base_port = base_port
+        self._slots = [_ServerSlot(base_port + i) for i in range(size)]
+        # Guards spawning processes against stop(). Only held for short
+        # steps: draining and stopping a recycled process happen outside it.
+        self._lock = threading.Lock()
+        self._pool_lock = None
+        self._stop = threading.Event()
+        self._monitor: threading.Thread | None = None
+
+    # --- Process lifecycle ---
+    def url(self, slot: _ServerSlot, path: str = "/mcp") -> str:
+        return f"http://{self.host}:{slot.port}{path}"
+
+    def _spawn(self, slot: _ServerSlot) -> None:
+        command = [
+            sys.executable,
+            self.server_script,
+            "--transport",
+            "http",
+            "--host",
+            self.host,
+            "--port",
+            str(slot.port),
+        ]
+        slot.process = subprocess.Popen(
+            command,
+            env={**os.environ, **self.env},
+            stdin=subprocess.DEVNULL,
+            # Own process group: Ctrl+C on the supervisor must not reach the
+            # servers directly, stop() drains them one by one instead.
+            start_new_session=True,
+        )
+        slot.ready = False
+        slot.failed_checks = 0
+        slot.started_at = time.monotonic()
+        logger.info(
+            f"ServerSupervisor: started server pid={slot.process.pid} on port {slot.port}."
+        )
+
+    def _health(self, slot: _ServerSlot) -> dict | None:
+        health = fetch_health(self.host, slot.port)
+        if health is None or slot.process is None:
+            return None
+        if health.get("pid") != slot.process.pid:
+            # Another process answers on our port, e.g. a server left over from
+            # a supervisor that was killed; ours could not bind the port.
+            logger.warning(
+                f"ServerSupervisor: port {slot.port} is served by pid={health.get('pid')}, "
+                f"not by our server pid={slot.process.pid}."
+            )
+            return None
+        return health
+
+    def _stop_process(self, slot: _ServerSlot, timeout: float = 30.0) -> None:
+        process = slot.process
+        slot.ready = False
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()  # SIGTERM: the server drains in-flight requests
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning(
+                f"ServerSupervisor: pid={process.pid} did not drain in {timeout}s, killing it."
+            )
+            process.kill()
+            process.wait()
+
+    def _drain(self, slot: _ServerSlot) -> None:
+        """Stops handing out ``slot`` and waits until its tool calls have finished."""
+        slot.ready = False
+        request = urllib.request.Request(self.url(slot, "/drain"), data=b"", method="POST")
+        try:
+            urllib.request.urlopen(request, timeout=2).close()
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"ServerSupervisor: could not drain server on port {slot.port}: {e}")
+            return
+        deadline = time.monotonic() + self.drain_timeout
+        # Clients see "draining" once their cached health answer expires; give
+        # the calls they send until then time to arrive before counting.
+        time.sleep(HEALTH_TTL)
+        while time.monotonic() < deadline:
+            health = self._health(slot)
+            if health is None:
+                return
+            executor = health.get("tool_executor", {})
+            if executor.get("running", 0) + executor.get("queued", 0) == 0:
+                return
+            time.sleep(0.1)
+        logger.warning(
+            f"ServerSupervisor: server on port {slot.port} still had tool calls "
+            f"running after {self.drain_timeout}s."
+        )
+
+    def _restart(self, slot: _ServerSlot) -> None:
+        self._stop_process(slot)
+        with self._lock:
+            if self._stop.is_set():
+                return  # stop() ran meanwhile; don't leave a new process behind
+            slot.restarts += 1
+            self._spawn(slot)
+
+    def _needs_recycle(self, health: dict) -> str | None:
+        executor = health.get("tool_executor", {})
+        served = executor.get("completed", 0) + executor.get("failed", 0)
+        if self.max_requests and served >= self.max_requests:
+            return f"served {served} tool calls"
+        rss_mb = health.get("rss_bytes", 0) / (1024 * 1024)
+        if self.max_rss_mb and rss_mb >= self.max_rss_mb:
+            return f"RSS {rss_mb:.1f} MiB"
+        return None
+
+    def _check(self) -> None:
+        with self._lock:
+            slots = list(self._slots)
+        recycling_allowed = True
+        for slot in slots:
+            if self._stop.is_set():
+                return
+            process = slot.process
+            if process is not None and process.poll() is not None:
+                slot.crashes += 1
+                logger.warning(
+                    f"ServerSupervisor: server on port {slot.port} exited with "
+                    f"code {process.returncode}, restarting."
+                )
+                self._restart(slot)
+                continue
+
+            health = self._health(slot)
+            if health is None:
+                slot.failed_checks += 1
+                if slot.ready and slot.failed_checks >= 3:
+                    logger.warning(
+                        f"ServerSupervisor: server on port {slot.port} stopped answering "
+                        f"health checks, restarting."
+                    )
+                    self._restart(slot)
+                elif (
+                    not slot.ready
+                    and time.monotonic() - slot.started_at > self.startup_timeout
+                ):
+                    logger.warning(
+                        f"ServerSupervisor: server on port {slot.port} did not become "
+                        f"healthy within {self.startup_timeout}s, restarting."
+                    )
+                    self._restart(slot)
+                continue
+            slot.failed_checks = 0
+            slot.last_health = health
+            if health.get("status") == "draining":
+                slot.ready = False  # being recycled; it takes no new sessions
+                continue
+            if not slot.ready:
+                logger.info(
+                    f"ServerSupervisor: server on port {slot.port} ready after "
+                    f"{time.monotonic() - slot.started_at:.2f}s."
+                )
+            slot.ready = True
+
+            reason = self._needs_recycle(health)
+            others_ready = any(other.ready for other in slots if other is not slot)
+            if reason and recycling_allowed and (others_ready or len(slots) == 1):
+                logger.info(f"ServerSupervisor: recycling server on port {slot.port} ({reason}).")
+                slot.recycles += 1
+                self._drain(slot)
+                self._restart(slot)
+                recycling_allowed = False
+
+    def _monitor_loop(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            try:
+                self._check()
+            except Exception as e:
+                logger.warning(f"ServerSupervisor: health check failed: {e}")
+
+    # --- Public API ---
+    def start(self, wait: bool = False) -> bool:
+        """Starts every server process and the monitor thread.
+
+        Args:
+            wait: Block until all servers are ready (or ``startup_timeout``).
+
+        Returns:
+            False, without starting anything, if another process on this host
+            already supervises the pool on ``base_port``.
+
+        Raises:
+            RuntimeError: If a port of the pool is taken by another program.
+        """
+        self._pool_lock = claim_pool_lock(self.host, self.base_port)
+        if self._pool_lock is None:
+            return False
+        busy = [slot.port for slot in self._slots if port_in_use(self.host, slot.port)]
+        if busy:
+            self._pool_lock.close()
+            self._pool_lock = None
+            raise RuntimeError(
+                f"Ports {busy} are already in use; stop the process using them or "
+                f"choose another base port (MCP_HTTP_PORT)."
+            )
+        with self._lock:
+            for slot in self._slots:
+                self._spawn(slot)
+        self._monitor = threading.Thread(
+            target=self._monitor_loop, name="mcp-server-supervisor", daemon=True
+        )
+        self._monitor.start()
+        if wait:
+            self.wait_ready()
+        return True
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Blocks until every server answers its health check."""
+        deadline = time.monotonic() + (timeout or self.startup_timeout)
+        while time.monotonic() < deadline:
+            for slot in self._slots:
+                if not slot.ready:
+                    health = self._health(slot)
+                    if health is not None and health.get("status") == "ok":
+                        slot.last_health = health
+                        slot.ready = True
+            if all(slot.ready for slot in self._slots):
+                return True
+            time.sleep(0.1)
+        return False
+
+    def acquire_url(self) -> str:
+        """Returns the streamable HTTP URL of the least loaded server.
+
+        Uses the load each server reported at its last health check. Ready
+        servers are preferred; if none is ready yet the URL of a starting one
+        is returned (the client connects once it is up).
+        """
+        candidates = [slot for slot in self._slots if slot.ready] or self._slots
+        slot = min(candidates, key=lambda candidate: server_load(candidate.last_health))
+        return self.url(slot)
+
+    def server_pid(self, port: int) -> int | None:
+        """PID of the server on ``port`` if it is ready to take sessions, else None.
+
+        Draining, restarting and crashed servers are not ready; this reflects
+        the last health check, not a new request.
+        """
+        for slot in self._slots:
+            if slot.port == port and slot.ready and slot.process is not None:
+                return slot.process.pid
+        return None
+
+    def stop(self) -> None:
+        """Stops the monitor and drains every server process."""
+        self._stop.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=self.check_interval + 1)
+        with self._lock:
+            slots = list(self._slots)
+        for slot in slots:
+            self._stop_process(slot)
+        if self._pool_lock is not None:
+            self._pool_lock.close()
+            self._pool_lock = None
+        logger.info("ServerSupervisor: all servers stopped.")
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "url": self.url(slot),
+                    "pid": slot.process.pid if slot.process else None,
+                    "ready": slot.ready,
+                    "load": server_load(slot.last_health),
+                    "restarts": slot.restarts,
+                    "crashes": slot.crashes,
+                    "recycles": slot.recycles,
+                    "uptime_seconds": round(time.monotonic() - slot.started_at, 1),
+                    "rss_bytes": slot.last_health.get("rss_bytes"),
+                }
+                for slot in self._slots
+            ]
+
+
+class SharedServerPool:
+    """The warm server pool of this host, shared by every agent process using it.
+
+    The first process to create one starts the ServerSupervisor; the others
+    find the lock taken and only connect to its servers. ``acquire_url`` is
+    meant to be called for every new client connection: it returns the least
+    loaded server, so connections from all processes spread over the pool.
+    If no server answers and no process supervises the pool any more, the
+    calling process takes over.
+
+    Loads and PIDs come from the supervisor's last health checks in the
+    supervising process, and from ``/health`` answers cached for
+    ``health_ttl`` seconds in the others, so neither ``acquire_url`` nor
+    ``server_pid`` costs a request per tool call.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        host: str = "127.0.0.1",
+        base_port: int = 8765,
+        health_ttl: float = HEALTH_TTL,
+        **options,
+    ):
+        """
+        Args:
+            size: Number of server processes in the pool.
+            host: Address the servers bind to.
+            base_port: Port of the first server; the others use the next ports.
+            health_ttl: Seconds a server's ``/health`` answer is reused.
+            **options: Further ServerSupervisor arguments, used if this
+                       process ends up supervising the pool.
+        """
+        self.size = size
+        self.host = host
+        self.base_port = base_port
+        self.health_ttl = health_ttl
+        self._options = options
+        self._supervisor: ServerSupervisor | None = None
+        self._lock = threading.Lock()
+        # port -> (time fetched, /health answer or None)
+        self._health: dict[int, tuple[float, dict | None]] = {}
+
+    @property
+    def supervising(self) -> bool:
+        return self._supervisor is not None
+
+    def start(self) -> None:
+        """Starts the supervisor here unless another process already runs it."""
+        with self._lock:
+            if self._supervisor is not None:
+                return
+            supervisor = ServerSupervisor(
+                size=self.size, host=self.host, base_port=self.base_port, **self._options
+            )
+            try:
+                started = supervisor.start()
+            except RuntimeError as e:
+                logger.warning(f"SharedServerPool: not supervising the pool: {e}")
+                return
+            if started:
+                self._supervisor = supervisor
+            else:
+                logger.info(
+                    f"SharedServerPool: pool on port {self.base_port} is supervised "
+                    f"by another process."
+                )
+
+    def _cached_health(self, port: int) -> dict | None:
+        """The server's ``/health`` answer if it is up and not draining, at most ``health_ttl`` old."""
+        now = time.monotonic()
+        fetched_at, health = self._health.get(port, (0.0, None))
+        if now - fetched_at > self.health_ttl:
+            health = fetch_health(self.host, port, timeout=1.0)
+            if health is not None and health.get("status") != "ok":
+                health = None
+            self._health[port] = (now, health)
+        return health
+
+    def server_pid(self, url: str) -> int | None:
+        """PID of the server behind ``url`` while it takes sessions, else None."""
+        port = urlsplit(url).port
+        supervisor = self._supervisor
+        if supervisor is not None:
+            return supervisor.server_pid(port)
+        health = self._cached_health(port)
+        return health.get("pid") if health is not None else None
+
+    def acquire_url(self) -> str:
+        """Returns the streamable HTTP URL of the least loaded server that is up."""
+        supervisor = self._supervisor
+        if supervisor is not None:
+            return supervisor.acquire_url()
+        loads = {}
+        for port in range(self.base_port, self.base_port + self.size):
+            health = self._cached_health(port)
+            if health is not None:
+                loads[port] = server_load(health)
+        if not loads:
+            # Nobody may be supervising any more (that process exited).
+            self.start()
+            if self._supervisor is not None:
+                return self._supervisor.acquire_url()
+            return f"http://{self.host}:{self.base_port}/mcp"
+        port = min(loads, key=loads.get)
+        return f"http://{self.host}:{port}/mcp"
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._supervisor is not None:
+                self._supervisor.stop()
+                self._supervisor = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep warm SQLite DB MCP servers running.")
+    parser.add_argument("--size", type=int, default=int(os.getenv("MCP_SERVER_POOL_SIZE", "2")))
+    parser.add_argument("--host", default=os.getenv("MCP_HTTP_HOST", "127.0.0.1"))
+    parser.add_argument("--base-port", type=int, default=int(os.getenv("MCP_HTTP_PORT", "8765")))
+    parser.add_argument(
+        "--max-requests", type=int, default=int(os.getenv("MCP_SERVER_MAX_REQUESTS", "0"))
+    )
+    parser.add_argument(
+        "--max-rss-mb", type=float, default=float(os.getenv("MCP_SERVER_MAX_RSS_MB", "0"))
+    )
+    args = parser.parse_args()
+
+    supervisor = ServerSupervisor(
+        size=args.size,
+        host=args.host,
+        base_port=args.base_port,
+        max_requests=args.max_requests,
+        max_rss_mb=args.max_rss_mb,
+    )
+    if not supervisor.start(wait=True):
+        logger.error(
+            f"ServerSupervisor: a pool on port {args.base_port} is already supervised "
+            f"by another process."
+        )
+        sys.exit(1)
+    logger.info(f"ServerSupervisor: serving {[slot['url'] for slot in supervisor.stats()]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
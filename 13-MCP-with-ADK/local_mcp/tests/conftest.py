@@ -0,0 +1,35 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# The server opens MCP_DB_PATH when it is imported; point it at a scratch copy
+# so the tests never write to the checked-in database.
+_scratch = tempfile.mkdtemp(prefix="local_mcp_tests_")
+_db_path = os.path.join(_scratch, "database.db")
+shutil.copy(os.path.join(SERVER_DIR, "database.db"), _db_path)
+with sqlite3.connect(_db_path) as _conn:
+    _conn.execute(
+        "CREATE VIEW IF NOT EXISTS open_todos AS SELECT id, user_id, task FROM todos WHERE completed = 0"
+    )
+    # Reads `users` without the table's name appearing in the view's name.
+    _conn.execute("CREATE VIEW IF NOT EXISTS user_names AS SELECT username FROM users")
+    _conn.execute(
+        "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID"
+    )
+    _conn.executemany(
+        "INSERT OR REPLACE INTO settings VALUES (?, ?)",
+        [("a", "1"), ("b", "2"), ("c", "3")],
+    )
+    _conn.commit()
+    # The server leaves the file alone by default; prepare it the way an
+    # operator would with ``create_db.py --prepare``.
+    from create_db import prepare_database
+
+    prepare_database(_conn)
+_conn.close()
+os.environ["MCP_DB_PATH"] = _db_path
@@ -0,0 +1,23 @@
+import server
+
+
+def test_limit_given_as_string():
+    table = "todos"
+    start = server.changes_since(table)["next_seq"]
+    for task in ("a", "b", "c"):
+        assert server.insert_data(table, {"user_id": 1, "task": task, "completed": 0})["success"]
+
+    page = server.changes_since(table, seq=start, limit="2")
+    assert len(page["changes"]) == 2
+    assert page["has_more"] is True
+
+
+def test_seq_given_as_string():
+    table = "todos"
+    start = server.changes_since(table)["next_seq"]
+    assert server.insert_data(table, {"user_id": 1, "task": "d", "completed": 0})["success"]
+
+    page = server.changes_since(table, seq=str(start))
+    assert page["success"] is True
+    assert page["reset"] is False
+    assert [change["op"] for change in page["changes"]] == ["insert"]
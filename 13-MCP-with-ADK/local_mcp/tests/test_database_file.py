@@ -0,0 +1,61 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import server
+from create_db import prepare_database
+from db_registry import DatabaseRegistry
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+@pytest.fixture
+def plain_db(tmp_path, monkeypatch):
+    """An unprepared copy of the checked-in database, served as the default."""
+    path = str(tmp_path / "plain.db")
+    shutil.copy(os.path.join(os.path.dirname(server.__file__), "database.db"), path)
+    registry = DatabaseRegistry(server.open_database, path)
+    monkeypatch.setattr(server, "databases", registry)
+    yield path
+    registry.close()
+
+
+def test_serving_leaves_the_file_unchanged(plain_db):
+    before = _digest(plain_db)
+    assert server.query_db_table("todos", "*", "1=1")["row_count"] > 0
+    assert server.search_text("todos", "groceries")["success"] is False
+    server.databases.close()
+    assert _digest(plain_db) == before
+    assert not os.path.exists(plain_db + "-wal")
+
+
+def test_search_without_index_asks_for_prepare(plain_db):
+    result = server.search_text("todos", "groceries")
+    assert result["success"] is False
+    assert f"create_db.py --prepare {plain_db}" in result["message"]
+
+
+def test_search_after_index_dropped_asks_for_prepare(plain_db):
+    with sqlite3.connect(plain_db) as conn:
+        prepare_database(conn)
+    conn.close()
+    db = server.databases.get()
+    db.schema_catalog.invalidate()
+    assert server.search_text("todos", "groceries")["success"] is True
+
+    with sqlite3.connect(plain_db) as conn:
+        conn.execute("DROP TABLE todos_fts")
+    conn.close()
+    db.result_cache.clear()
+    with pytest.raises(ValueError, match="create_db.py --prepare"):
+        server.search_text("todos", "groceries")
+    # The catalog was refreshed, so the next call answers without SQL.
+    result = server.search_text("todos", "groceries")
+    assert result["success"] is False
+    assert "create_db.py --prepare" in result["message"]
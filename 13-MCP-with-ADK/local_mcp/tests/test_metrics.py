@@ -0,0 +1,23 @@
+import time
+
+from metrics import TimedWriteStream, ToolMetrics
+
+
+class _Stream:
+    async def send(self, message):
+        pass
+
+
+def test_unanswered_requests_are_bounded():
+    stream = TimedWriteStream(_Stream(), ToolMetrics(), max_pending=3)
+    for request_id in range(10):
+        stream.expect(request_id, "query_db_table")
+    assert list(stream._pending) == [7, 8, 9]
+
+
+def test_unanswered_requests_expire():
+    stream = TimedWriteStream(_Stream(), ToolMetrics(), max_age=0.0)
+    stream.expect(1, "query_db_table")
+    time.sleep(0.01)
+    stream.expect(2, "query_db_table")
+    assert list(stream._pending) == [2]
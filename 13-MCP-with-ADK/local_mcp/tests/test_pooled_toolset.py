@@ -0,0 +1,8 @@
+import pytest
+
+import pooled_toolset
+
+
+def test_missing_adk_internals_are_reported():
+    with pytest.raises(RuntimeError, match=pooled_toolset.TESTED_ADK_VERSION):
+        pooled_toolset._require(object(), ("_sessions",))
@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+import server
+from server import query_db_table
+
+
+def direct(sql: str) -> list[tuple]:
+    conn = sqlite3.connect(server.DATABASE_PATH)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def all_pages(**kwargs) -> list[dict]:
+    rows, token = [], None
+    while True:
+        page = query_db_table(page_token=token, **kwargs)
+        rows.extend(page["rows"])
+        if not page["has_more"]:
+            assert page["next_page_token"] is None
+            return rows
+        token = page["next_page_token"]
+
+
+def test_plain_query_pages_by_rowid():
+    rows = all_pages(table_name="todos", columns="id, task", condition="completed = 0", page_size=7)
+    expected = direct("SELECT id, task FROM todos WHERE completed = 0 ORDER BY rowid")
+    assert [(row["id"], row["task"]) for row in rows] == expected
+
+
+def test_distinct_columns():
+    rows = all_pages(table_name="todos", columns="DISTINCT user_id", condition="", page_size=3)
+    expected = direct("SELECT DISTINCT user_id FROM todos")
+    assert sorted(row["user_id"] for row in rows) == sorted(user_id for (user_id,) in expected)
+
+
+def test_condition_with_order_by():
+    rows = all_pages(
+        table_name="todos", columns="id", condition="completed = 0 ORDER BY id DESC", page_size=4
+    )
+    expected = direct("SELECT id FROM todos WHERE completed = 0 ORDER BY id DESC")
+    assert [row["id"] for row in rows] == [row_id for (row_id,) in expected]
+
+
+def test_condition_with_group_by():
+    rows = all_pages(
+        table_name="todos", columns="user_id, COUNT(*) AS n", condition="1=1 GROUP BY user_id", page_size=2
+    )
+    expected = direct("SELECT user_id, COUNT(*) FROM todos GROUP BY user_id")
+    assert sorted((row["user_id"], row["n"]) for row in rows) == sorted(expected)
+
+
+def test_condition_with_limit():
+    page = query_db_table(table_name="todos", columns="id", condition="1=1 LIMIT 2", page_size=10)
+    assert page["row_count"] == 2
+    assert page["has_more"] is False
+
+
+def test_join_table_name():
+    rows = all_pages(
+        table_name="todos JOIN users ON users.id = todos.user_id",
+        columns="todos.id AS todo_id, users.username",
+        condition="todos.completed = 1",
+        page_size=5,
+    )
+    expected = direct(
+        "SELECT todos.id, users.username FROM todos JOIN users ON users.id = todos.user_id "
+        "WHERE todos.completed = 1"
+    )
+    assert sorted((row["todo_id"], row["username"]) for row in rows) == sorted(expected)
+
+
+def test_view():
+    rows = all_pages(table_name="open_todos", columns="id", condition="", page_size=5)
+    expected = direct("SELECT id FROM open_todos")
+    assert sorted(row["id"] for row in rows) == sorted(row_id for (row_id,) in expected)
+
+
+def test_offset_pages_follow_a_stable_order():
+    # Views, joins and computed columns page with OFFSET; without an ORDER BY
+    # SQLite could return the rows in another order on each call.
+    rows = all_pages(table_name="open_todos", columns="task, id", condition="", page_size=2)
+    expected = direct("SELECT task, id FROM open_todos ORDER BY task, id")
+    assert [(row["task"], row["id"]) for row in rows] == expected
+
+
+def test_without_rowid_table():
+    rows = all_pages(table_name="settings", columns="key, value", condition="", page_size=2)
+    assert sorted((row["key"], row["value"]) for row in rows) == [("a", "1"), ("b", "2"), ("c", "3")]
+
+
+def test_page_token_is_bound_to_query():
+    page = query_db_table(table_name="todos", columns="DISTINCT user_id", condition="", page_size=1)
+    with pytest.raises(ValueError):
+        query_db_table(
+            table_name="todos", columns="user_id", condition="", page_size=1,
+            page_token=page["next_page_token"],
+        )
+
+
+@pytest.mark.parametrize("columns", ["id, task, user_id", "DISTINCT id, task, user_id"])
+def test_pages_capped_by_response_budget(monkeypatch, columns):
+    monkeypatch.setattr(server, "RESPONSE_MAX_BYTES", 330)
+    rows, token, pages = [], None, 0
+    while True:
+        page = query_db_table(
+            table_name="todos", columns=columns, condition="id > 0", page_size=50, page_token=token
+        )
+        text = server.encode_response(page, max_bytes=server.RESPONSE_MAX_BYTES)
+        assert '"truncated"' not in text
+        rows.extend(page["rows"])
+        pages += 1
+        if not page["has_more"]:
+            break
+        token = page["next_page_token"]
+    assert pages > 1
+    expected = direct("SELECT id, task, user_id FROM todos WHERE id > 0")
+    assert sorted((row["id"], row["task"], row["user_id"]) for row in rows) == sorted(expected)
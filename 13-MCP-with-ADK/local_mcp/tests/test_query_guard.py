@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+import pytest
+
+from query_guard import disarm_deadline, install_progress_handler, run_with_deadline
+
+SLOW_QUERY = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT count(*) FROM n"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    install_progress_handler(conn, steps=100)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    yield conn
+    conn.close()
+
+
+def test_interrupted_statement_becomes_timeout(conn):
+    def tool():
+        try:
+            conn.execute(SLOW_QUERY).fetchone()
+        except sqlite3.Error as e:
+            raise ValueError(f"Error querying: {e}")
+
+    result = run_with_deadline(tool, {}, threading.Event(), timeout=0.05)
+    assert result["success"] is False
+    assert result["error"] == "timeout"
+
+
+def test_result_after_commit_is_kept(conn):
+    cancelled = threading.Event()
+
+    def tool():
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        disarm_deadline()
+        cancelled.set()  # e.g. the client gave up during the bookkeeping
+        conn.execute("SELECT count(*) FROM t").fetchone()
+        return {"success": True, "row_id": 1}
+
+    assert run_with_deadline(tool, {}, cancelled, timeout=5) == {"success": True, "row_id": 1}
+
+
+def test_returned_result_is_not_replaced(conn):
+    cancelled = threading.Event()
+
+    def tool():
+        cancelled.set()
+        try:
+            conn.execute(SLOW_QUERY).fetchone()
+        except sqlite3.OperationalError:
+            pass
+        return {"success": True}
+
+    assert run_with_deadline(tool, {}, cancelled, timeout=5) == {"success": True}
+
+
+def test_unrelated_errors_propagate(conn):
+    def tool():
+        raise KeyError("boom")
+
+    with pytest.raises(KeyError):
+        run_with_deadline(tool, {}, threading.Event(), timeout=5)
@@ -0,0 +1,88 @@
+import shutil
+import sqlite3
+
+import pytest
+
+import server
+from db_registry import DatabaseRegistry
+from result_cache import DataVersion, ResultCache
+
+
+def count_rows(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def test_data_version_sees_commits_from_other_connections(tmp_path):
+    path = str(tmp_path / "cache.db")
+    writer = sqlite3.connect(path)
+    writer.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    writer.commit()
+    reader = sqlite3.connect(path, check_same_thread=False)
+    cache = ResultCache(version=DataVersion(lambda: sqlite3.connect(path, check_same_thread=False)))
+
+    assert cache.get_or_compute("count", {"items"}, lambda: count_rows(reader)) == 0
+    writer.execute("INSERT INTO items DEFAULT VALUES")
+    writer.commit()
+    # Nothing told the cache about the write; data_version did.
+    assert cache.get_or_compute("count", {"items"}, lambda: count_rows(reader)) == 1
+    assert cache.stats()["data_version_changes"] == 1
+    assert cache.get_or_compute("count", {"items"}, lambda: -1) == 1
+
+
+@pytest.fixture
+def checking_server(tmp_path, monkeypatch):
+    """The server on its own copy of the test database, with the data_version check on."""
+    path = str(tmp_path / "checked.db")
+    shutil.copy(server.DATABASE_PATH, path)
+    monkeypatch.setattr(server, "RESULT_CACHE_CHECK_DATA_VERSION", True)
+    registry = DatabaseRegistry(server.open_database, path)
+    monkeypatch.setattr(server, "databases", registry)
+    yield path
+    registry.close()
+
+
+def test_query_sees_write_from_another_process(checking_server):
+    args = {"table_name": "users", "columns": "username", "condition": "username = 'cache_probe'"}
+    assert server.query_db_table(**args)["row_count"] == 0
+    # Another server of the pool (or any other process) writes the same file.
+    other = sqlite3.connect(checking_server)
+    other.execute("INSERT INTO users (username, email) VALUES ('cache_probe', 'probe@example.com')")
+    other.commit()
+    other.close()
+    assert server.query_db_table(**args)["row_count"] == 1
+
+
+def test_own_write_keeps_other_tables_cached(checking_server):
+    users = {"table_name": "users", "columns": "username", "condition": "id > 0"}
+    server.query_db_table(**users)
+    assert server.insert_data("todos", {"user_id": 1, "task": "x", "completed": 0})["success"]
+    server.query_db_table(**users)
+    stats = server.databases.get().result_cache.stats()
+    assert stats["data_version_changes"] == 0
+    assert stats["hits"] == 1
+
+
+def test_replica_reads_cached_per_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "replicated.db")
+    shutil.copy(server.DATABASE_PATH, path)
+    monkeypatch.setattr(server, "REPLICA_MODE", "memory")
+    monkeypatch.setattr(server, "REPLICA_MAX_STALENESS", 60.0)
+    registry = DatabaseRegistry(server.open_database, path)
+    monkeypatch.setattr(server, "databases", registry)
+    try:
+        args = {"table_name": "users", "columns": "username", "condition": "username = 'replica_probe'"}
+        assert server.query_db_table(**args)["row_count"] == 0
+        assert server.insert_data("users", {"username": "replica_probe", "email": "r@example.com"})["success"]
+        # The snapshot predates the write; this read is cached for it only.
+        assert server.query_db_table(**args)["row_count"] == 0
+        registry.get().replicas.refresh()
+        assert server.query_db_table(**args)["row_count"] == 1
+    finally:
+        registry.close()
+
+
+def test_query_on_view_sees_write_to_its_table():
+    args = {"table_name": "user_names", "columns": "username", "condition": "username = 'view_probe'"}
+    assert server.query_db_table(**args)["row_count"] == 0
+    assert server.insert_data("users", {"username": "view_probe", "email": "v@example.com"})["success"]
+    assert server.query_db_table(**args)["row_count"] == 1
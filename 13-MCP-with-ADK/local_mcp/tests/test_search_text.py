@@ -0,0 +1,16 @@
+import pytest
+
+import server
+
+
+@pytest.mark.parametrize("query", ["*", "  *  ** ", "\t*\n"])
+def test_query_without_words(query):
+    assert server.search_text("todos", query) == {
+        "success": False,
+        "message": "query has no searchable words",
+    }
+
+
+def test_prefix_query_still_searches():
+    result = server.search_text("todos", "gro*")
+    assert result["success"] is True
@@ -0,0 +1,62 @@
+import threading
+from types import SimpleNamespace
+
+import server_pool
+from server_pool import ServerSupervisor, SharedServerPool
+
+
+def test_pool_health_is_cached(monkeypatch):
+    calls = []
+
+    def fake_health(host, port, timeout=2.0):
+        calls.append(port)
+        return {"status": "ok", "pid": 4000 + port - 9300, "clients": {"http_requests": port - 9300}}
+
+    monkeypatch.setattr(server_pool, "fetch_health", fake_health)
+    pool = SharedServerPool(size=2, base_port=9300, health_ttl=60)
+    assert pool.acquire_url() == "http://127.0.0.1:9300/mcp"
+    for _ in range(10):
+        assert pool.server_pid("http://127.0.0.1:9301/mcp") == 4001
+        pool.acquire_url()
+    assert sorted(calls) == [9300, 9301]
+
+
+def test_draining_server_has_no_pid(monkeypatch):
+    monkeypatch.setattr(
+        server_pool, "fetch_health", lambda host, port, timeout=2.0: {"status": "draining", "pid": 1}
+    )
+    pool = SharedServerPool(size=1, base_port=9300)
+    assert pool.server_pid("http://127.0.0.1:9300/mcp") is None
+
+
+def test_supervisor_reports_ready_slots_only():
+    supervisor = ServerSupervisor(size=2, base_port=9300)
+    first, second = supervisor._slots
+    first.process, first.ready = SimpleNamespace(pid=11), True
+    second.process, second.ready = SimpleNamespace(pid=12), False
+    assert supervisor.server_pid(9300) == 11
+    assert supervisor.server_pid(9301) is None
+
+
+def test_lock_is_free_while_a_slot_drains(monkeypatch):
+    supervisor = ServerSupervisor(size=1, base_port=9300, max_requests=1)
+    slot = supervisor._slots[0]
+    slot.process = SimpleNamespace(pid=11, poll=lambda: None)
+    draining = threading.Event()
+    release = threading.Event()
+    monkeypatch.setattr(
+        supervisor,
+        "_health",
+        lambda slot: {"status": "ok", "pid": 11, "tool_executor": {"completed": 5}},
+    )
+    monkeypatch.setattr(supervisor, "_drain", lambda slot: (draining.set(), release.wait(5)))
+    monkeypatch.setattr(supervisor, "_restart", lambda slot: None)
+
+    checker = threading.Thread(target=supervisor._check)
+    checker.start()
+    assert draining.wait(5)
+    assert supervisor._lock.acquire(timeout=1)
+    supervisor._lock.release()
+    release.set()
+    checker.join(5)
+    assert slot.recycles == 1
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+from tool_executor import ToolExecutor
+
+
+def test_cancelled_call_keeps_its_slot_until_the_thread_finishes():
+    release = threading.Event()
+    started = []
+
+    def blocking(name: str) -> str:
+        started.append(name)
+        release.wait(5)
+        return name
+
+    async def scenario():
+        executor = ToolExecutor(max_workers=2, max_concurrency=1)
+        first = asyncio.create_task(executor.run(blocking, name="first"))
+        while not started:
+            await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+
+        # The worker thread is still inside blocking(): the slot stays taken.
+        stats = executor.stats()
+        assert stats["running"] == 1
+        second = asyncio.create_task(executor.run(blocking, name="second"))
+        await asyncio.sleep(0.1)
+        assert started == ["first"]
+
+        release.set()
+        assert await asyncio.wait_for(second, 5) == "second"
+        stats = executor.stats()
+        assert (stats["running"], stats["cancelled"], stats["completed"]) == (0, 1, 1)
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_failed_call_frees_its_slot():
+    def broken():
+        raise ValueError("boom")
+
+    async def scenario():
+        executor = ToolExecutor(max_workers=1, max_concurrency=1)
+        for _ in range(3):
+            try:
+                await asyncio.wait_for(executor.run(broken), 5)
+            except ValueError:
+                pass
+        stats = executor.stats()
+        assert (stats["running"], stats["failed"]) == (0, 3)
+        executor.shutdown()
+
+    asyncio.run(scenario())
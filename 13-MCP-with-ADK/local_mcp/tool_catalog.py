@@ -0,0 +1,126 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable
+
+from loguru import logger
+from mcp import types as mcp_types
+
+# Schema advertised for tools whose ADK declaration has no parameters.
+EMPTY_INPUT_SCHEMA = {"type": "object", "properties": {}}
+
+
+def _digest(payload) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def convert_with_adk(funcs: dict[str, Callable[..., Any]]) -> list[mcp_types.Tool]:
+    """Builds the MCP tool definitions with ADK's schema generation.
+
+    ADK is imported here rather than at module level: it is only needed when
+    the precomputed schemas are missing or out of date.
+    """
+    started = time.perf_counter()
+    from google.adk.tools.function_tool import FunctionTool
+    from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+
+    logger.info(f"ToolCatalog: imported ADK in {(time.perf_counter() - started) * 1000:.0f} ms.")
+    tools = []
+    for tool_name, func in funcs.items():
+        adk_tool_instance = FunctionTool(func=func)
+        if not adk_tool_instance.name:
+            adk_tool_instance.name = tool_name
+        mcp_tool = adk_to_mcp_tool_type(adk_tool_instance)
+        if mcp_tool.inputSchema is None:
+            mcp_tool.inputSchema = dict(EMPTY_INPUT_SCHEMA)
+        logger.debug(f"ToolCatalog: {mcp_tool.name} InputSchema: {mcp_tool.inputSchema}")
+        tools.append(mcp_tool)
+    return tools
+
+
+def load_schema_file(path: str, fingerprint: str) -> list[mcp_types.Tool] | None:
+    """Reads precomputed tool definitions, or None if missing or made for other tools."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"ToolCatalog: ignoring unreadable schema file {path}: {e}")
+        return None
+    if stored.get("fingerprint") != fingerprint:
+        return None
+    return [mcp_types.Tool.model_validate(tool) for tool in stored["tools"]]
+
+
+def write_schema_file(path: str, fingerprint: str, tools: list[mcp_types.Tool]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "fingerprint": fingerprint,
+                "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+    logger.info(f"ToolCatalog: wrote {len(tools)} tool schemas to {path}.")
+
+
+class ToolCatalog:
+    """The MCP tool list, built once and then frozen.
+
+    Converting the tool functions to JSON schemas is done once rather than
+    per ``list_tools`` request: the tools cannot change while the server
+    runs. The catalog keeps the finished ``ListToolsResult``.
+
+    The result carries a content hash in ``_meta``: ``schemaHash`` covers the
+    whole list and ``toolHashes`` maps each tool to the hash of its own
+    definition. A client that remembers them can skip re-parsing schemas that
+    did not change.
+    """
+
+    def __init__(self, tools: list[mcp_types.Tool], source: str = "adk"):
+        tool_hashes = {
+            tool.name: _digest(tool.model_dump(mode="json", exclude_none=True)) for tool in tools
+        }
+        self.tools: tuple[mcp_types.Tool, ...] = tuple(tools)
+        self.source = source
+        self.tool_hashes: dict[str, str] = tool_hashes
+        self.schema_hash = _digest(sorted(tool_hashes.items()))
+        self.list_tools_result = mcp_types.ServerResult(
+            mcp_types.ListToolsResult(
+                tools=list(self.tools),
+                _meta={"schemaHash": self.schema_hash, "toolHashes": dict(tool_hashes)},
+            )
+        )
+        logger.info(
+            f"ToolCatalog: {len(self.tools)} tools advertised ({source}), "
+            f"schema hash {self.schema_hash[:12]}."
+        )
+
+    @classmethod
+    def load(
+        cls,
+        funcs: dict[str, Callable[..., Any]],
+        fingerprint: str,
+        schema_file: str | None = None,
+    ) -> "ToolCatalog":
+        """Uses the precomputed schemas in ``schema_file`` when they match ``fingerprint``.
+
+        Otherwise the schemas are generated with ADK (slow: several seconds
+        of imports) and a warning explains how to refresh the file.
+        """
+        if schema_file:
+            tools = load_schema_file(schema_file, fingerprint)
+            if tools is not None and [tool.name for tool in tools] == list(funcs):
+                return cls(tools, source="precomputed")
+            logger.warning(
+                f"ToolCatalog: {schema_file} is missing or out of date, generating schemas "
+                "with ADK. Run `python server.py --rebuild-tool-schemas` to refresh it."
+            )
+        return cls(convert_with_adk(funcs), source="adk")
+
+    def __len__(self) -> int:
+        return len(self.tools)
@@ -0,0 +1,182 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from loguru import logger
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when too many tool calls are already waiting for a worker."""
+
+
+class ToolExecutor:
+    """Runs blocking tool functions on a bounded pool of worker threads.
+
+    At most ``max_concurrency`` tool calls execute at once; further calls wait
+    in a queue (without blocking the event loop) until a slot frees up. When
+    ``max_queue`` calls are already waiting, new calls are rejected with
+    ``ServerBusyError`` instead of piling up indefinitely.
+
+    If ``call_wrapper`` is given, the worker thread runs
+    ``call_wrapper(func, kwargs, cancelled)`` instead of ``func(**kwargs)``.
+    ``cancelled`` is a ``threading.Event`` that is set when the awaiting task
+    is cancelled (e.g. the MCP client cancelled the request), so the wrapper
+    can stop work that would otherwise keep the thread busy.
+
+    If ``timing_hook`` is given, it is called as
+    ``timing_hook(queue_wait_seconds, run_seconds)`` in the awaiting task
+    once each call finishes, so callers can attribute the time per request.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_concurrency: int = 8,
+        max_queue: int = 64,
+        call_wrapper: Callable[[Callable[..., Any], dict, threading.Event], Any] | None = None,
+        timing_hook: Callable[[float, float], None] | None = None,
+    ):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._call_wrapper = call_wrapper
+        self._timing_hook = timing_hook
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="mcp-db-worker"
+        )
+        # Created lazily so the executor can be built before an event loop exists.
+        self._slots: asyncio.Semaphore | None = None
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    async def run(self, func: Callable[..., Any], /, **kwargs) -> Any:
+        """Runs ``func(**kwargs)`` on a worker thread and returns its result."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ServerBusyError(
+                    f"Server busy: {self._queued} tool calls are already queued."
+                )
+            self._queued += 1
+
+        enqueued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            with self._lock:
+                self._queued -= 1
+        waited = time.perf_counter() - enqueued_at
+
+        with self._lock:
+            self._running += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        started_at = time.perf_counter()
+        cancelled = threading.Event()
+        if self._call_wrapper is None:
+            call = functools.partial(func, **kwargs)
+        else:
+            call = functools.partial(self._call_wrapper, func, kwargs, cancelled)
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            self._slots.release()
+            with self._lock:
+                self._running -= 1
+            raise
+        # The slot and the counters belong to the worker thread, not to the
+        # awaiting task: a cancelled task stops waiting at once, but the thread
+        # may still be running SQL until the wrapper notices ``cancelled``.
+        future.add_done_callback(
+            functools.partial(self._finished, loop, cancelled, started_at)
+        )
+        try:
+            return await asyncio.wrap_future(future, loop=loop)
+        except asyncio.CancelledError:
+            # The thread can't be cancelled; tell the wrapper to stop instead.
+            cancelled.set()
+            raise
+        finally:
+            if self._timing_hook is not None:
+                self._timing_hook(waited, time.perf_counter() - started_at)
+
+    def _finished(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        cancelled: threading.Event,
+        started_at: float,
+        future,
+    ) -> None:
+        """Done callback of a call's future: frees its slot once the worker is done."""
+        ran = time.perf_counter() - started_at
+        with self._lock:
+            self._running -= 1
+            self._total_run += ran
+            if cancelled.is_set() or future.cancelled():
+                self._cancelled += 1
+            elif future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+        try:
+            loop.call_soon_threadsafe(self._slots.release)
+        except RuntimeError:  # the event loop is closed
+            pass
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Returns an async version of ``func`` that runs on this executor.
+
+        The wrapper keeps ``func``'s name, signature and docstring, so ADK's
+        ``FunctionTool`` still builds the same schema from it.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            return await self.run(func, **kwargs)
+
+        return wrapper
+
+    def stats(self) -> dict:
+        """Returns queueing and execution counters."""
+        with self._lock:
+            finished = self._completed + self._failed + self._cancelled
+            return {
+                "max_workers": self.max_workers,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "avg_queue_wait_ms": round(self._total_wait / finished * 1000, 3)
+                if finished
+                else 0.0,
+                "max_queue_wait_ms": round(self._max_wait * 1000, 3),
+                "avg_run_ms": round(self._total_run / finished * 1000, 3)
+                if finished
+                else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops accepting work and waits for running tool calls to finish."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        logger.info(f"ToolExecutor: shut down. Final stats: {self.stats()}")
@@ -0,0 +1,54 @@
+import hashlib
+import inspect
+from typing import Any, Callable
+
+
+class LocalTool:
+    """Calls a tool function the way ADK's ``FunctionTool.run_async`` does, without ADK.
+
+    Importing ADK costs seconds, and the server only needs two things from
+    ``FunctionTool`` at call time: the missing-argument check (reported back
+    to the model as an ``error`` instead of raising) and awaiting the
+    function. Both are reproduced here from the function's signature.
+    """
+
+    def __init__(self, func: Callable[..., Any], name: str | None = None):
+        self.func = func
+        self.name = name or func.__name__
+        signature = inspect.signature(func)
+        self.accepts_tool_context = "tool_context" in signature.parameters
+        self.mandatory_args = [
+            param.name
+            for param in signature.parameters.values()
+            if param.default is inspect.Parameter.empty
+            and param.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+            and param.name != "tool_context"
+        ]
+
+    async def run_async(self, *, args: dict[str, Any], tool_context=None) -> Any:
+        args_to_call = args.copy()
+        if self.accepts_tool_context:
+            args_to_call["tool_context"] = tool_context
+        missing = [arg for arg in self.mandatory_args if arg not in args_to_call]
+        if missing:
+            missing_str = "\n".join(missing)
+            return {
+                "error": f"Invoking `{self.name}()` failed as the following mandatory input "
+                f"parameters are not present:\n{missing_str}\nYou could retry calling this "
+                "tool, but it is IMPORTANT for you to provide all the mandatory parameters."
+            }
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(**args_to_call)
+        return self.func(**args_to_call)
+
+
+def tools_fingerprint(funcs: dict[str, Callable[..., Any]]) -> str:
+    """Hash of everything ADK derives a tool schema from: names, signatures, docstrings.
+
+    If it matches the fingerprint stored with precomputed schemas, those
+    schemas are still what ADK would generate.
+    """
+    digest = hashlib.sha256()
+    for name, func in sorted(funcs.items()):
+        digest.update(f"{name}\0{inspect.signature(func)}\0{inspect.getdoc(func)}\0".encode("utf-8"))
+    return digest.hexdigest()
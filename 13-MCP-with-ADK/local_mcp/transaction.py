@@ -0,0 +1,151 @@
+import sqlite3
+from typing import Callable
+
+from pagination import fetch_page
+from query_builder import compile_delete, compile_insert, compile_select, compile_update
+
+TRANSACTION_OPS = ("insert", "update", "delete", "select")
+
+
+class TransactionStepError(ValueError):
+    """A step of ``run_operations`` failed; the whole transaction was rolled back."""
+
+    def __init__(self, step: int, message: str):
+        super().__init__(f"Step {step} failed: {message}")
+        self.step = step
+
+
+def _resolve(value, results: list[dict]):
+    """Replaces ``{"$row_id": n}`` with the row id created by insert step ``n``."""
+    if not (isinstance(value, dict) and set(value) == {"$row_id"}):
+        return value
+    step = value["$row_id"]
+    if not isinstance(step, int) or not 0 <= step < len(results) or "row_id" not in results[step]:
+        raise ValueError(f"'$row_id' must refer to an earlier insert step, got {step!r}.")
+    return results[step]["row_id"]
+
+
+def _resolve_filters(filters, results: list[dict]):
+    if not isinstance(filters, list):
+        return filters
+    resolved = []
+    for predicate in filters:
+        if isinstance(predicate, dict) and "value" in predicate:
+            value = predicate["value"]
+            if isinstance(value, list):
+                value = [_resolve(item, results) for item in value]
+            predicate = {**predicate, "value": _resolve(value, results)}
+        resolved.append(predicate)
+    return resolved
+
+
+def _run_step(
+    conn: sqlite3.Connection,
+    operation: dict,
+    results: list[dict],
+    columns_of: Callable[[str], list[str]],
+    max_rows: int,
+) -> tuple[str, str, dict]:
+    if not isinstance(operation, dict):
+        raise ValueError(f"Each operation must be an object, got {operation!r}.")
+    op = str(operation.get("op", "")).strip().lower()
+    if op not in TRANSACTION_OPS:
+        raise ValueError(f"Unsupported op '{op}'. Use one of: {', '.join(TRANSACTION_OPS)}.")
+    table_name = operation.get("table_name")
+    known_columns = columns_of(table_name) if isinstance(table_name, str) else []
+    if not known_columns:
+        raise ValueError(f"Table '{table_name}' not found.")
+    filters = _resolve_filters(operation.get("filters"), results)
+    values = operation.get("values")
+    if isinstance(values, dict):
+        values = {column: _resolve(value, results) for column, value in values.items()}
+
+    if op == "select":
+        limit = max(1, min(int(operation.get("limit") or max_rows), max_rows))
+        sql, params = compile_select(
+            table_name,
+            known_columns,
+            columns=operation.get("columns"),
+            filters=filters,
+            order_by=operation.get("order_by"),
+            limit=limit + 1,
+        )
+        cursor = conn.execute(sql, params)
+        try:
+            rows, _, has_more = fetch_page(cursor, limit, key_column=None)
+        finally:
+            cursor.close()
+        return op, table_name, {"rows": rows, "row_count": len(rows), "has_more": has_more}
+
+    if op == "insert":
+        sql, params = compile_insert(table_name, known_columns, values)
+    elif op == "update":
+        sql, params = compile_update(table_name, known_columns, values, filters)
+    else:
+        sql, params = compile_delete(table_name, known_columns, filters)
+    cursor = conn.execute(sql, params)
+    result = {"rows_affected": max(cursor.rowcount, 0)}
+    if op == "insert":
+        result["row_id"] = cursor.lastrowid
+    return op, table_name, result
+
+
+def run_operations(
+    conn: sqlite3.Connection,
+    operations: list[dict],
+    columns_of: Callable[[str], list[str]],
+    max_rows: int = 500,
+) -> dict:
+    """Runs structured operations in order inside one ``BEGIN IMMEDIATE ... COMMIT``.
+
+    Each operation is an object with 'op' and 'table_name' plus:
+        insert  'values' (column name -> value).
+        update  'values' and 'filters' (required, see ``compile_filters``).
+        delete  'filters' (required).
+        select  optional 'columns', 'filters', 'order_by' and 'limit'
+                (capped at ``max_rows``); it sees the earlier steps' writes.
+    A value, or a filter value, of ``{"$row_id": n}`` stands for the row id
+    inserted by step ``n``. An optional 'expect_rows' makes the step fail
+    unless it affected (or, for a select, returned) exactly that many rows.
+
+    Taking the write lock up front means no step can fail half way with
+    SQLITE_BUSY, and all steps share one commit (one fsync).
+
+    Args:
+        conn: The writer connection.
+        operations: The steps, in order.
+        columns_of: Returns the column names of a table (empty if unknown).
+        max_rows: Row cap of a select step.
+
+    Returns:
+        dict: 'steps' (one result per operation: 'rows_affected', plus
+              'row_id' for inserts; 'rows', 'row_count' and 'has_more' for
+              selects) and 'tables_written'.
+
+    Raises:
+        TransactionStepError: A step was invalid, failed or did not match
+            'expect_rows'. Nothing was written.
+    """
+    results: list[dict] = []
+    tables_written: set[str] = set()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for index, operation in enumerate(operations):
+            try:
+                op, table_name, result = _run_step(conn, operation, results, columns_of, max_rows)
+            except (sqlite3.Error, ValueError, TypeError) as e:
+                raise TransactionStepError(index, str(e)) from e
+            expected = operation.get("expect_rows")
+            actual = result["row_count"] if op == "select" else result["rows_affected"]
+            if expected is not None and actual != expected:
+                raise TransactionStepError(
+                    index, f"expected {expected} row(s), {op} matched {actual}."
+                )
+            if op != "select":
+                tables_written.add(table_name)
+            results.append({"step": index, "op": op, "table_name": table_name, **result})
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return {"steps": results, "tables_written": sorted(tables_written)}
@@ -15,10 +15,11 @@ session_service = DatabaseSessionService(db_url=db_url)
 
 
 # ===== PART 2: Define Initial State =====
-# This will only be used when creating a new session
+# This will only be used when creating a new session.
+# Reminders are not part of it: they are stored as rows in their own table
+# (see memory_agent/reminder_store.py).
 initial_state = {
     "user_name": "Phạm Trịnh Đức",
-    "reminders": [],
 }
 
 async def main_async():
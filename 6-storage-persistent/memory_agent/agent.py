@@ -1,7 +1,46 @@
+import os
+import uuid
+from typing import Any, Mapping
+
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools.tool_context import ToolContext
 from loguru import logger
 
+from .reminder_store import ReminderStore
+
+# Reminders are rows in their own table, in the same database as the sessions
+# (see main.py); session state only keeps the id of the session's list.
+reminder_store = ReminderStore(os.getenv("REMINDERS_DB_PATH", "my_agent_data.db"))
+
+
+def get_reminder_list_id(tool_context: ToolContext) -> str:
+    """Returns the id of the session's reminder list, creating it on first use.
+
+    Sessions started before reminders were stored as rows keep them in
+    state["reminders"]; they are copied into the store once and the state
+    entry is cleared.
+    """
+    list_id = tool_context.state.get("reminder_list_id")
+    if list_id is None:
+        list_id = uuid.uuid4().hex
+        legacy_reminders = tool_context.state.get("reminders")
+        if legacy_reminders:
+            reminder_store.add_many(list_id, legacy_reminders)
+        if legacy_reminders is not None:
+            tool_context.state["reminders"] = None
+        tool_context.state["reminder_list_id"] = list_id
+    return list_id
+
+
+def current_reminders(state: Mapping[str, Any]) -> list[str]:
+    """The reminders of a session, given its state."""
+    list_id = state.get("reminder_list_id")
+    if list_id is None:
+        return state.get("reminders") or []
+    return reminder_store.list_reminders(list_id)
+
+
 def add_reminder(reminder: str, tool_context: ToolContext) -> dict:
     """Add a new reminder to the user's reminder list.
 
@@ -14,14 +53,8 @@ def add_reminder(reminder: str, tool_context: ToolContext) -> dict:
     """
     logger.info(f"--- Tool: add_reminder called for '{reminder}' ---")
 
-    # Get current reminders from state
-    reminders = tool_context.state.get("reminders", [])
-
-    # Add the new reminder
-    reminders.append(reminder)
-
-    # Update state with the new list of reminders
-    tool_context.state["reminders"] = reminders
+    # Append one row to the session's reminder list
+    reminder_store.add(get_reminder_list_id(tool_context), reminder)
 
     return {
         "action": "add_reminder",
@@ -41,8 +74,8 @@ def view_reminders(tool_context: ToolContext) -> dict:
     """
     print("--- Tool: view_reminders called ---")
 
-    # Get reminders from state
-    reminders = tool_context.state.get("reminders", [])
+    # Get reminders from the store
+    reminders = reminder_store.list_reminders(get_reminder_list_id(tool_context))
 
     return {"action": "view_reminders", "reminders": reminders, "count": len(reminders)}
 
@@ -62,24 +95,17 @@ def update_reminder(index: int, updated_text: str, tool_context: ToolContext) ->
         f"--- Tool: update_reminder called for index {index} with '{updated_text}' ---"
     )
 
-    # Get current reminders from state
-    reminders = tool_context.state.get("reminders", [])
+    list_id = get_reminder_list_id(tool_context)
 
-    # Check if the index is valid
-    if not reminders or index < 1 or index > len(reminders):
+    # Update the reminder's row; None if there is no reminder at that position
+    old_reminder = reminder_store.update(list_id, index, updated_text)
+    if old_reminder is None:
         return {
             "action": "update_reminder",
             "status": "error",
-            "message": f"Could not find reminder at position {index}. Currently there are {len(reminders)} reminders.",
+            "message": f"Could not find reminder at position {index}. Currently there are {reminder_store.count(list_id)} reminders.",
         }
 
-    # Update the reminder (adjusting for 0-based indices)
-    old_reminder = reminders[index - 1]
-    reminders[index - 1] = updated_text
-
-    # Update state with the modified list
-    tool_context.state["reminders"] = reminders
-
     return {
         "action": "update_reminder",
         "index": index,
@@ -101,23 +127,17 @@ def delete_reminder(index: int, tool_context: ToolContext) -> dict:
     """
     print(f"--- Tool: delete_reminder called for index {index} ---")
 
-    # Get current reminders from state
-    reminders = tool_context.state.get("reminders", [])
+    list_id = get_reminder_list_id(tool_context)
 
-    # Check if the index is valid
-    if not reminders or index < 1 or index > len(reminders):
+    # Delete the reminder's row; None if there is no reminder at that position
+    deleted_reminder = reminder_store.delete(list_id, index)
+    if deleted_reminder is None:
         return {
             "action": "delete_reminder",
             "status": "error",
-            "message": f"Could not find reminder at position {index}. Currently there are {len(reminders)} reminders.",
+            "message": f"Could not find reminder at position {index}. Currently there are {reminder_store.count(list_id)} reminders.",
         }
 
-    # Remove the reminder (adjusting for 0-based indices)
-    deleted_reminder = reminders.pop(index - 1)
-
-    # Update state with the modified list
-    tool_context.state["reminders"] = reminders
-
     return {
         "action": "delete_reminder",
         "index": index,
@@ -152,12 +172,7 @@ def update_user_name(name: str, tool_context: ToolContext) -> dict:
     }
 
 
-# Create a simple persistent agent
-agent = Agent(
-    name="memory_agent",
-    model="gemini-2.0-flash",
-    description="A smart reminder agent with persistent memory",
-    instruction="""
+MEMORY_AGENT_INSTRUCTION = """
     You are a friendly reminder assistant that remembers users across conversations.
     
     The user's information is stored in state:
@@ -219,7 +234,22 @@ agent = Agent(
     - use your best judgement to determine which reminder the user is referring to. 
     - You don't have to be 100% correct, but try to be as close as possible.
     - Never ask the user to clarify which reminder they are referring to.
-    """,
+    """
+
+
+def build_instruction(context: ReadonlyContext) -> str:
+    """Fills in {user_name} from state and {reminders} from the reminder store."""
+    return MEMORY_AGENT_INSTRUCTION.replace(
+        "{user_name}", str(context.state.get("user_name", ""))
+    ).replace("{reminders}", str(current_reminders(context.state)))
+
+
+# Create a simple persistent agent
+agent = Agent(
+    name="memory_agent",
+    model="gemini-2.0-flash",
+    description="A smart reminder agent with persistent memory",
+    instruction=build_instruction,
     tools=[
         add_reminder,
         view_reminders,
@@ -0,0 +1,104 @@
+import sqlite3
+import threading
+import time
+
+
+class ReminderStore:
+    """Reminders kept as one row each in SQLite, grouped into lists.
+
+    Keeping the reminders in session state means every change writes the
+    whole list again: ``DatabaseSessionService`` stores the state delta with
+    the event and rewrites the session's state column. Here adding, updating
+    or deleting a reminder writes a single row, however many reminders the
+    list has.
+
+    Positions are 1-based and follow insertion order, like the list they
+    replace: deleting reminder 2 moves reminder 3 to position 2.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file; the table is created on first use.
+        """
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reminders ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "list_id TEXT NOT NULL, "
+                "text TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS reminders_by_list ON reminders (list_id, id)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _row_at(self, conn: sqlite3.Connection, list_id: str, position: int):
+        if position < 1:
+            return None
+        return conn.execute(
+            "SELECT id, text FROM reminders WHERE list_id = ? ORDER BY id LIMIT 1 OFFSET ?",
+            (list_id, position - 1),
+        ).fetchone()
+
+    def list_reminders(self, list_id: str) -> list[str]:
+        with self._lock:
+            conn = self._connection()
+            return [
+                text
+                for (text,) in conn.execute(
+                    "SELECT text FROM reminders WHERE list_id = ? ORDER BY id", (list_id,)
+                )
+            ]
+
+    def count(self, list_id: str) -> int:
+        with self._lock:
+            conn = self._connection()
+            return conn.execute(
+                "SELECT COUNT(*) FROM reminders WHERE list_id = ?", (list_id,)
+            ).fetchone()[0]
+
+    def add(self, list_id: str, text: str) -> None:
+        self.add_many(list_id, [text])
+
+    def add_many(self, list_id: str, texts: list[str]) -> None:
+        """Appends reminders in order, in one transaction."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO reminders (list_id, text, created_at) VALUES (?, ?, ?)",
+                    [(list_id, text, now) for text in texts],
+                )
+
+    def update(self, list_id: str, position: int, text: str) -> str | None:
+        """Replaces the text of the reminder at ``position``; returns the old text, or None if there is none."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = self._row_at(conn, list_id, position)
+                if row is None:
+                    return None
+                conn.execute("UPDATE reminders SET text = ? WHERE id = ?", (text, row[0]))
+            return row[1]
+
+    def delete(self, list_id: str, position: int) -> str | None:
+        """Removes the reminder at ``position``; returns its text, or None if there is none."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = self._row_at(conn, list_id, position)
+                if row is None:
+                    return None
+                conn.execute("DELETE FROM reminders WHERE id = ?", (row[0],))
+            return row[1]
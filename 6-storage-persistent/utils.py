@@ -1,4 +1,5 @@
 from google.genai import types
+from memory_agent.agent import current_reminders
 
 
 # ANSI color codes for terminal output
@@ -48,8 +49,8 @@ def display_state(
         user_name = session.state.get("user_name", "Unknown")
         print(f"👤 User: {user_name}")
 
-        # Handle reminders
-        reminders = session.state.get("reminders", [])
+        # Handle reminders (stored as rows, see memory_agent/reminder_store.py)
+        reminders = current_reminders(session.state)
         if reminders:
             print("📝 Reminders:")
             for idx, reminder in enumerate(reminders, 1):